@@ -0,0 +1,86 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Throughput of asynchronous vs synchronous successive halving on `DemoDriver`.
+
+`DemoDriver` trains one epoch of a random unfinished experiment per tick, so
+the number of unfinished experiments is the parallelism a strategy exposes.
+For a pool of `num_workers` workers the utilization of a tick is
+min(unfinished, num_workers) / num_workers; synchronous halving drops towards
+a single straggler at the end of every rung while ASHA keeps the pool full.
+
+    python benchmarks/bench_asha_throughput.py [num_workers] [num_exp]
+"""
+import random
+import sys
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import AsyncSuccessiveHalvingStrategy, SuccessiveHalvingStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory
+
+
+def setup(strategy_cls, triggers):
+    logger = MockLogger()
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    for name, data in triggers:
+        strategy = strategy_cls()
+        factory = StrategyMachineFactory(strategy, logger, interf)
+        factory.generate_psm()
+        strategy.trigger(name, **data)
+    return interf, driver
+
+
+def run(strategy_cls, triggers, num_workers, seed=0):
+    random.seed(seed)
+    numpy.random.seed(seed)
+    interf, driver = setup(strategy_cls, triggers)
+    ticks = 0
+    busy = 0.
+    while driver.num_running():
+        busy += min(driver.num_running(), num_workers) / num_workers
+        interf.next_time_point()
+        ticks += 1
+    loss_store = interf.strategy._psm_data['trainingloss']
+    last_epoch = loss_store.epochs()[-1]
+    return {
+        'epochs'     : len(loss_store),
+        'utilization': busy / ticks,
+        'best_loss'  : min(loss_store.losses(last_epoch)),
+        'max_epoch'  : last_epoch,
+    }
+
+
+def main(num_workers=16, num_exp=64):
+    lr = ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})
+    sync = run(SuccessiveHalvingStrategy, [
+        ('ReceiveRandomSearchHyperparams', {'num_exp': num_exp, 'epoch': 2}), lr,
+    ], num_workers)
+    asha = run(AsyncSuccessiveHalvingStrategy, [
+        ('ReceiveAsyncHalvingHyperparams', {'num_workers': num_workers, 'num_exp': num_exp,
+                                            'epoch': 2, 'max_epoch': sync['max_epoch'],
+                                            'eta': 2}), lr,
+    ], num_workers)
+
+    print('{:>6} {:>8} {:>12} {:>12} {:>10}'.format('', 'epochs', 'utilization',
+                                                   'busy workers', 'best loss'))
+    for name, res in [('sync', sync), ('async', asha)]:
+        print('{:>6} {:>8} {:>12.2f} {:>12.2f} {:>10.4f}'.format(
+            name, res['epochs'], res['utilization'], res['utilization'] * num_workers,
+            res['best_loss']))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
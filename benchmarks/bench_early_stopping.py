@@ -0,0 +1,72 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+GPU-epochs saved by early stopping on the demo workload.
+
+Runs `LearningCurveStoppingStrategy` and `MedianStoppingStrategy` on
+`DemoDriver` + `ExampleLoss1` and compares the epochs actually trained with
+running every configuration to `max_epoch`, together with the best loss found.
+
+    python benchmarks/bench_early_stopping.py [num_exp] [max_epoch] [min_epoch]
+"""
+import random
+import sys
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import LearningCurveStoppingStrategy, MedianStoppingStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory
+
+
+def run(strategy_cls, num_exp, max_epoch, min_epoch, seed):
+    random.seed(seed)
+    numpy.random.seed(seed)
+    logger = MockLogger()
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    triggers = [
+        ('ReceiveEarlyStoppingHyperparams', {'num_exp': num_exp, 'min_epoch': min_epoch,
+                                             'max_epoch': max_epoch}),
+        ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]}),
+    ]
+    for name, data in triggers:
+        strategy = strategy_cls()
+        factory = StrategyMachineFactory(strategy, logger, interf)
+        factory.generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interf.next_time_point()
+
+    loss_store = interf.strategy._psm_data['trainingloss']
+    full = num_exp * max_epoch
+    trained = len(loss_store)
+    print(strategy_cls.__name__)
+    print('epochs trained     : {} of {} ({:.1%} saved)'.format(trained, full, 1 - trained / full))
+    print('experiments killed : {} of {}'.format(len(interf.strategy._psm_data['state']['killed']),
+                                                  num_exp))
+    final_losses = loss_store.losses(max_epoch)
+    if final_losses.size:
+        print('best final loss    : {:.4f}'.format(numpy.min(final_losses)))
+    else:
+        print('best final loss    : none, every experiment was killed')
+
+
+
+def main(num_exp=64, max_epoch=32, min_epoch=4, seed=0):
+    for strategy_cls in [LearningCurveStoppingStrategy, MedianStoppingStrategy]:
+        run(strategy_cls, num_exp, max_epoch, min_epoch, seed)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,48 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Micro-benchmark of `StrategyMachineFactory.generate_psm`.
+
+"cold" drops the machine compiled for the strategy class before every call,
+which is what every call used to cost; "warm" binds the instance to the
+cached machine.
+
+    python benchmarks/bench_generate_psm.py [repeat]
+"""
+import sys
+import timeit
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import Interface, MemoryLogger, StrategyMachineFactory
+
+
+def main(repeat=2000):
+    logger = MemoryLogger()
+    interf = Interface()
+    strategy = SuccessiveHalvingStrategy()
+    factory = StrategyMachineFactory(strategy, logger, interf)
+    factory.generate_psm()
+    factory.snapshot()
+
+    def cold():
+        if '_psm_machine' in vars(SuccessiveHalvingStrategy):
+            del SuccessiveHalvingStrategy._psm_machine
+        factory.generate_psm()
+
+    for name, func in [('cold', cold), ('warm', factory.generate_psm)]:
+        best = min(timeit.repeat(func, number=repeat, repeat=3)) / repeat
+        print('{:>6}: {:8.1f} us/call'.format(name, best * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,91 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Reopening and analysing a large `MmapLogger` log.
+
+Writes `num_records` loss reports (in `ReceiveTrainingLosses` batches) to a
+temporary directory, then times opening a fresh logger on the files, a bulk
+analytics query on the mapped columns (mean loss per epoch) and a full
+`recover()`.
+
+    python benchmarks/bench_mmap_logger.py [num_records] [num_epochs]
+"""
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy
+
+from gbstrategy.components.triggers import ReceiveTrainingLosses
+from gbstrategy.core import MmapLogger
+
+
+class _Event(object):
+    "Stand-in for the transitions event `logEnterState` reads the state from"
+    class model(object):
+        state = 'HyperparamsSet'
+
+
+def write(path, num_records, num_epochs, batch_size=10000):
+    random.seed(0)
+    exp_ids = [str(uuid.UUID(int=random.getrandbits(128)))
+               for _ in range(max(num_records // num_epochs, 1))]
+    with MmapLogger(path) as logger:
+        logger.logInit()
+        for start in range(0, num_records, batch_size):
+            trigger = ReceiveTrainingLosses()
+            trigger.store({'records': [{
+                'exp_id'    : exp_ids[i % len(exp_ids)],
+                'epoch'     : i // len(exp_ids) + 1,
+                'loss_name' : 'loss',
+                'loss_value': random.random(),
+            } for i in range(start, min(start + batch_size, num_records))]})
+            trigger.log(logger)
+        logger.logEnterState(dict, _Event)
+
+
+def main(num_records=2000000, num_epochs=100):
+    path = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        write(path, num_records, num_epochs)
+        print('write    : {:.2f} s'.format(time.perf_counter() - start))
+
+        start = time.perf_counter()
+        logger = MmapLogger(path)
+        empty = logger.empty()
+        print('open     : {:.4f} s (empty={})'.format(time.perf_counter() - start, empty))
+
+        start = time.perf_counter()
+        columns = logger.loss_columns()
+        counts = numpy.bincount(columns['epoch'])
+        sums = numpy.bincount(columns['epoch'], weights=columns['loss_value'])
+        means = sums[counts > 0] / counts[counts > 0]
+        print('analytics: {:.4f} s ({} epochs, {} rows)'.format(time.perf_counter() - start,
+                                                              len(means), len(columns['epoch'])))
+
+        start = time.perf_counter()
+        state, data, _ = logger.recover()
+        elapsed = time.perf_counter() - start
+        print('recover  : {:.2f} s ({:.0f} rows/s, state {})'.format(
+            elapsed, len(data['trainingloss']) / elapsed, state))
+        logger.close()
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
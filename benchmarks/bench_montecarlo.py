@@ -0,0 +1,87 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Monte Carlo comparison of random search, successive halving and asynchronous
+successive halving.
+
+Runs `num_seeds` seeded sweeps per strategy and budget on `DemoDriver` +
+`ExampleLoss1` through `run_sweeps` (one process per CPU unless
+`max_workers` is given), streams the summaries to `path` and prints the
+comparison table and the median anytime curve. All strategies get the same
+epoch budget, ASHA spends it on 8 workers.
+
+    python benchmarks/bench_montecarlo.py [num_seeds] [num_exp] [max_workers]
+"""
+import os
+import sys
+import tempfile
+
+import numpy
+
+from gbstrategy import (AsyncSuccessiveHalvingStrategy, RandomSearchStrategy,
+                        SuccessiveHalvingStrategy,
+                       )
+from gbstrategy.core import (ExampleLoss1, anytime_curves, comparison_table, format_table,
+                             load_results, run_sweeps,
+                            )
+
+
+def jobs(num_seeds, num_exp):
+    lr = ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})
+    sh_epochs = 576 * num_exp // 64
+    for seed in range(num_seeds):
+        yield {
+            'strategy_cls': SuccessiveHalvingStrategy,
+            'triggers'    : [('ReceiveRandomSearchHyperparams', {'num_exp': num_exp, 'epoch': 2}), lr],
+            'lossfunc'    : ExampleLoss1(),
+            'budget'      : sh_epochs,
+            'seed'        : seed,
+        }
+        yield {
+            'strategy_cls': AsyncSuccessiveHalvingStrategy,
+            'triggers'    : [('ReceiveAsyncHalvingHyperparams',
+                              {'num_workers': 8, 'num_exp': num_exp, 'epoch': 2,
+                               'max_epoch': 32, 'eta': 2}), lr],
+            'lossfunc'    : ExampleLoss1(),
+            'budget'      : sh_epochs,
+            'seed'        : seed,
+        }
+        # random search with the same number of epochs spread evenly over the configs
+        yield {
+            'strategy_cls': RandomSearchStrategy,
+            'triggers'    : [('ReceiveRandomSearchHyperparams',
+                              {'num_exp': num_exp // 4, 'epoch': 4 * sh_epochs // num_exp}), lr],
+            'lossfunc'    : ExampleLoss1(),
+            'budget'      : sh_epochs,
+            'seed'        : seed,
+        }
+
+
+def main(num_seeds=32, num_exp=64, max_workers=None, path=None):
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'montecarlo.npz')
+    num_runs = run_sweeps(jobs(num_seeds, num_exp), path, max_workers=max_workers or None)
+    print('{} runs written to {}\n'.format(num_runs, path))
+
+    results = load_results(path)
+    print(format_table(comparison_table(results)))
+
+    grid = numpy.linspace(0, results['budget'].max(), 9)[1:].astype(int)
+    print('\nmedian best loss after n epochs')
+    print('{:>28}'.format('n') + ''.join('{:>8}'.format(g) for g in grid))
+    for label, curve in anytime_curves(results, grid).items():
+        print('{:>28}'.format(label) + ''.join('{:>8.4f}'.format(v) for v in curve[1]))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,64 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Many small studies multiplexed over one `StudyRouter` and one `DemoDriver`.
+
+Every study is a `SuccessiveHalvingStrategy` with its own log; at most
+`max_loaded` of them are kept in memory and the driver's `num_workers` slots
+are shared round-robin. Reports the wall time per tick, the peak number of
+running experiments and the loaded studies, and checks that every study
+finished its search.
+
+    python benchmarks/bench_multi_study.py [num_studies] [num_workers] [max_loaded]
+"""
+import random
+import sys
+import time
+
+import numpy
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, MemoryLogger, StudyRouter
+
+
+def main(num_studies=200, num_workers=32, max_loaded=16, num_exp=8, seed=0):
+    random.seed(seed)
+    numpy.random.seed(seed)
+    router = StudyRouter(num_workers=num_workers, max_loaded=max_loaded)
+    driver = DemoDriver(router, ExampleLoss1())
+    loggers = {}
+    for study_id in range(num_studies):
+        loggers[study_id] = MemoryLogger()
+        router.add_study(study_id, SuccessiveHalvingStrategy, loggers[study_id])
+        router.trigger(study_id, 'ReceiveRandomSearchHyperparams', num_exp=num_exp, epoch=2)
+        router.trigger(study_id, 'ReceiveHyperparams', learning_rate=[0.001, 0.01])
+
+    ticks = 0
+    peak = 0
+    start = time.perf_counter()
+    while driver.num_running():
+        router.next_time_point()
+        ticks += 1
+        peak = max(peak, driver.num_running())
+    elapsed = time.perf_counter() - start
+
+    states = [router.strategy(study_id).state for study_id in range(num_studies)]
+    print('studies        : {} ({} loaded at most)'.format(num_studies, max_loaded))
+    print('ticks          : {} ({:.1f} us/tick)'.format(ticks, elapsed / ticks * 1e6))
+    print('peak running   : {} of {} workers'.format(peak, num_workers))
+    print('loaded studies : {}'.format(router.num_loaded()))
+    print('in HalvingStage: {} of {}'.format(states.count('HalvingStage'), num_studies))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
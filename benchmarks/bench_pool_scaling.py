@@ -0,0 +1,79 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Throughput of `ProcessPoolDriver` with a CPU-bound training function.
+
+Runs the same successive halving sweep with 1, 2, 4, ... worker processes
+and prints trained epochs per second.
+
+    python benchmarks/bench_pool_scaling.py [max_workers] [work]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import ExampleLoss1, Interface, ProcessPoolDriver, StrategyMachineFactory
+
+
+class BusyTrainer(object):
+    "Burns `work` loop iterations per epoch, then evaluates `ExampleLoss1`"
+    def __init__(self, work):
+        self.work = work
+
+    def __call__(self, exp_id, epoch, hyperparams):
+        acc = 0
+        for i in range(self.work):
+            acc += i * i
+        return ExampleLoss1.epoch_loss(epoch, hyperparams)
+
+
+def run(max_workers, work, num_exp=32):
+    random.seed(0)
+    numpy.random.seed(0)
+    logger = MockLogger()
+    interf = Interface()
+    with ProcessPoolDriver(interf, BusyTrainer(work), ExampleLoss1.loss_name,
+                           max_workers=max_workers) as driver:
+        start = time.perf_counter()
+        triggers = [
+            ('ReceiveRandomSearchHyperparams', {'num_exp': num_exp, 'epoch': 2}),
+            ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]}),
+        ]
+        for name, data in triggers:
+            strategy = SuccessiveHalvingStrategy()
+            factory = StrategyMachineFactory(strategy, logger, interf)
+            factory.generate_psm()
+            strategy.trigger(name, **data)
+        while driver.num_running():
+            interf.next_time_point()
+        elapsed = time.perf_counter() - start
+    return len(interf.strategy._psm_data['trainingloss']) / elapsed
+
+
+def main(max_workers=os.cpu_count(), work=200000):
+    base = None
+    workers = 1
+    while workers <= max_workers:
+        rate = run(workers, work)
+        base = base or rate
+        print('{:>3} workers: {:8.1f} epochs/s  speedup {:4.2f}'.format(workers, rate, rate / base))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
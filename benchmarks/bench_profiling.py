@@ -0,0 +1,78 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Cost of `StrategyProfiler` on a Hyperband search driven by `DemoDriver`.
+
+Runs the same seeded search without a profiler and with one, reports the
+best wall time per tick of both, and writes the profile of the second run in the
+Prometheus text format (or as JSON lines for a `.jsonl` path), by default
+to `gbstrategy_profile.prom` in the temp directory.
+
+    python benchmarks/bench_profiling.py [output] [repeat]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import HyperbandStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory, StrategyProfiler
+
+
+def run(profiler, seed=0):
+    random.seed(seed)
+    numpy.random.seed(seed)
+    logger = MockLogger()
+    interface = Interface()
+    driver = DemoDriver(interface, ExampleLoss1())
+    for name, data in [('ReceiveHyperbandHyperparams', {'max_epoch': 81, 'eta': 3, 'num_brackets': 5}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = HyperbandStrategy()
+        StrategyMachineFactory(strategy, logger, interface, profiler=profiler).generate_psm()
+        strategy.trigger(name, **data)
+
+    ticks = 0
+    start = time.perf_counter()
+    while driver.num_running():
+        interface.next_time_point()
+        ticks += 1
+    return (time.perf_counter() - start) / ticks
+
+
+def main(output=None, repeat=5):
+    output = output or os.path.join(tempfile.gettempdir(), 'gbstrategy_profile.prom')
+    # alternate the two so that warm-up and machine noise hit both alike
+    profiler = StrategyProfiler()
+    disabled, enabled = [], []
+    for _ in range(repeat):
+        disabled.append(run(None))
+        profiler.reset()
+        enabled.append(run(profiler))
+    disabled, enabled = min(disabled), min(enabled)
+
+    print('without profiler: {:.1f} us/tick'.format(disabled * 1e6))
+    print('with profiler   : {:.1f} us/tick ({:+.1%})'.format(enabled * 1e6, enabled / disabled - 1))
+    with open(output, 'w') as f:
+        if output.endswith('.jsonl'):
+            profiler.write_jsonl(f)
+        else:
+            f.write(profiler.to_prometheus())
+    print('profile         : {}'.format(output))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2], *[int(a) for a in sys.argv[2:3]])
@@ -0,0 +1,75 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Bytes per training loss record, dict based vs compact representation.
+
+Every report is held twice: as the data of the logged `ReceiveTrainingLoss`
+and in `_psm_data['trainingloss']`. The dict layout keeps a four key dict in
+both places; the compact layout keeps a `LossRecord` in the log and a row of
+the columnar `LossStore`. exp_ids arrive as fresh strings, as they would from
+a remote driver. Measured with tracemalloc.
+
+    python benchmarks/bench_record_memory.py [num_records] [num_epochs]
+"""
+import random
+import sys
+import tracemalloc
+import uuid
+
+from gbstrategy.datastructures import LossRecord, LossStore
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main(num_records=100000, num_epochs=50, seed=0):
+    random.seed(seed)
+    exp_ids = [uuid.UUID(int=random.getrandbits(128)) for _ in range(num_records // num_epochs)]
+    reports = [(exp_ids[i % len(exp_ids)], i // len(exp_ids) + 1, random.random())
+               for i in range(num_records)]
+
+    def dicts():
+        logged, aggregated = [], []
+        for exp_id, epoch, loss in reports:
+            data = {'exp_id': str(exp_id), 'epoch': epoch, 'loss_name': 'loss',
+                    'loss_value': loss}
+            logged.append(data)
+            aggregated.append(dict(data))
+        return logged, aggregated
+
+    def compact():
+        logged, aggregated = [], LossStore()
+        for exp_id, epoch, loss in reports:
+            record = LossRecord(str(exp_id), epoch, 'loss', loss)
+            logged.append(record)
+            aggregated.extend([record])
+        # ranking a tenth of the epochs, like the rungs of a halving search
+        for epoch in range(1, num_epochs + 1, 10):
+            aggregated.leaderboard(epoch)
+        return logged, aggregated
+
+    base = measure(dicts) / num_records
+    new = measure(compact) / num_records
+    print('dict    : {:7.1f} bytes/record'.format(base))
+    print('compact : {:7.1f} bytes/record ({:.1%} less)'.format(new, 1 - new / base))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
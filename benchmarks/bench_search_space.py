@@ -0,0 +1,77 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+How well `SearchSpace` samplers cover the learning rate range of `ExampleLoss1`.
+
+The final loss of `ExampleLoss1` depends on log10(learning_rate), so for
+every sampler the mean regret (best final loss of n configurations minus
+the optimum) is reported over many seeds, for a uniform and a log-uniform
+definition of the same range. Also reports the batch sampling throughput.
+
+    python benchmarks/bench_search_space.py [num_seeds]
+"""
+import importlib.util
+import sys
+import time
+
+import numpy
+
+from gbstrategy.core import ExampleLoss1
+from gbstrategy.datastructures import SearchSpace
+
+SPACES = {
+    'uniform'   : {'learning_rate': [1e-4, 1e2]},
+    'loguniform': {'learning_rate': {'type': 'loguniform', 'low': 1e-4, 'high': 1e2}},
+}
+SIZES = [4, 8, 16, 32]
+
+
+def samplers():
+    if importlib.util.find_spec('scipy') is not None:
+        return SearchSpace.SAMPLERS
+    return tuple(s for s in SearchSpace.SAMPLERS if s != 'sobol')
+
+
+def regret(space, sampler, n, num_seeds):
+    optimum = 0.1
+    best = []
+    for seed in range(num_seeds):
+        rng = numpy.random.RandomState(seed)
+        hyperparams = [{'hyperparams': h} for h in space.sample(n, sampler, rng)]
+        best.append(ExampleLoss1._final_loss_batch(ExampleLoss1.hyperparams_array(hyperparams)).min())
+    return numpy.mean(best) - optimum
+
+
+def main(num_seeds=200):
+    print('{:<12}{:<8}'.format('space', 'sampler') + ''.join('{:>12}'.format('n={}'.format(n))
+                                                      for n in SIZES))
+    for name, spec in SPACES.items():
+        space = SearchSpace(spec)
+        for sampler in samplers():
+            print('{:<12}{:<8}'.format(name, sampler) +
+                  ''.join('{:>12.2e}'.format(regret(space, sampler, n, num_seeds)) for n in SIZES))
+
+    space = SearchSpace({
+        'learning_rate': {'type': 'loguniform', 'low': 1e-4, 'high': 1e-1},
+        'num_layers'   : {'type': 'int', 'low': 1, 'high': 8},
+        'optimizer'    : {'type': 'categorical', 'choices': ['sgd', 'adam']},
+        'momentum'     : {'type': 'uniform', 'low': 0.5, 'high': 0.99, 'condition': {'optimizer': 'sgd'}},
+    })
+    for sampler in samplers():
+        start = time.perf_counter()
+        space.sample(100000, sampler)
+        print('100k configs of 4 params, {:<6}: {:.3f} s'.format(sampler, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,76 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Tick latency of `Interface.next_time_point` as the strategy log grows.
+
+Compares the full `srp` replay on every tick (`generate_psm`) against the
+incremental mode (`current_psm`) that keeps the live machine in memory.
+
+    python benchmarks/bench_tick_latency.py [num_ticks] [window]
+"""
+import random
+import sys
+import time
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory
+
+
+def setup(num_exp=256, epoch=2):
+    logger = MockLogger()
+    interf = Interface()
+    DemoDriver(interf, ExampleLoss1())
+    triggers = [
+        ('ReceiveRandomSearchHyperparams', {'num_exp': num_exp, 'epoch': epoch}),
+        ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]}),
+    ]
+    for name, data in triggers:
+        strategy = SuccessiveHalvingStrategy()
+        factory = StrategyMachineFactory(strategy, logger, interf)
+        factory.generate_psm()
+        strategy.trigger(name, **data)
+    return interf
+
+
+def run(incremental, num_ticks, window):
+    random.seed(0)
+    numpy.random.seed(0)
+    interf = setup()
+    latencies = []
+    start = time.perf_counter()
+    for i in range(1, num_ticks + 1):
+        if incremental:
+            interf.next_time_point()
+        else:
+            interf.factory.generate_psm()
+            interf.driver.next()
+        if i % window == 0:
+            now = time.perf_counter()
+            latencies.append((now - start) / window)
+            start = now
+    return latencies
+
+
+def main(num_ticks=2000, window=200):
+    full = run(False, num_ticks, window)
+    incremental = run(True, num_ticks, window)
+    print('{:>8} {:>16} {:>16}'.format('ticks', 'full (us/tick)', 'incr. (us/tick)'))
+    for idx, (f, i) in enumerate(zip(full, incremental)):
+        print('{:>8} {:>16.1f} {:>16.1f}'.format((idx + 1) * window, f * 1e6, i * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
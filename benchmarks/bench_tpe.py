@@ -0,0 +1,92 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+TPE against successive halving on the simulated worker pool.
+
+Both strategies search the same log-uniform learning rate range of
+`ExampleLoss1` on a `SimulationDriver`. For every run, the recommended
+configuration is the one with the best loss at the highest epoch any
+experiment reached; its regret is its noise-free final loss minus the
+optimum (0.1). Reports the total epochs trained, the mean and median
+regret over the seeds and how many of the runs got within `TOLERANCE` of
+the optimum, plus the cost of batched proposals.
+
+    python benchmarks/bench_tpe.py [num_seeds] [num_workers]
+"""
+import random
+import sys
+import time
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import SuccessiveHalvingStrategy, TPEStrategy
+from gbstrategy.core import ExampleLoss1, Interface, SimulationDriver, StrategyMachineFactory
+from gbstrategy.datastructures import ParzenSurrogate
+
+TOLERANCE = 2.5e-3
+SPACE = {'learning_rate': {'type': 'loguniform', 'low': 1e-4, 'high': 1e2}}
+CONFIGS = [
+    ('SH 64 exps', SuccessiveHalvingStrategy,
+     ('ReceiveRandomSearchHyperparams', {'num_exp': 64, 'epoch': 2})),
+    ('SH 32 exps', SuccessiveHalvingStrategy,
+     ('ReceiveRandomSearchHyperparams', {'num_exp': 32, 'epoch': 2})),
+    ('TPE 40 exps x 10', TPEStrategy,
+     ('ReceiveTPEHyperparams', {'num_workers': 8, 'num_exp': 40, 'epoch': 10})),
+    ('TPE 24 exps x 10', TPEStrategy,
+     ('ReceiveTPEHyperparams', {'num_workers': 8, 'num_exp': 24, 'epoch': 10})),
+]
+
+
+def run(strategy_cls, strategy_trigger, num_workers, seed):
+    random.seed(seed)
+    numpy.random.seed(seed)
+    logger = MockLogger()
+    interface = Interface()
+    driver = SimulationDriver(interface, ExampleLoss1(), num_workers)
+    for name, data in [strategy_trigger, ('ReceiveHyperparams', SPACE)]:
+        strategy = strategy_cls()
+        StrategyMachineFactory(strategy, logger, interface).generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interface.next_time_point()
+
+    loss_store = interface.strategy._psm_data['trainingloss']
+    exp_id = loss_store.top_exps(max(loss_store.epochs()), 1)[0]
+    regret = ExampleLoss1._final_loss(driver._exps[exp_id].hyperparams) - 0.1
+    return driver.num_epochs, regret
+
+
+def main(num_seeds=100, num_workers=8):
+    print('{:<18}{:>8}{:>14}{:>16}{:>12}'.format('strategy', 'epochs', 'mean regret', 'median regret',
+                                                 'within tol'))
+    for label, strategy_cls, strategy_trigger in CONFIGS:
+        results = [run(strategy_cls, strategy_trigger, num_workers, seed) for seed in range(num_seeds)]
+        epochs, regrets = zip(*results)
+        print('{:<18}{:>8.0f}{:>14.2e}{:>16.2e}{:>12.0%}'.format(
+              label, numpy.mean(epochs), numpy.mean(regrets), numpy.median(regrets),
+              numpy.mean(numpy.array(regrets) < TOLERANCE)))
+
+    surrogate = ParzenSurrogate(4)
+    for x in numpy.random.random_sample((200, 4)):
+        surrogate.add(x, float(((x - 0.3)**2).sum()))
+    for num in [1, 8, 32]:
+        start = time.perf_counter()
+        for _ in range(100):
+            surrogate.propose(num)
+        print('{:>2} proposals from 200 observations: {:.3f} ms'.format(
+              num, (time.perf_counter() - start) / 100 * 1e3))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
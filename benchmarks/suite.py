@@ -0,0 +1,335 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Benchmark suite for the strategy core hot paths, with regression tracking.
+
+Every case times one call many times, with the garbage collector off as
+timeit does, and keeps the latency percentiles of the best of three rounds.
+Calls close to the timer resolution are timed in batches of `number` calls
+picked like `timeit.Timer.autorange`, each sample being the batch mean.
+It is then run once more under tracemalloc for its peak memory (timings and
+memory are measured separately, since tracing slows everything down):
+
+    generate_psm/fresh         machine for an empty log
+    generate_psm/srp           recovery of a successive halving log via srp
+    upload_training_loss       one loss through Interface.upload_training_loss
+    exp_finished/<n>           SuccessiveHalvingStrategy.exp_finished with n records
+    get_top_exps/<n>           SuccessiveHalvingStrategy.get_top_exps with n records
+    run_exp                    Interface.run_exp into a DemoDriver
+    demo_driver_next           one DemoDriver.next tick of a running search
+
+Results are written as JSON; with --runs the whole suite runs several times
+and every metric is the median over the runs. With --baseline, p50 latency
+and peak memory of every case are compared with the stored results and the
+run fails (exit status 1) when any of them grew by more than --threshold,
+and latencies also by more than --noise-floor microseconds. Latencies only
+compare on the same machine: `benchmarks/baseline.json` was recorded on the
+machine in its `meta`, regenerate it with `--runs 5 --output` on the
+reference machine.
+
+    python benchmarks/suite.py [--output results.json] [--baseline baseline.json] [--runs 1]
+                               [--threshold 0.25] [--noise-floor 1.0] [--repeat-scale 1.0]
+                               [--case prefix ...]
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory
+from gbstrategy.datastructures import LossStore
+
+
+SIZES = [1000, 10000, 100000]
+METRICS = ['p50_us', 'peak_kib']
+
+
+def setup_sh(num_exp=64, epoch=2, logger=None):
+    logger = logger if logger is not None else MockLogger()
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    strategy = SuccessiveHalvingStrategy()
+    factory = StrategyMachineFactory(strategy, logger, interf)
+    factory.generate_psm()
+    strategy.trigger('ReceiveRandomSearchHyperparams', num_exp=num_exp, epoch=epoch)
+    strategy.trigger('ReceiveHyperparams', learning_rate=[0.001, 0.01])
+    return interf, driver, logger
+
+
+def timed(func, repeat, number=1):
+    "`repeat` latencies, each the mean over `number` calls (for calls close to the timer resolution)"
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        latencies.append((time.perf_counter() - start) / number)
+    return latencies
+
+
+def autorange(func, min_time=50e-6):
+    "Number of calls of `func` that take at least `min_time` seconds together"
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+
+def case_generate_psm_fresh(repeat):
+    def func():
+        interf = Interface()
+        StrategyMachineFactory(SuccessiveHalvingStrategy(), MockLogger(), interf).generate_psm()
+        interf.factory.release()
+    return timed(func, repeat)
+
+
+def case_generate_psm_srp(repeat, num_ticks=2000):
+    interf, driver, logger = setup_sh(num_exp=256)
+    for _ in range(num_ticks):
+        interf.next_time_point()
+    interf.factory.release()
+
+    def func():
+        factory = StrategyMachineFactory(SuccessiveHalvingStrategy(), logger, Interface())
+        factory.generate_psm()
+        factory.release()
+    return timed(func, repeat)
+
+
+def case_upload_training_loss(repeat):
+    interf, driver, logger = setup_sh(num_exp=repeat, epoch=repeat)
+    exp_ids = [uuid.uuid4() for _ in range(repeat)]
+    losses = iter(zip(exp_ids, numpy.random.rand(repeat).tolist()))
+
+    def func():
+        exp_id, loss = next(losses)
+        interf.upload_training_loss(exp_id, 1, 'ExampleLoss1', loss)
+    return timed(func, repeat)
+
+
+def sh_with_records(num_records, num_exp=1000, epoch=2):
+    "A successive halving strategy whose loss store holds `num_records` reports"
+    strategy = SuccessiveHalvingStrategy()
+    store = LossStore()
+    exp_ids = [uuid.uuid4() for _ in range(num_exp)]
+    for i in range(num_records):
+        store.append(exp_ids[i % num_exp], i // num_exp + 1, 'ExampleLoss1', random.random())
+    strategy._psm_data = {
+        'state'       : {'num_exp': num_exp // 2, 'total_num_epochs': epoch},
+        'strategy'    : {'num_exp': num_exp, 'epoch': epoch},
+        'trainingloss': store,
+    }
+    return strategy, exp_ids
+
+
+def case_exp_finished(repeat, num_records):
+    strategy, exp_ids = sh_with_records(num_records)
+    store = strategy._psm_data['trainingloss']
+    new = iter(range(repeat))
+
+    def func():
+        strategy.exp_finished(None)
+    number = autorange(func)
+    latencies = []
+    for _ in range(repeat):
+        i = next(new)
+        store.append(exp_ids[i % len(exp_ids)], 2, 'ExampleLoss1', random.random())
+        latencies.extend(timed(func, 1, number=number))
+    return latencies
+
+
+def case_get_top_exps(repeat, num_records):
+    strategy, exp_ids = sh_with_records(num_records)
+    store = strategy._psm_data['trainingloss']
+
+    def func():
+        strategy.get_top_exps(len(exp_ids) // 2, 2)
+    number = autorange(func)
+    latencies = []
+    for i in range(repeat):
+        store.append(exp_ids[i % len(exp_ids)], 2, 'ExampleLoss1', random.random())
+        latencies.extend(timed(func, 1, number=number))
+    return latencies
+
+
+def case_run_exp(repeat):
+    interf = Interface()
+    DemoDriver(interf, ExampleLoss1())
+    data = [{'exp_id': uuid.uuid4(), 'end_epoch': 4, 'hyperparams': {'learning_rate': 0.005}}
+            for _ in range(repeat)]
+    batch = iter(data)
+    return timed(lambda: interf.run_exp(next(batch)), repeat)
+
+
+def case_demo_driver_next(repeat):
+    interf, driver, logger = setup_sh(num_exp=max(repeat, 64), epoch=4)
+    return timed(driver.next, repeat)
+
+
+def cases(scale=1.):
+    "name -> (function, repeat)"
+    def n(repeat):
+        return max(int(repeat * scale), 5)
+    suite = [
+        ('generate_psm/fresh', case_generate_psm_fresh, n(200)),
+        ('generate_psm/srp', case_generate_psm_srp, n(10)),
+        ('upload_training_loss', case_upload_training_loss, n(2000)),
+    ]
+    for size in SIZES:
+        suite.append(('exp_finished/{}'.format(size),
+                      lambda repeat, size=size: case_exp_finished(repeat, size), n(500)))
+    for size in SIZES:
+        suite.append(('get_top_exps/{}'.format(size),
+                      lambda repeat, size=size: case_get_top_exps(repeat, size), n(500)))
+    suite += [
+        ('run_exp', case_run_exp, n(2000)),
+        ('demo_driver_next', case_demo_driver_next, n(1000)),
+    ]
+    return suite
+
+
+def run_case(func, repeat, rounds=3, seed=0):
+    "Latency percentiles of the round with the lowest median, and the peak memory of one more run"
+    best = None
+    for _ in range(rounds):
+        random.seed(seed)
+        numpy.random.seed(seed)
+        # like timeit, keep garbage collection out of the timings
+        gc.collect()
+        gc.disable()
+        try:
+            latencies = numpy.array(func(repeat)) * 1e6
+        finally:
+            gc.enable()
+        if best is None or numpy.median(latencies) < numpy.median(best):
+            best = latencies
+    latencies = best
+
+    random.seed(seed)
+    numpy.random.seed(seed)
+    tracemalloc.start()
+    func(repeat)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    p50, p90, p99 = numpy.percentile(latencies, [50, 90, 99])
+    return {
+        'repeat'  : repeat,
+        'mean_us' : float(latencies.mean()),
+        'p50_us'  : float(p50),
+        'p90_us'  : float(p90),
+        'p99_us'  : float(p99),
+        'peak_kib': peak / 1024.,
+    }
+
+
+def run_suite(suite, runs=1):
+    "name -> results, every value the median over `runs` runs of the suite"
+    all_results = {}
+    for run in range(runs):
+        for name, func, repeat in suite:
+            res = run_case(func, repeat)
+            all_results.setdefault(name, []).append(res)
+            if runs > 1:
+                print('{:<24} run {}/{}: p50 {:.1f} us'.format(name, run + 1, runs, res['p50_us']))
+    return {name: {key: type(res[0][key])(numpy.median([r[key] for r in res])) for key in res[0]}
+            for name, res in all_results.items()}
+
+
+def compare(results, baseline, threshold, noise_floor=0.):
+    """Rows of (case, metric, baseline, current, ratio, regressed) for the cases in both.
+
+    Latencies only regress when they also grew by more than `noise_floor` us.
+    """
+    rows = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in METRICS:
+            ratio = res[metric] / base[metric] if base[metric] else 1.
+            regressed = ratio > 1 + threshold
+            if metric.endswith('_us'):
+                regressed = regressed and res[metric] - base[metric] > noise_floor
+            rows.append((name, metric, base[metric], res[metric], ratio, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative growth of p50 latency or peak memory that fails (0.25)')
+    parser.add_argument('--noise-floor', type=float, default=1.,
+                        help='absolute growth of p50 latency in us that never fails (1.0)')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='run the suite this many times and keep the medians (1)')
+    parser.add_argument('--repeat-scale', type=float, default=1.,
+                        help='scale the number of timed calls per case')
+    parser.add_argument('--case', nargs='*', default=None,
+                        help='only run the cases starting with these prefixes')
+    args = parser.parse_args(argv)
+
+    suite = [(name, func, repeat) for name, func, repeat in cases(args.repeat_scale)
+             if not args.case or any(name.startswith(prefix) for prefix in args.case)]
+    results = run_suite(suite, args.runs)
+    print('{:<24} {:>8} {:>10} {:>10} {:>10} {:>10}'.format('case', 'repeat', 'p50 us', 'p90 us',
+                                                           'p99 us', 'peak KiB'))
+    for name, func, repeat in suite:
+        res = results[name]
+        print('{:<24} {:>8} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.0f}'.format(
+            name, repeat, res['p50_us'], res['p90_us'], res['p99_us'], res['peak_kib']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta'   : {
+                    'python'  : platform.python_version(),
+                    'numpy'   : numpy.__version__,
+                    'platform': platform.platform(),
+                    'time'    : time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'runs'    : args.runs,
+                },
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        rows = compare(results, baseline, args.threshold, args.noise_floor)
+        print('\n{:<24} {:>9} {:>10} {:>10} {:>7}'.format('case', 'metric', 'baseline', 'current',
+                                                       'ratio'))
+        for name, metric, base, current, ratio, regressed in rows:
+            print('{:<24} {:>9} {:>10.1f} {:>10.1f} {:>7.2f}{}'.format(
+                name, metric, base, current, ratio, '  REGRESSION' if regressed else ''))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
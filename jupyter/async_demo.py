@@ -0,0 +1,70 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+asyncio version of the successive halving demo loop.
+
+Every experiment of `AsyncDemoDriver` is its own task reporting losses
+concurrently through `AsyncInterface`, while `serve()` applies them to the
+strategy one at a time.
+
+    python jupyter/async_demo.py
+"""
+import asyncio
+
+from psm.logger import MockLogger
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import AsyncDemoDriver, AsyncInterface, ExampleLoss1, StrategyMachineFactory
+
+
+async def main():
+    logger = MockLogger()
+    interf = AsyncInterface(maxsize=64)
+    demo = AsyncDemoDriver(interf, ExampleLoss1(), epoch_time=0.001)
+
+    testcase_0 = [
+        {
+            'trigger': 'ReceiveRandomSearchHyperparams',
+            'data': {'num_exp':16, 'epoch':2}
+        }, {
+            'trigger': 'ReceiveHyperparams',
+            'data': {
+                'learning_rate': [0.001,0.01],
+            }
+        },
+    ]
+    for t in testcase_0:
+        strategy = SuccessiveHalvingStrategy()
+        factory = StrategyMachineFactory(strategy, logger, interf)
+        factory.generate_psm()
+        strategy.trigger(t['trigger'], **t['data'])
+
+    server = asyncio.ensure_future(interf.serve())
+    while True:
+        await interf.drain_actions()
+        await demo.wait()
+        await interf.join()
+        if not demo.num_running():
+            break
+    await interf.close()
+    await server
+
+    print(interf.strategy.state, interf.strategy._psm_data['state'])
+    print(len(interf.strategy._psm_data['trainingloss']), 'losses')
+
+
+if __name__ == '__main__':
+    if hasattr(asyncio, 'run'):
+        asyncio.run(main())
+    else:
+        asyncio.get_event_loop().run_until_complete(main())
@@ -0,0 +1,173 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import uuid
+
+import numpy
+
+from gbstrategy.components.actions import KillExp, RunExps
+from gbstrategy.components.triggers import (ReceiveAsyncHalvingHyperparams, ReceiveHyperparams,
+                                            ReceiveTime, ReceiveTrainingLoss,
+                                           )
+from gbstrategy.datastructures import SearchSpace
+
+from gbstrategy.core import Strategy
+
+
+class AsyncSuccessiveHalvingStrategy(Strategy):
+    """Asynchronous successive halving (ASHA).
+
+    Rungs sit at `epoch * eta**k` epochs (up to `max_epoch`). Whenever an
+    experiment reaches the end epoch it was run to, its worker is handed the
+    next job: the best experiment of the highest rung that ranks in the top
+    1/eta of that rung and was not promoted yet, or otherwise a new
+    configuration, until `num_exp` configurations were started. There is no
+    barrier between rungs, so at most `num_workers` experiments always run.
+
+    The `num_exp` new configurations are rows of one design of the `sampler`
+    (so that 'lhs' and 'sobol' cover the search as a whole although jobs are
+    handed out one at a time), drawn from a seed kept in the state; see
+    `new_hyperparams`.
+
+    With `time_budget` (seconds) set, the search stops once that much time
+    passed since the first `ReceiveTime` (e.g. the simulated clock of
+    `SimulationDriver`): the running experiments are killed and no new jobs
+    are handed out.
+    """
+    time_budget = None
+
+    # Capitalized components are built in in the base class `Strategy
+    _psm_states = ['Init', 'StrategyHyperparamsSet', 'HyperparamsSet', 'End']
+    _psm_transitions = [{
+        'source'    : 'Init',
+        'dest'      : 'StrategyHyperparamsSet',
+        'trigger'   : ReceiveAsyncHalvingHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'set_rungs',
+    }, {
+        'source'    : 'StrategyHyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'run_next_jobs',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTrainingLoss(),
+        'conditions': 'exp_reached_end_epoch',
+        'before'    : 'run_next_jobs',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTime(),
+        'conditions': 'out_of_time',
+        'before'    : 'stop_search',
+    }]
+
+    def set_rungs(self, event):
+        strategy_data = self._psm_data['strategy']
+        rungs = []
+        epoch = strategy_data['epoch']
+        while epoch <= strategy_data['max_epoch']:
+            rungs.append(epoch)
+            epoch *= strategy_data['eta']
+
+        state_data = self._psm_data['state']
+        state_data['rungs'] = rungs
+        state_data['promoted'] = [set() for _ in rungs]
+        state_data['running'] = {}
+        state_data['num_started'] = 0
+        state_data['stopped'] = False
+        rng = numpy.random if self.rng is None else self.rng
+        state_data['design_seed'] = int(rng.randint(2**31))
+        return []
+
+    def exp_reached_end_epoch(self, event):
+        running = self._psm_data['state']['running']
+        return running.get(event.kwargs['exp_id']) == event.kwargs['epoch']
+
+    def out_of_time(self, event):
+        if self.time_budget is None or self._psm_data['state']['stopped']:
+            return False
+        times = self._psm_data['time']
+        return (times['time'] - times['start']).total_seconds() >= self.time_budget
+
+    def stop_search(self, event):
+        state_data = self._psm_data['state']
+        state_data['stopped'] = True
+        killed = [KillExp(data={'exp_id': exp_id}) for exp_id in state_data['running']]
+        state_data['running'] = {}
+        return killed
+
+    def run_next_jobs(self, event):
+        state_data = self._psm_data['state']
+        running = state_data['running']
+        running.pop(event.kwargs.get('exp_id'), None)
+
+        batch = []
+        while len(running) < self._psm_data['strategy']['num_workers']:
+            data = self.get_job()
+            if data is None:
+                break
+            running[data['exp_id']] = data['end_epoch']
+            batch.append(data)
+        return [RunExps(data={'batch': batch})] if batch else []
+
+    def get_job(self):
+        state_data = self._psm_data['state']
+        if state_data['stopped']:
+            return None
+        rungs = state_data['rungs']
+        eta = self._psm_data['strategy']['eta']
+        loss_store = self._psm_data.get('trainingloss')
+
+        # promote from the highest rung that has a promotable experiment
+        for k in range(len(rungs) - 2, -1, -1):
+            if loss_store is None:
+                break
+            promoted = state_data['promoted'][k]
+            num_top = loss_store.num_reports(rungs[k]) // eta
+            for exp_id in loss_store.top_exps(rungs[k], num_top):
+                if exp_id not in promoted and exp_id not in state_data['running']:
+                    promoted.add(exp_id)
+                    return {
+                        'exp_id': exp_id,
+                        'end_epoch' : rungs[k + 1],
+                        'hyperparams':   {
+                            'learning_rate': None,
+                        }
+                    }
+
+        if state_data['num_started'] >= self._psm_data['strategy']['num_exp']:
+            return None
+        state_data['num_started'] += 1
+        return {
+            'exp_id': uuid.uuid4(),
+            'end_epoch' : rungs[0],
+            'hyperparams': self.new_hyperparams(state_data['num_started'] - 1),
+        }
+
+    def new_hyperparams(self, idx):
+        """The configuration of the `idx`-th new experiment.
+
+        The design of all `num_exp` configurations is drawn once from the seed
+        in the state and kept on the side (not in the state, which every entered
+        state logs); a recovered strategy draws it again.
+        """
+        seed = self._psm_data['state']['design_seed']
+        cached = self.__dict__.get('_design')
+        if cached is None or cached[0] != seed:
+            space = SearchSpace(self._psm_data['hyperparams'])
+            design = space.sample(self._psm_data['strategy']['num_exp'], self.sampler,
+                                  numpy.random.RandomState(seed))
+            cached = self._design = (seed, design)
+        return dict(cached[1][idx])
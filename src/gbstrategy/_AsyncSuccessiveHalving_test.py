@@ -0,0 +1,171 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import AsyncSuccessiveHalvingStrategy
+from gbstrategy.core import (DemoDriver, ExampleLoss1, Interface, SimulationDriver,
+                             StrategyMachineFactory,
+                            )
+
+
+class RecordingDriver(object):
+    "Records the jobs it is handed instead of training"
+    def __init__(self, interface):
+        self.jobs = []
+        self.hyperparams = {}
+        interface.register_driver(self)
+
+    def run_exps(self, batch):
+        for exp_id, end_epoch, hyperparams in batch:
+            self.jobs.append((exp_id, end_epoch))
+            self.hyperparams.setdefault(exp_id, hyperparams['hyperparams'])
+
+    def kill_exp(self, exp_id):
+        pass
+
+
+class LHSStrategy(AsyncSuccessiveHalvingStrategy):
+    sampler = 'lhs'
+
+
+def start(strategy_cls, logger, num_workers, num_exp, epoch, max_epoch, eta):
+    interf = Interface()
+    driver = RecordingDriver(interf)
+    for name, data in [('ReceiveAsyncHalvingHyperparams', {'num_workers': num_workers,
+                                                           'num_exp': num_exp, 'epoch': epoch,
+                                                           'max_epoch': max_epoch, 'eta': eta}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = strategy_cls()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    return interf, driver
+
+
+class BudgetedStrategy(AsyncSuccessiveHalvingStrategy):
+    time_budget = 30
+
+
+def simulate(strategy_cls, logger):
+    random.seed(0)
+    numpy.random.seed(0)
+    interf = Interface()
+    driver = SimulationDriver(interf, ExampleLoss1(), 8)
+    for name, data in [('ReceiveAsyncHalvingHyperparams', {'num_workers': 8, 'num_exp': 64,
+                                                           'epoch': 2, 'max_epoch': 32, 'eta': 2}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = strategy_cls()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interf.next_time_point()
+    return interf, driver
+
+
+def test_time_budget_stops_the_search():
+    unlimited, unlimited_driver = simulate(AsyncSuccessiveHalvingStrategy, MockLogger())
+    assert not unlimited.strategy._psm_data['state']['stopped']
+    assert unlimited_driver.report()['makespan'] > 30
+
+    logger = MockLogger()
+    interf, driver = simulate(BudgetedStrategy, logger)
+    state_data = interf.strategy._psm_data['state']
+    assert state_data['stopped']
+    assert state_data['running'] == {}
+    # the epochs in flight when the budget ran out still finish
+    assert 30 <= driver.report()['makespan'] < 32
+    assert interf.strategy.get_job() is None
+
+    strategy = BudgetedStrategy()
+    StrategyMachineFactory(strategy, logger, Interface()).generate_psm()
+    assert strategy._psm_data == interf.strategy._psm_data
+
+
+def test_promotes_the_top_of_the_highest_rung():
+    interf, driver = start(AsyncSuccessiveHalvingStrategy, MockLogger(),
+                           num_workers=2, num_exp=6, epoch=1, max_epoch=4, eta=2)
+    a, b = [exp_id for exp_id, _ in driver.jobs]
+    assert driver.jobs == [(a, 1), (b, 1)]
+
+    # one report at rung 1: the top half is empty, a new configuration starts
+    interf.upload_training_loss(a, 1, 'loss', 0.5)
+    c = driver.jobs[-1][0]
+    assert driver.jobs[2:] == [(c, 1)]
+    # b ranks first of two, it is promoted to rung 2 rather than starting a new one
+    interf.upload_training_loss(b, 1, 'loss', 0.1)
+    assert driver.jobs[3:] == [(b, 2)]
+    # c is third of three, a is not in the top 1/eta either
+    interf.upload_training_loss(c, 1, 'loss', 0.9)
+    d = driver.jobs[-1][0]
+    assert driver.jobs[4:] == [(d, 1)]
+    # b is alone at rung 2 and already promoted from rung 1
+    interf.upload_training_loss(b, 2, 'loss', 0.05)
+    e = driver.jobs[-1][0]
+    assert driver.jobs[5:] == [(e, 1)]
+    # d ranks second of four at rung 1, the top half
+    interf.upload_training_loss(d, 1, 'loss', 0.3)
+    assert driver.jobs[6:] == [(d, 2)]
+    # b tops rung 2 and goes to rung 4 before anything else
+    interf.upload_training_loss(d, 2, 'loss', 0.2)
+    assert driver.jobs[7:] == [(b, 4)]
+
+    promoted = interf.strategy._psm_data['state']['promoted']
+    assert promoted == [{b, d}, {b}, set()]
+
+
+def test_each_experiment_is_promoted_once_per_rung():
+    random.seed(0)
+    numpy.random.seed(0)
+    logger = MockLogger()
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    for name, data in [('ReceiveAsyncHalvingHyperparams', {'num_workers': 8, 'num_exp': 64,
+                                                           'epoch': 1, 'max_epoch': 27, 'eta': 3}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = AsyncSuccessiveHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interf.next_time_point()
+
+    state_data = interf.strategy._psm_data['state']
+    store = interf.strategy._psm_data['trainingloss']
+    rungs = state_data['rungs']
+    assert rungs == [1, 3, 9, 27]
+    for k, promoted in enumerate(state_data['promoted'][:-1]):
+        # every promoted experiment reached the next rung, and only those did
+        next_rung = set(store.exp_id(c) for c in store.exp_codes(rungs[k + 1]))
+        assert promoted == next_rung
+        assert store.num_reports(rungs[k + 1]) == len(promoted)
+    assert store.num_reports(1) == 64
+
+
+def test_new_configurations_form_one_design():
+    interf, driver = start(LHSStrategy, MockLogger(),
+                           num_workers=2, num_exp=16, epoch=1, max_epoch=1, eta=2)
+    for i in range(16):
+        exp_id, end_epoch = driver.jobs[i]
+        interf.upload_training_loss(exp_id, end_epoch, 'loss', 0.5)
+    rates = [driver.hyperparams[exp_id]['learning_rate'] for exp_id, _ in driver.jobs]
+    # a latin hypercube puts one configuration in each 1/16 of the range
+    strata = sorted(int((r - 0.001) / 0.009 * 16) for r in rates)
+    assert strata == list(range(16))
+
+    logger = MockLogger()
+    interf, driver = start(LHSStrategy, logger, num_workers=2, num_exp=16, epoch=1, max_epoch=1, eta=2)
+    recovered = LHSStrategy()
+    StrategyMachineFactory(recovered, logger, Interface()).generate_psm()
+    assert [recovered.new_hyperparams(i) for i in range(16)] == \
+           [interf.strategy.new_hyperparams(i) for i in range(16)]
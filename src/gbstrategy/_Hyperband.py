@@ -0,0 +1,144 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import math
+import uuid
+
+from gbstrategy.components.actions import RunExps
+from gbstrategy.components.triggers import (ReceiveHyperbandHyperparams, ReceiveHyperparams,
+                                            ReceiveTrainingLoss,
+                                           )
+
+from gbstrategy.core import Strategy
+
+
+class HyperbandStrategy(Strategy):
+    """Hyperband: several successive halving brackets run side by side.
+
+    Bracket `s` (for s = num_brackets-1 .. 0) starts
+    ceil(num_brackets / (s+1) * eta**s) configurations at max_epoch / eta**s
+    epochs and keeps the best 1/eta of them at every rung, the last rung is
+    max_epoch. `ReceiveHyperbandHyperparams` rejects eta**(num_brackets-1) >
+    max_epoch, where the first rungs would be shorter than one epoch. All brackets are
+    started at once with their experiments interleaved in one `RunExps`, so
+    the cheap brackets keep workers busy while the expensive ones still train.
+    """
+    # Capitalized components are built in in the base class `Strategy
+    _psm_states = ['Init', 'StrategyHyperparamsSet', 'HyperparamsSet', 'End']
+    _psm_transitions = [{
+        'source'    : 'Init',
+        'dest'      : 'StrategyHyperparamsSet',
+        'trigger'   : ReceiveHyperbandHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'set_brackets',
+    }, {
+        'source'    : 'StrategyHyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'run_rand_search',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTrainingLoss(),
+        'conditions': 'rung_finished',
+        'before'    : 'run_half_search',
+    }]
+
+    def set_brackets(self, event):
+        strategy_data = self._psm_data['strategy']
+        max_epoch = strategy_data['max_epoch']
+        eta = strategy_data['eta']
+        s_max = strategy_data['num_brackets'] - 1
+
+        brackets = []
+        for s in range(s_max, -1, -1):
+            num_exp = int(math.ceil((s_max + 1) / (s + 1) * eta**s))
+            brackets.append({
+                'rung'  : 0,
+                'epochs': [int(round(max_epoch * eta**(i - s))) for i in range(s + 1)],
+                'sizes' : [max(num_exp // eta**i, 1) for i in range(s + 1)],
+                'exps'  : [],
+            })
+        self._psm_data['state']['brackets'] = brackets
+        self._psm_data['state']['exp_bracket'] = {}
+        return []
+
+    def run_rand_search(self, event):
+        state_data = self._psm_data['state']
+        # one batch for all brackets, so that quasi-random samplers cover the space jointly
+        num_exp = sum(bracket['sizes'][0] for bracket in state_data['brackets'])
+        hyperparams = iter(self.sample_hyperparams(num_exp))
+
+        bracket_batches = []
+        for b, bracket in enumerate(state_data['brackets']):
+            batch = []
+            for i in range(bracket['sizes'][0]):
+                data = {
+                    'exp_id': uuid.uuid4(),
+                    'end_epoch' : bracket['epochs'][0],
+                    'hyperparams': next(hyperparams),
+                }
+                bracket['exps'].append(data['exp_id'])
+                state_data['exp_bracket'][data['exp_id']] = b
+                batch.append(data)
+            bracket_batches.append(batch)
+        return [RunExps(data={'batch': self._interleave(bracket_batches)})]
+
+    def run_half_search(self, event):
+        bracket = self._event_bracket(event)
+        epoch = bracket['epochs'][bracket['rung']]
+        bracket['rung'] += 1
+        if bracket['rung'] >= len(bracket['epochs']):
+            return []
+
+        num = bracket['sizes'][bracket['rung']]
+        top_exps = sorted(bracket['exps'], key=lambda exp_id: self._loss_at(exp_id, epoch))[:num]
+        bracket['exps'] = top_exps
+
+        batch = []
+        for exp_id in top_exps:
+            data = {
+                'exp_id': exp_id,
+                'end_epoch' : bracket['epochs'][bracket['rung']],
+                'hyperparams':   {
+                    'learning_rate': None,
+                }
+            }
+            batch.append(data)
+        return [RunExps(data={'batch': batch})] if batch else []
+
+    def rung_finished(self, event):
+        bracket = self._event_bracket(event)
+        if bracket is None or bracket['rung'] >= len(bracket['epochs']):
+            return False
+        epoch = bracket['epochs'][bracket['rung']]
+        if event.kwargs['epoch'] != epoch:
+            return False
+        loss_store = self._psm_data['trainingloss']
+        leaderboard = loss_store.leaderboard(epoch)
+        return all(loss_store.exp_code(exp_id) in leaderboard for exp_id in bracket['exps'])
+
+    def _event_bracket(self, event):
+        b = self._psm_data['state']['exp_bracket'].get(event.kwargs['exp_id'])
+        return self._psm_data['state']['brackets'][b] if b is not None else None
+
+    def _loss_at(self, exp_id, epoch):
+        loss_store = self._psm_data['trainingloss']
+        return loss_store.leaderboard(epoch).loss(loss_store.exp_code(exp_id))
+
+    @staticmethod
+    def _interleave(bracket_batches):
+        batch = []
+        for i in range(max(len(b) for b in bracket_batches)):
+            batch.extend(b[i] for b in bracket_batches if i < len(b))
+        return batch
@@ -0,0 +1,83 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import numpy
+import pytest
+from psm.logger import MockLogger
+
+from gbstrategy import HyperbandStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory
+
+
+def start(logger, interf, **strategy_hyperparams):
+    strategy = HyperbandStrategy()
+    StrategyMachineFactory(strategy, logger, interf).generate_psm()
+    strategy.trigger('ReceiveHyperbandHyperparams', **strategy_hyperparams)
+    return strategy
+
+
+@pytest.mark.parametrize('max_epoch, eta, num_brackets', [(8, 3, 3), (1, 2, 2), (27, 1, 2), (27, 3, 0)])
+def test_rejects_brackets_that_cannot_be_trained(max_epoch, eta, num_brackets):
+    strategy = HyperbandStrategy()
+    StrategyMachineFactory(strategy, MockLogger(), Interface()).generate_psm()
+    with pytest.raises(ValueError):
+        strategy.trigger('ReceiveHyperbandHyperparams',
+                         max_epoch=max_epoch, eta=eta, num_brackets=num_brackets)
+    assert strategy.state == 'Init'
+    assert 'strategy' not in strategy._psm_data
+
+
+@pytest.mark.parametrize('max_epoch, eta, num_brackets', [(81, 3, 5), (27, 3, 4), (10, 3, 3),
+                                                          (100, 2, 7), (5, 2, 1)])
+def test_rungs_grow_to_max_epoch(max_epoch, eta, num_brackets):
+    strategy = start(MockLogger(), Interface(), max_epoch=max_epoch, eta=eta, num_brackets=num_brackets)
+    brackets = strategy._psm_data['state']['brackets']
+    assert len(brackets) == num_brackets
+    for bracket in brackets:
+        epochs = bracket['epochs']
+        assert epochs[0] >= 1
+        assert epochs[-1] == max_epoch
+        assert all(a < b for a, b in zip(epochs, epochs[1:]))
+
+
+def test_brackets_of_the_paper():
+    strategy = start(MockLogger(), Interface(), max_epoch=81, eta=3, num_brackets=5)
+    brackets = strategy._psm_data['state']['brackets']
+    assert [b['epochs'] for b in brackets] == [[1, 3, 9, 27, 81], [3, 9, 27, 81], [9, 27, 81],
+                                               [27, 81], [81]]
+    assert [b['sizes'] for b in brackets] == [[81, 27, 9, 3, 1], [34, 11, 3, 1], [15, 5, 1],
+                                              [8, 2], [5]]
+
+
+def test_every_bracket_trains_its_best_to_max_epoch():
+    random.seed(0)
+    numpy.random.seed(0)
+    logger = MockLogger()
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    start(logger, interf, max_epoch=27, eta=3, num_brackets=4)
+    strategy = HyperbandStrategy()
+    StrategyMachineFactory(strategy, logger, interf).generate_psm()
+    strategy.trigger('ReceiveHyperparams', learning_rate=[0.001, 0.01])
+    while driver.num_running():
+        interf.next_time_point()
+
+    state_data = interf.strategy._psm_data['state']
+    loss_store = interf.strategy._psm_data['trainingloss']
+    for bracket in state_data['brackets']:
+        assert bracket['rung'] == len(bracket['epochs'])
+        assert len(bracket['exps']) == bracket['sizes'][-1]
+        for exp_id in bracket['exps']:
+            assert loss_store.leaderboard(27).loss(loss_store.exp_code(exp_id)) is not None
+    assert loss_store.num_reports(27) == sum(b['sizes'][-1] for b in state_data['brackets'])
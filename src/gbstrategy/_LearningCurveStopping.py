@@ -0,0 +1,141 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import uuid
+
+import numpy
+
+from gbstrategy.components.actions import KillExp, RunExps
+from gbstrategy.components.triggers import (ReceiveEarlyStoppingHyperparams, ReceiveHyperparams,
+                                            ReceiveTrainingLoss,
+                                           )
+
+from gbstrategy.core import Strategy
+
+
+def extrapolate_loss(epochs, losses, target_epoch, scales=numpy.logspace(-2, 1, 16)):
+    """Predict the loss at `target_epoch` from a partial learning curve.
+
+    Fits loss = c + a*(1 + b*epoch)**-2, the shape of `ExampleLoss1`, by linear
+    least squares in (a, c) for every `b` in `scales` and keeps the best fit.
+    """
+    epochs = numpy.asarray(epochs, dtype=numpy.float64)
+    losses = numpy.asarray(losses, dtype=numpy.float64)
+    basis = (1. + numpy.outer(scales, epochs))**-2
+    basis_mean = basis.mean(axis=1, keepdims=True)
+    centered = basis - basis_mean
+    a = centered.dot(losses - losses.mean()) / numpy.maximum((centered**2).sum(axis=1), 1e-12)
+    c = losses.mean() - a*basis_mean[:, 0]
+    residuals = ((c[:, None] + a[:, None]*basis - losses)**2).sum(axis=1)
+    best = numpy.argmin(residuals)
+    return float(c[best] + a[best]*(1. + scales[best]*target_epoch)**-2)
+
+
+class LearningCurveStoppingStrategy(Strategy):
+    """Random search that kills runs predicted to finish worse than another one.
+
+    `num_exp` random configurations are run to `max_epoch`. From `min_epoch`
+    on, every new loss refits the experiment's learning curve
+    (`extrapolate_loss`) and the experiment is killed when the predicted loss
+    at `max_epoch` is worse than the best final loss of the other experiments:
+    reported at `max_epoch` by the finished ones, predicted for the running
+    ones. The experiment with the best prediction is thus never killed.
+    """
+    # Capitalized components are built in in the base class `Strategy
+    _psm_states = ['Init', 'StrategyHyperparamsSet', 'HyperparamsSet', 'End']
+    _psm_transitions = [{
+        'source'    : 'Init',
+        'dest'      : 'StrategyHyperparamsSet',
+        'trigger'   : ReceiveEarlyStoppingHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'do_nothing',
+    }, {
+        'source'    : 'StrategyHyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'run_rand_search',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTrainingLoss(),
+        'conditions': 'predicted_worse',
+        'before'    : 'kill_exp',
+    }]
+
+    def do_nothing(self, event):
+        return []
+
+    def run_rand_search(self, event):
+        strategy_data = self._psm_data['strategy']
+        self._psm_data['state']['killed'] = []
+        batch = []
+        for hyperparams in self.sample_hyperparams(strategy_data['num_exp']):
+            data = {
+                'exp_id': uuid.uuid4(),
+                'end_epoch' : strategy_data['max_epoch'],
+                'hyperparams': hyperparams,
+            }
+            batch.append(data)
+        return [RunExps(data={'batch': batch})]
+
+    def kill_exp(self, event):
+        exp_id = event.kwargs['exp_id']
+        self._psm_data['state']['killed'].append(exp_id)
+        return [KillExp(data={'exp_id': exp_id})]
+
+    def predicted_worse(self, event):
+        strategy_data = self._psm_data['strategy']
+        epoch = event.kwargs['epoch']
+        if epoch < strategy_data['min_epoch'] or epoch >= strategy_data['max_epoch']:
+            return False
+        exp_id = event.kwargs['exp_id']
+        if exp_id in self._psm_data['state']['killed']:
+            return False
+        predicted = self._projections[exp_id] = self._project(exp_id)
+        best_final = self._best_final_loss(exclude=exp_id)
+        return best_final is not None and predicted > best_final
+
+    @property
+    def _projections(self):
+        # predicted final loss per running exp_id, a cache of `_project` that is
+        # refilled from the loss store after recovery and never logged
+        projections = self.__dict__.get('_projected_losses')
+        if projections is None:
+            projections = self._projected_losses = {}
+        return projections
+
+    def _project(self, exp_id):
+        max_epoch = self._psm_data['strategy']['max_epoch']
+        epochs, losses = self._psm_data['trainingloss'].history(exp_id)
+        return extrapolate_loss(epochs, losses, max_epoch)
+
+    def _best_final_loss(self, exclude):
+        strategy_data = self._psm_data['strategy']
+        loss_store = self._psm_data['trainingloss']
+        finished = set(loss_store.exp_id(c) for c in loss_store.exp_codes(strategy_data['max_epoch']))
+        killed = set(self._psm_data['state']['killed'])
+        projections = self._projections
+        best = None
+        final_losses = loss_store.losses(strategy_data['max_epoch'])
+        if final_losses.size:
+            best = float(final_losses.min())
+        for code in loss_store.exp_codes(strategy_data['min_epoch']):
+            exp_id = loss_store.exp_id(code)
+            if exp_id == exclude or exp_id in killed or exp_id in finished:
+                continue
+            predicted = projections.get(exp_id)
+            if predicted is None:
+                predicted = projections[exp_id] = self._project(exp_id)
+            if best is None or predicted < best:
+                best = predicted
+        return best
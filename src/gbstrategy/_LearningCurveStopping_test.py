@@ -0,0 +1,79 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import LearningCurveStoppingStrategy
+from gbstrategy.core import Interface, StrategyMachineFactory
+
+
+class RecordingDriver(object):
+    def __init__(self, interface):
+        self.killed = []
+        interface.register_driver(self)
+
+    def run_exps(self, batch):
+        pass
+
+    def kill_exp(self, exp_id):
+        self.killed.append(exp_id)
+
+
+def curve(final_loss, epoch):
+    return final_loss + 0.7*(1. + 0.1*epoch)**-2
+
+
+def start_strategy(num_exp, min_epoch, max_epoch):
+    logger = MockLogger()
+    interf = Interface()
+    driver = RecordingDriver(interf)
+    triggers = [
+        ('ReceiveEarlyStoppingHyperparams', {'num_exp': num_exp, 'min_epoch': min_epoch,
+                                             'max_epoch': max_epoch}),
+        ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]}),
+    ]
+    for name, data in triggers:
+        strategy = LearningCurveStoppingStrategy()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    return interf, driver
+
+
+def report(interf, driver, final_losses, epochs):
+    for epoch in epochs:
+        for exp_id, final_loss in final_losses.items():
+            if exp_id not in driver.killed:
+                interf.upload_training_loss(exp_id, epoch, 'loss', curve(final_loss, epoch))
+
+
+def test_best_curve_survives():
+    final_losses = {'a': 0.4, 'b': 0.1, 'c': 0.3, 'd': 0.2}
+    interf, driver = start_strategy(len(final_losses), 4, 16)
+    report(interf, driver, final_losses, range(1, 17))
+
+    assert sorted(driver.killed) == ['a', 'c', 'd']
+    assert interf.strategy._psm_data['trainingloss'].history('b')[0].max() == 16
+
+
+def test_single_experiment_is_never_killed():
+    interf, driver = start_strategy(1, 2, 8)
+    report(interf, driver, {'a': 0.5}, range(1, 9))
+    assert driver.killed == []
+
+
+def test_compares_with_reported_final_loss():
+    interf, driver = start_strategy(2, 4, 8)
+    report(interf, driver, {'a': 0.1}, range(1, 9))
+    report(interf, driver, {'b': 0.2}, range(1, 5))
+    assert driver.killed == ['b']
+    assert numpy.allclose(interf.strategy._psm_data['trainingloss'].losses(8), [curve(0.1, 8)])
@@ -0,0 +1,65 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+from gbstrategy.components.triggers import (ReceiveEarlyStoppingHyperparams, ReceiveHyperparams,
+                                            ReceiveTrainingLoss,
+                                           )
+
+from gbstrategy._LearningCurveStopping import LearningCurveStoppingStrategy
+
+
+class MedianStoppingStrategy(LearningCurveStoppingStrategy):
+    """Random search with the median stopping rule.
+
+    `num_exp` random configurations are run to `max_epoch`. From `min_epoch`
+    on, an experiment is killed when its loss at an epoch is worse than the
+    median of the losses the other experiments reported at that epoch, once
+    at least `min_reports` of them did. The medians come from the constant
+    memory per-epoch estimates in `_psm_data['lossquantiles']`.
+    """
+    min_reports = 5
+    loss_quantile = 0.5
+
+    # Capitalized components are built in in the base class `Strategy
+    _psm_states = ['Init', 'StrategyHyperparamsSet', 'HyperparamsSet', 'End']
+    _psm_transitions = [{
+        'source'    : 'Init',
+        'dest'      : 'StrategyHyperparamsSet',
+        'trigger'   : ReceiveEarlyStoppingHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'do_nothing',
+    }, {
+        'source'    : 'StrategyHyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'run_rand_search',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTrainingLoss(),
+        'conditions': 'worse_than_median',
+        'before'    : 'kill_exp',
+    }]
+
+    def worse_than_median(self, event):
+        strategy_data = self._psm_data['strategy']
+        epoch = event.kwargs['epoch']
+        if epoch < strategy_data['min_epoch'] or epoch >= strategy_data['max_epoch']:
+            return False
+        if event.kwargs['exp_id'] in self._psm_data['state']['killed']:
+            return False
+        # the estimate before this loss was added is the median of the others
+        estimator = self._psm_data['lossquantiles'].estimator(epoch)
+        if estimator.count <= self.min_reports:
+            return False
+        return event.kwargs['loss_value'] > estimator.previous_value
@@ -10,11 +10,14 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import random
+import uuid
+
 from psm import PersistentStateMachine
 
-from gbstrategy.components.actions import RunExp
-from gbstrategy.components.triggers import ReceiveHyperparams, ReceiveRandomSearchHyperparams
+from gbstrategy.components.actions import RunExps
+from gbstrategy.components.triggers import (ReceiveHyperparams, ReceiveRandomSearchHyperparams,
+                                            ReceiveTrainingLoss,
+                                           )
 from gbstrategy.core import Strategy
 
 
@@ -33,19 +36,26 @@ class RandomSearchStrategy(Strategy):
         'trigger'   : ReceiveHyperparams(),
         'conditions': lambda self: True,
         'before'    : 'run_rand_search',
+    }, {
+        # losses are only logged and aggregated
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTrainingLoss(),
+        'conditions': lambda self: False,
+        'before'    : 'do_nothing',
     }]
 
     def do_nothing(self, event):
         return []
 
     def run_rand_search(self, event):
-        data = {
-            'exp_id': 'whatever_hashed',
-            'end_epoch' : 1,
-            'hyperparams':   {
-                'lr'    : 0.01,
-                'lambda': 0.002,
+        strategy_data = self._psm_data['strategy']
+        batch = []
+        for hyperparams in self.sample_hyperparams(strategy_data['num_exp']):
+            data = {
+                'exp_id': uuid.uuid4(),
+                'end_epoch' : strategy_data['epoch'],
+                'hyperparams': hyperparams,
             }
-        }
-        actions = [RunExp(data=data)]
-        return actions
+            batch.append(data)
+        return [RunExps(data={'batch': batch})] if batch else []
@@ -0,0 +1,76 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import RandomSearchStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory
+
+
+class LHSStrategy(RandomSearchStrategy):
+    sampler = 'lhs'
+
+
+def search(strategy_cls, hyperparams, num_exp=16, epoch=3):
+    random.seed(0)
+    numpy.random.seed(0)
+    logger = MockLogger()
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    for name, data in [('ReceiveRandomSearchHyperparams', {'num_exp': num_exp, 'epoch': epoch}),
+                       ('ReceiveHyperparams', hyperparams)]:
+        strategy = strategy_cls()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interf.next_time_point()
+    return interf.strategy
+
+
+def test_trains_every_configuration_to_the_end_epoch():
+    strategy = search(RandomSearchStrategy, {
+        'learning_rate': {'type': 'loguniform', 'low': 1e-4, 'high': 1e-1},
+        'optimizer'    : {'type': 'categorical', 'choices': ['sgd', 'adam']},
+    })
+    assert strategy.state == 'HyperparamsSet'
+    store = strategy._psm_data['trainingloss']
+    assert len(store) == 16 * 3
+    assert store.num_reports(3) == 16
+
+
+class RecordingDriver(object):
+    "Records the batches it is handed instead of training"
+    def __init__(self, interface):
+        self.batches = []
+        interface.register_driver(self)
+
+    def run_exps(self, batch):
+        self.batches.append(batch)
+
+
+def test_uses_the_sampler_of_the_strategy():
+    logger = MockLogger()
+    interf = Interface()
+    driver = RecordingDriver(interf)
+    for name, data in [('ReceiveRandomSearchHyperparams', {'num_exp': 8, 'epoch': 1}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = LHSStrategy()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    batch, = driver.batches
+    assert [end_epoch for _, end_epoch, _ in batch] == [1] * 8
+    rates = [data['hyperparams']['learning_rate'] for _, _, data in batch]
+    # a latin hypercube of 8 puts one point in each eighth of the range
+    assert sorted(int((r - 0.001) / 0.009 * 8) for r in rates) == list(range(8))
@@ -10,15 +10,14 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import random
 import uuid
 
 from psm.components import EnterState
 
-from gbstrategy.components.actions import RunExp
+from gbstrategy.components.actions import RunExps
 from gbstrategy.components.enterstates import End, HyperparamsSet, Init, StrategyHyperparamsSet
 from gbstrategy.components.triggers import (ReceiveHyperparams, ReceiveRandomSearchHyperparams,
-                                            ReceiveTime, ReceiveTrainingLoss,
+                                            ReceiveTime, ReceiveTrainingLoss, ReceiveTrainingLosses,
                                            )
 
 from gbstrategy.core import Strategy
@@ -55,6 +54,18 @@ class SuccessiveHalvingStrategy(Strategy):
         'trigger'   : ReceiveTrainingLoss(),
         'conditions': 'exp_finished',
         'before'    : 'run_half_search',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HalvingStage',
+        'trigger'   : ReceiveTrainingLosses(),
+        'conditions': 'rand_exp_finished',
+        'before'    : 'enter_half_search',
+    }, {
+        'source'    : 'HalvingStage',
+        'dest'      : 'HalvingStage',
+        'trigger'   : ReceiveTrainingLosses(),
+        'conditions': 'exp_finished',
+        'before'    : 'run_half_search',
     }]
 
     def do_nothing(self, event):
@@ -71,18 +82,15 @@ class SuccessiveHalvingStrategy(Strategy):
         num_exp = self._psm_data['strategy']['num_exp']
         self._psm_data['state']['num_exp'] = num_exp
 
-        lr_set = self._psm_data['hyperparams']['learning_rate']
-        actions = []
-        for i in range(num_exp):
+        batch = []
+        for hyperparams in self.sample_hyperparams(num_exp):
             data = {
                 'exp_id': uuid.uuid4(),
                 'end_epoch' : num_epochs,
-                'hyperparams':   {
-                    'learning_rate': random.uniform(*lr_set),
-                }
+                'hyperparams': hyperparams,
             }
-            actions.append(RunExp(data=data))
-        return actions
+            batch.append(data)
+        return [RunExps(data={'batch': batch})] if batch else []
 
     def run_half_search(self, event):
         state_data = self._psm_data['state']
@@ -94,7 +102,7 @@ class SuccessiveHalvingStrategy(Strategy):
         # run more till new epoch
         state_data['total_num_epochs'] += state_data['num_epochs']
         state_data['num_epochs'] *= 2
-        actions = []
+        batch = []
         for exp_id in top_exps:
             data = {
                 'exp_id': exp_id,
@@ -103,8 +111,8 @@ class SuccessiveHalvingStrategy(Strategy):
                     'learning_rate': None,
                 }
             }
-            actions.append(RunExp(data=data))
-        return actions
+            batch.append(data)
+        return [RunExps(data={'batch': batch})] if batch else []
 
     def enter_half_search(self, event):
         state_data = self._psm_data['state']
@@ -115,7 +123,7 @@ class SuccessiveHalvingStrategy(Strategy):
         state_data['total_num_epochs'] = state_data['num_epochs'] + \
                                          self._psm_data['strategy']['epoch']
 
-        actions = []
+        batch = []
         for exp_id in top_exps:
             data = {
                 'exp_id': exp_id,
@@ -124,29 +132,22 @@ class SuccessiveHalvingStrategy(Strategy):
                     'learning_rate': None,
                 }
             }
-            actions.append(RunExp(data=data))
-        return actions
+            batch.append(data)
+        return [RunExps(data={'batch': batch})] if batch else []
 
     def exp_finished(self, event):
-        loss_log = self._psm_data['trainingloss']
+        loss_store = self._psm_data['trainingloss']
         desired_epoch = self._psm_data['state']['total_num_epochs']
         desired_num = self._psm_data['state']['num_exp']
-        loss_log = [l for l in loss_log if l['epoch'] == desired_epoch]
-        cond = len(loss_log) >= desired_num
+        cond = loss_store.num_reports(desired_epoch) >= desired_num
         return cond
 
     def rand_exp_finished(self, event):
-        loss_log = self._psm_data['trainingloss']
+        loss_store = self._psm_data['trainingloss']
         desired_epoch = self._psm_data['strategy']['epoch']
         desired_num = self._psm_data['state']['num_exp']
-        loss_log = [l for l in loss_log if l['epoch'] == desired_epoch]
-        cond = len(loss_log) >= desired_num
+        cond = loss_store.num_reports(desired_epoch) >= desired_num
         return cond
 
     def get_top_exps(self, num, epoch):
-        loss_log = self._psm_data['trainingloss']
-        loss_log = [l for l in loss_log if l['epoch'] == epoch]
-        exps_id = [(l['exp_id'], l['loss_value']) for l in loss_log]
-        top_exps_id = sorted(exps_id, key=lambda x: x[1])[:num]
-        top_exps_id = [_[0] for _ in top_exps_id]
-        return top_exps_id
+        return self._psm_data['trainingloss'].top_exps(epoch, num)
@@ -0,0 +1,150 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import uuid
+
+import numpy
+
+from gbstrategy.components.actions import RunExps
+from gbstrategy.components.triggers import (Observations, ReceiveHyperparams, ReceiveTPEHyperparams,
+                                            ReceiveTrainingLoss, ReceiveTrainingLosses,
+                                           )
+from gbstrategy.datastructures import ParzenSurrogate, SearchSpace
+
+from gbstrategy.core import Strategy
+
+
+class TPEStrategy(Strategy):
+    """Tree-structured Parzen estimator (TPE) proposals.
+
+    Every configuration is trained to `epoch` epochs. The first `num_startup`
+    ones come from the search space's `sampler`; afterwards the loss each
+    experiment reports at `epoch` is added to a `ParzenSurrogate` over the
+    unit cube of the search space as it arrives, and whenever workers free up
+    the surrogate proposes that many configurations in one batch. At most
+    `num_workers` experiments run until `num_exp` configurations were tried.
+
+    The state only keeps the unit points of the running experiments. The
+    finished ones are logged once as `Observations` and aggregated into
+    `_psm_data['observations']`. The surrogate is built from them on the
+    side, once after a recovery and then one observation at a time.
+    """
+    gamma = 0.25
+    num_startup = 10
+    num_candidates = 64
+
+    # Capitalized components are built in in the base class `Strategy
+    _psm_states = ['Init', 'StrategyHyperparamsSet', 'HyperparamsSet', 'End']
+    _psm_transitions = [{
+        'source'    : 'Init',
+        'dest'      : 'StrategyHyperparamsSet',
+        'trigger'   : ReceiveTPEHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'do_nothing',
+    }, {
+        'source'    : 'StrategyHyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveHyperparams(),
+        'conditions': lambda self: True,
+        'before'    : 'init_surrogate',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTrainingLoss(),
+        'conditions': 'exp_finished',
+        'before'    : 'run_next_jobs',
+    }, {
+        'source'    : 'HyperparamsSet',
+        'dest'      : 'HyperparamsSet',
+        'trigger'   : ReceiveTrainingLosses(),
+        'conditions': 'exp_finished',
+        'before'    : 'run_next_jobs',
+    }]
+
+    def do_nothing(self, event):
+        return []
+
+    def init_surrogate(self, event):
+        state_data = self._psm_data['state']
+        state_data['running'] = {}
+        state_data['num_started'] = 0
+        return self.propose_jobs()
+
+    def exp_finished(self, event):
+        return bool(self._finished_records(event))
+
+    def run_next_jobs(self, event):
+        running = self._psm_data['state']['running']
+        rows = []
+        for record in self._finished_records(event):
+            unit = running.pop(record['exp_id'], None)
+            if unit is not None:
+                # inactive (NaN) coordinates as the surrogate counts them
+                unit = numpy.asarray(unit, dtype=numpy.float64)
+                rows.append(numpy.where(numpy.isnan(unit), 0.5, unit).tolist() + [record['loss_value']])
+        if rows:
+            observations = Observations()
+            observations.store({'rows': rows})
+            observations.log(self._psm_factory.logger)
+            observations.aggregate_data(self._psm_data)
+        return self.propose_jobs()
+
+    def surrogate(self):
+        "The `ParzenSurrogate` of the observations"
+        observations = self._psm_data.get('observations', ())
+        cached = self.__dict__.get('_surrogate')
+        if cached is None or cached[0] is not observations:
+            # a recovered state, rebuild the running sums from scratch
+            dim = SearchSpace(self._psm_data['hyperparams']).dim
+            cached = self._surrogate = (observations, ParzenSurrogate(dim, self.gamma))
+        surrogate = cached[1]
+        width = surrogate.dim + 1
+        for start in range(surrogate.count * width, len(observations), width):
+            surrogate.add(observations[start:start + surrogate.dim], observations[start + surrogate.dim])
+        return surrogate
+
+    def propose_jobs(self):
+        "Fill the free workers with one batch of new configurations"
+        state_data = self._psm_data['state']
+        running = state_data['running']
+        strategy_data = self._psm_data['strategy']
+        num = min(strategy_data['num_workers'] - len(running),
+                  strategy_data['num_exp'] - state_data['num_started'])
+        if num <= 0:
+            return []
+
+        space = SearchSpace(self._psm_data['hyperparams'])
+        if len(self._psm_data.get('observations', ())) < self.num_startup * (space.dim + 1):
+            unit = space.unit_sample(num, self.sampler, self.rng)
+        else:
+            unit = self.surrogate().propose(num, self.num_candidates, self.rng)
+        hyperparams = space.from_unit(unit)
+        # where the configurations really are once snapped to integers and choices
+        unit = space.to_unit(hyperparams)
+
+        batch = []
+        for u, h in zip(unit.tolist(), hyperparams):
+            data = {
+                'exp_id': uuid.uuid4(),
+                'end_epoch' : strategy_data['epoch'],
+                'hyperparams': h,
+            }
+            running[data['exp_id']] = u
+            batch.append(data)
+        state_data['num_started'] += len(batch)
+        return [RunExps(data={'batch': batch})]
+
+    def _finished_records(self, event):
+        records = event.kwargs['records'] if 'records' in event.kwargs else [event.kwargs]
+        running = self._psm_data['state']['running']
+        epoch = self._psm_data['strategy']['epoch']
+        return [r for r in records if r['epoch'] >= epoch and r['exp_id'] in running]
@@ -0,0 +1,89 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import numpy
+import pytest
+from psm.logger import MockLogger
+
+from gbstrategy import TPEStrategy
+from gbstrategy.core import (DemoDriver, ExampleLoss1, Interface, MemoryLogger,
+                             StrategyMachineFactory,
+                            )
+
+
+SPACE = {
+    'learning_rate': {'type': 'loguniform', 'low': 1e-4, 'high': 1e-1},
+    'optimizer'    : {'type': 'categorical', 'choices': ['sgd', 'adam']},
+    'momentum'     : {'type': 'uniform', 'low': 0.5, 'high': 0.99,
+                      'condition': {'optimizer': 'sgd'}},
+}
+
+
+class EnterLogger(MemoryLogger):
+    "Keeps the state data of every entered state"
+    def __init__(self):
+        super().__init__()
+        self.entered = []
+
+    def logEnterState(self, get_state_data, event):
+        super().logEnterState(get_state_data, event)
+        self.entered.append(get_state_data())
+
+
+def search(logger, num_exp=24):
+    random.seed(0)
+    numpy.random.seed(0)
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    for name, data in [('ReceiveTPEHyperparams', {'num_workers': 4, 'num_exp': num_exp, 'epoch': 2}),
+                       ('ReceiveHyperparams', SPACE)]:
+        strategy = TPEStrategy()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interf.next_time_point()
+    return interf.strategy
+
+
+def test_observations_stay_out_of_the_entered_states():
+    logger = EnterLogger()
+    strategy = search(logger)
+    observations = strategy._psm_data['observations']
+    # one row of the 3 unit coordinates and the loss per configuration
+    assert len(observations) == 24 * 4
+    assert not any(numpy.isnan(observations))
+    assert strategy.surrogate().count == 24
+    assert strategy._psm_data['state']['num_started'] == 24
+    # entered states keep at most the running points, never the observations
+    assert all('observations' not in state_data and len(state_data.get('running', ())) <= 4
+               for state_data in logger.entered)
+
+
+@pytest.mark.parametrize('logger_cls', [MemoryLogger, MockLogger])
+def test_observations_are_recovered(logger_cls):
+    logger = logger_cls()
+    strategy = search(logger)
+    recovered = TPEStrategy()
+    StrategyMachineFactory(recovered, logger, Interface()).generate_psm()
+    assert recovered._psm_data['observations'] == strategy._psm_data['observations']
+    assert recovered.surrogate() == strategy.surrogate()
+    assert recovered._psm_data['state'] == strategy._psm_data['state']
+
+
+def test_inactive_coordinates_count_as_the_middle():
+    strategy = search(MemoryLogger(), num_exp=8)
+    observations = numpy.asarray(strategy._psm_data['observations']).reshape(-1, 4)
+    adam = observations[:, 1] >= 0.5
+    assert adam.any() and (~adam).any()
+    assert (observations[adam, 2] == 0.5).all()
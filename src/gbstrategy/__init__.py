@@ -10,6 +10,16 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+from ._AsyncSuccessiveHalving import AsyncSuccessiveHalvingStrategy
+
+from ._Hyperband import HyperbandStrategy
+
+from ._LearningCurveStopping import LearningCurveStoppingStrategy
+
+from ._MedianStopping import MedianStoppingStrategy
+
 from ._RandomSearch import RandomSearchStrategy
 
 from ._SuccessiveHalving import SuccessiveHalvingStrategy
+
+from ._TPE import TPEStrategy
@@ -22,5 +22,31 @@ class RunExp(Action):
     def _do(self, interface):
         interface.run_exp(self.data)
 
+    def _get_counteraction(self):
+        return KillExp(data={'exp_id': self.data['exp_id']})
+
+
+class RunExps(Action):
+    "Start or extend many experiments with a single driver call"
+    fields = {
+        'batch': list,
+    }
+
+    def _do(self, interface):
+        interface.run_exps(self.data['batch'])
+
+    def _get_counteraction(self):
+        pass
+
+
+class KillExp(Action):
+    "Stop an experiment after the epoch it is training, freeing its worker"
+    fields = {
+        'exp_id': str,
+    }
+
+    def _do(self, interface):
+        interface.kill_exp(self.data)
+
     def _get_counteraction(self):
         pass
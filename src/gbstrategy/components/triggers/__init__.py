@@ -10,15 +10,24 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+from array import array
+import copy
 import datetime
+import heapq
 
 from psm.components import Trigger
 
+from gbstrategy.datastructures import LossRecord, LossStore, SearchSpace
+
 def clean_time(time):
-    if not time.__class__ is datetime:
+    if not isinstance(time, datetime.datetime):
         raise ValueError('Time should be in python datetime format')
     return time
 
+def loss_quantiles(data):
+    "The per-epoch `EpochQuantiles` of the training losses in `data`, None unless the strategy keeps them"
+    return data.get('lossquantiles')
+
 
 class ReceiveTrainingLoss(Trigger):
     _psm_data_prefix = 'trainingloss'
@@ -29,13 +38,55 @@ class ReceiveTrainingLoss(Trigger):
         'loss_value': float,
     }
 
+    def store(self, kwargs):
+        super().store(kwargs)
+        self.data = LossRecord(**self.data)
+
+    def aggregate_data(self, data):
+        store = data.get(self._psm_data_prefix)
+        if store is None:
+            store = data[self._psm_data_prefix] = LossStore()
+        store.append(**self.data)
+        quantiles = loss_quantiles(data)
+        if quantiles is not None:
+            quantiles.update(self.data['epoch'], self.data['loss_value'])
+
+
+class ReceiveTrainingLosses(Trigger):
+    "A batch of `ReceiveTrainingLoss` records applied in one transition"
+    _psm_data_prefix = 'trainingloss'
+    fields = {
+        'records': list,
+    }
+
+    def store(self, kwargs):
+        super().store(kwargs)
+        self.data['records'] = [LossRecord(**r) for r in self.data['records']]
+
+    def aggregate_data(self, data):
+        store = data.get(self._psm_data_prefix)
+        if store is None:
+            store = data[self._psm_data_prefix] = LossStore()
+        store.extend(self.data['records'])
+        quantiles = loss_quantiles(data)
+        if quantiles is not None:
+            records = self.data['records']
+            quantiles.extend([r['epoch'] for r in records], [r['loss_value'] for r in records])
+
 
 class ReceiveTime(Trigger):
+    "The (possibly simulated) current time; the first one received is kept as `start`"
     _psm_data_prefix = 'time'
     fields = {
         'time': clean_time,
     }
 
+    def aggregate_data(self, data):
+        times = data.get(self._psm_data_prefix)
+        if times is None:
+            times = data[self._psm_data_prefix] = {'start': self.data['time']}
+        times['time'] = self.data['time']
+
 
 class ReceiveRandomSearchHyperparams(Trigger):
     _psm_data_prefix = 'strategy'
@@ -45,10 +96,182 @@ class ReceiveRandomSearchHyperparams(Trigger):
     }
 
 
+class ReceiveAsyncHalvingHyperparams(Trigger):
+    _psm_data_prefix = 'strategy'
+    fields = {
+        'num_workers': int,
+        'num_exp'    : int,
+        'epoch'      : int,
+        'max_epoch'  : int,
+        'eta'        : int,
+    }
+
+
+class ReceiveHyperbandHyperparams(Trigger):
+    _psm_data_prefix = 'strategy'
+    fields = {
+        'max_epoch'   : int,
+        'eta'         : int,
+        'num_brackets': int,
+    }
+
+    def store(self, kwargs):
+        super().store(kwargs)
+        max_epoch, eta, num_brackets = self.data['max_epoch'], self.data['eta'], self.data['num_brackets']
+        if eta < 2 or num_brackets < 1:
+            raise ValueError('Hyperband needs eta >= 2 and num_brackets >= 1')
+        if eta**(num_brackets - 1) > max_epoch:
+            # the most aggressive bracket would start below one epoch
+            raise ValueError('Hyperband needs eta**(num_brackets-1) <= max_epoch, '
+                             'got {}**{} > {}'.format(eta, num_brackets - 1, max_epoch))
+
+
+class ReceiveEarlyStoppingHyperparams(Trigger):
+    _psm_data_prefix = 'strategy'
+    fields = {
+        'num_exp'  : int,
+        'min_epoch': int,
+        'max_epoch': int,
+    }
+
+
+class ReceiveTPEHyperparams(Trigger):
+    _psm_data_prefix = 'strategy'
+    fields = {
+        'num_workers': int,
+        'num_exp'    : int,
+        'epoch'      : int,
+    }
+
+
 class ReceiveHyperparams(Trigger):
+    "The search space definition of the strategy, see `SearchSpace`"
     _psm_data_prefix = 'hyperparams'
     fields = {}
 
+    def store(self, kwargs):
+        # reject a definition that cannot be sampled before it is logged
+        SearchSpace(kwargs)
+        super().store(kwargs)
+
 
 class FailureRecovery(Trigger):
     fields = {}
+
+
+class Dispatch(Trigger):
+    """A change of the queue of the `max_concurrent` dispatch budget.
+
+    The experiments in `release` reported their end epoch and free their
+    slots. `actions` are applied in order: ['run', RunExp data] queues the
+    data, ['kill', exp_id] drops the experiment from the queue and frees its
+    slot. Then queued data starts, extensions of running experiments first,
+    then promotions (experiments with reported losses), then new ones, while
+    fewer than `limit` experiments run. Only these changes are logged, the
+    queue in `_psm_data['dispatch']` is rebuilt by applying them in order.
+    """
+    _psm_data_prefix = 'dispatch'
+    fields = {
+        'release': list,
+        'actions': list,
+        'limit'  : int,
+    }
+
+    def aggregate_data(self, data):
+        self.apply(data)
+
+    def apply(self, data):
+        "Apply the change to `data` and return the data of the experiments to start"
+        dispatch = data.get(self._psm_data_prefix)
+        if dispatch is None:
+            dispatch = data[self._psm_data_prefix] = {
+                'running': {},
+                'queue'  : [],
+                'seq'    : 0,
+            }
+        running = dispatch['running']
+        queue = dispatch['queue']
+        for exp_id in self.data['release']:
+            running.pop(exp_id, None)
+        for kind, item in self.data['actions']:
+            if kind == 'run':
+                heapq.heappush(queue, [self._priority(data, running, item['exp_id']), dispatch['seq'], item])
+                dispatch['seq'] += 1
+            else:
+                running.pop(item, None)
+                kept = [entry for entry in queue if entry[2]['exp_id'] != item]
+                if len(kept) < len(queue):
+                    heapq.heapify(kept)
+                    queue[:] = kept
+
+        started = []
+        while queue:
+            exp_id = queue[0][2]['exp_id']
+            if exp_id not in running and len(running) >= self.data['limit']:
+                break
+            item = heapq.heappop(queue)[2]
+            running[exp_id] = item['end_epoch']
+            started.append(item)
+        return started
+
+    @staticmethod
+    def _priority(data, running, exp_id):
+        if exp_id in running:
+            return 0
+        loss_store = data.get(ReceiveTrainingLoss._psm_data_prefix)
+        return 1 if loss_store is not None and loss_store.exp_code(exp_id) is not None else 2
+
+
+class Observations(Trigger):
+    """Points of the unit cube of a search space and the loss measured at each.
+
+    Every row is the coordinates followed by the loss. The rows are added
+    to one flat `array` in `_psm_data['observations']`, so they are logged
+    once each rather than with every entered state.
+    """
+    _psm_data_prefix = 'observations'
+    fields = {
+        'rows': list,
+    }
+
+    def aggregate_data(self, data):
+        observations = data.get(self._psm_data_prefix)
+        if observations is None:
+            observations = data[self._psm_data_prefix] = array('d')
+        for row in self.data['rows']:
+            observations.extend(row)
+
+
+class Snapshot(Trigger):
+    """Checkpoint of the state name and the whole `_psm_data` of a strategy.
+
+    `LossStore`s are kept as their `columns()` (views of rows that are never
+    written again) rather than copied, everything else in `psm_data` is a
+    copy.
+    """
+    fields = {
+        'state'   : str,
+        'psm_data': dict,
+        'columns' : dict,
+    }
+
+    @classmethod
+    def of(cls, state, psm_data):
+        psm_data = dict(psm_data)
+        columns = {}
+        for key, value in list(psm_data.items()):
+            if isinstance(value, LossStore):
+                columns[key] = psm_data.pop(key).columns()
+        snapshot = cls()
+        snapshot.store({
+            'state'   : state,
+            'psm_data': copy.deepcopy(psm_data),
+            'columns' : columns,
+        })
+        return snapshot
+
+    def aggregate_data(self, data):
+        data.clear()
+        data.update(copy.deepcopy(self.data['psm_data']))
+        for key, columns in self.data['columns'].items():
+            data[key] = LossStore.from_columns(columns)
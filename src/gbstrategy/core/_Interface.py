@@ -28,18 +28,43 @@ class Interface(object):
         self.driver = driver
 
     def run_exp(self, data):
+        self.driver.run_exp(*self._run_exp_args(data))
+
+    def run_exps(self, batch):
+        """Hand a whole batch of `RunExp` data to the driver at once.
+
+        The driver gets a tuple of (exp_id, end_epoch, hyperparams) tuples
+        through `driver.run_exps`; drivers without `run_exps` get one
+        `run_exp` call per experiment. Like with `run_exp`, the hyperparams
+        are copies the driver may keep or change.
+        """
+        batch = self._run_exps_batch(batch)
+        run_exps = getattr(self.driver, 'run_exps', None)
+        if run_exps is not None:
+            run_exps(batch)
+        else:
+            for args in batch:
+                self.driver.run_exp(*args)
+
+    @staticmethod
+    def _run_exps_batch(batch):
+        # the batch is also the data of the logged action, so it is copied once as a whole
+        return tuple((data.pop('exp_id'), data.pop('end_epoch'), data) for data in copy.deepcopy(batch))
+
+    @staticmethod
+    def _run_exp_args(data):
         dic = copy.deepcopy(data)
         end_epoch = dic.pop('end_epoch')
         exp_id = dic.pop('exp_id')
 
         hyperparams = dic
-        self.driver.run_exp(exp_id, end_epoch, hyperparams)
+        return exp_id, end_epoch, hyperparams
 
     def kill_exp(self, data):
-        raise NotImplementedError
+        self.driver.kill_exp(data['exp_id'])
 
     def next_time_point(self):
-        self.factory.generate_psm()
+        self.factory.current_psm()
         self.driver.next()
 
     def upload_training_loss(self, exp_id, epoch, loss_name, loss_value):
@@ -49,4 +74,34 @@ class Interface(object):
             'loss_name' : loss_name,
             'loss_value': loss_value,
         }
-        self.strategy.ReceiveTrainingLoss(**data)
+        self._trigger('ReceiveTrainingLoss', data)
+
+    def upload_training_losses(self, records):
+        """Report many losses (dicts with the `upload_training_loss` arguments) at once.
+
+        Strategies with a `ReceiveTrainingLosses` transition from the current
+        state take the whole batch in one transition; otherwise the records are
+        sent one by one.
+        """
+        records = list(records)
+        psm = self.factory.current_psm()
+        if 'ReceiveTrainingLosses' in psm.get_triggers(self.strategy.state):
+            self._trigger('ReceiveTrainingLosses', {'records': records})
+        else:
+            for data in records:
+                self._trigger('ReceiveTrainingLoss', data)
+
+    def upload_time(self, time):
+        "Send the (possibly simulated) current `datetime` to strategies that listen to it"
+        psm = self.factory.current_psm()
+        if 'ReceiveTime' in psm.get_triggers(self.strategy.state):
+            self._trigger('ReceiveTime', {'time': time})
+
+    def _trigger(self, trigger_name, data):
+        try:
+            getattr(self.strategy, trigger_name)(**data)
+        except Exception:
+            # the in-memory machine may be half way through a transition, only the
+            # log can be trusted from here on
+            self.factory.invalidate()
+            raise
@@ -0,0 +1,144 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import itertools
+import uuid
+
+import numpy
+import pytest
+from psm.logger import MockLogger
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import Interface, MemoryLogger, StrategyMachineFactory
+
+
+class TickDriver(object):
+    "Trains every unfinished experiment one epoch per `next()`, with noise-free losses"
+    def __init__(self, interface, batched):
+        self.interface = interface
+        self.batched = batched
+        self.exps = {}
+        interface.register_driver(self)
+
+    def run_exp(self, exp_id, end_epoch, hyperparams):
+        exp = self.exps.setdefault(exp_id, {'epoch': 0,
+                                            'learning_rate': hyperparams['hyperparams']['learning_rate']})
+        exp['end_epoch'] = end_epoch
+
+    def kill_exp(self, exp_id):
+        self.exps[exp_id]['end_epoch'] = self.exps[exp_id]['epoch']
+
+    def num_running(self):
+        return sum(exp['epoch'] < exp['end_epoch'] for exp in self.exps.values())
+
+    def next(self):
+        records = []
+        for exp_id, exp in sorted(self.exps.items()):
+            if exp['epoch'] < exp['end_epoch']:
+                exp['epoch'] += 1
+                records.append({
+                    'exp_id'    : exp_id,
+                    'epoch'     : exp['epoch'],
+                    'loss_name' : 'loss',
+                    'loss_value': abs(exp['learning_rate'] - 0.004) + 1. / exp['epoch'],
+                })
+        if self.batched:
+            self.interface.upload_training_losses(records)
+        else:
+            for record in records:
+                self.interface.upload_training_loss(**record)
+
+
+class QuantileHalvingStrategy(SuccessiveHalvingStrategy):
+    loss_quantile = 0.5
+
+
+def run(batched, monkeypatch):
+    numbers = itertools.count()
+    monkeypatch.setattr(uuid, 'uuid4', lambda: uuid.UUID(int=next(numbers)))
+    logger = MockLogger()
+    interf = Interface()
+    driver = TickDriver(interf, batched)
+    for name, data in [('ReceiveRandomSearchHyperparams', {'num_exp': 16, 'epoch': 2}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = QuantileHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interf.next_time_point()
+
+    recovered = QuantileHalvingStrategy()
+    StrategyMachineFactory(recovered, logger, Interface()).generate_psm()
+    return interf.strategy, recovered
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_batched_and_single_losses_recover_the_same_strategy(seed, monkeypatch):
+    numpy.random.seed(seed)
+    single, single_recovered = run(False, monkeypatch)
+    numpy.random.seed(seed)
+    batched, batched_recovered = run(True, monkeypatch)
+
+    for strategy in [single_recovered, batched, batched_recovered]:
+        assert strategy.state == single.state == 'HalvingStage'
+        assert strategy._psm_data['trainingloss'] == single._psm_data['trainingloss']
+        assert strategy._psm_data['lossquantiles'] == single._psm_data['lossquantiles']
+        assert strategy._psm_data['state'] == single._psm_data['state']
+    # the run went past the first rung, through promotions decided on both paths
+    assert len(single._psm_data['trainingloss']) > 16 * 2
+
+
+class RunExpDriver(object):
+    "A driver without `run_exps`, that changes the hyperparams it is given"
+    def __init__(self, interface):
+        self.calls = []
+        interface.register_driver(self)
+
+    def run_exp(self, exp_id, end_epoch, hyperparams):
+        self.calls.append((exp_id, end_epoch, dict(hyperparams['hyperparams'])))
+        hyperparams['hyperparams']['learning_rate'] = None
+
+
+class RunExpsDriver(RunExpDriver):
+    def run_exps(self, batch):
+        for args in batch:
+            self.run_exp(*args)
+
+
+class ActionLogger(MemoryLogger):
+    "Also keeps the logged actions themselves"
+    def __init__(self):
+        super().__init__()
+        self.actions = []
+
+    def logAction(self, action):
+        super().logAction(action)
+        self.actions.append(action)
+
+
+@pytest.mark.parametrize('driver_cls', [RunExpDriver, RunExpsDriver])
+def test_drivers_get_copies_of_the_logged_batch(driver_cls):
+    logger = ActionLogger()
+    interf = Interface()
+    driver = driver_cls(interf)
+    for name, data in [('ReceiveRandomSearchHyperparams', {'num_exp': 4, 'epoch': 2}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = SuccessiveHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+
+    batch = logger.actions[-1].data['batch']
+    # one call per experiment, in batch order, whichever method the driver has
+    assert driver.calls == [(data['exp_id'], data['end_epoch'], data['hyperparams']) for data in batch]
+    # changes of the driver reach neither the logged action nor each other
+    assert all(data['hyperparams']['learning_rate'] is not None for data in batch)
+    assert all(0.001 <= lr <= 0.01 for _, _, h in driver.calls for lr in [h['learning_rate']])
@@ -10,54 +10,132 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import copy
-from functools import partial
+import time
 
 from psm import PersistentStateMachine
 from psm.components import Action, CounterAction, EnterState, Trigger
 
+from gbstrategy.components.actions import KillExp, RunExp, RunExps
+from gbstrategy.components.triggers import Dispatch, Snapshot
+from gbstrategy.datastructures import EpochQuantiles, SearchSpace
+
 
 class StrategyMachineFactory(object):
-    def __init__(self, strategy, logger, interface):
+    """Build (or recover) the persistent state machine of a strategy.
+
+    With `snapshot_every` (number of triggers) and/or `snapshot_interval`
+    (seconds) set, a `Snapshot` of the current state and `_psm_data` is logged
+    periodically. Loggers with a `recover()` method (`MemoryLogger`,
+    `MmapLogger`) recover a strategy from their last snapshot and the records
+    after it, which never re-runs action issuers (they may draw random
+    exp_ids); other loggers, such as psm's `MockLogger`, are replayed from the
+    start with `srp`.
+
+    With `max_concurrent` set, at most that many experiments are dispatched to
+    the driver at a time; see `Strategy._psm_dispatch`.
+
+    With a `StrategyProfiler` as `profiler`, the time spent in triggers,
+    conditions, action issuers and driver calls is recorded.
+    """
+    def __init__(self, strategy, logger, interface, snapshot_every=None, snapshot_interval=None,
+                 max_concurrent=None, profiler=None):
         self._psm = None
+        self._stale = True
         self.strategy = strategy
         self.logger = logger
         self.interface = interface
+        self.max_concurrent = max_concurrent
+        self.profiler = profiler
+
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self._triggers_since_snapshot = 0
+        self._last_snapshot_time = time.time()
+
+    def current_psm(self):
+        """Return the live machine, rebuilding it from the log only when needed.
+
+        The machine and `strategy._psm_data` are kept in memory between ticks, so
+        the full `srp` replay of the log only happens for a fresh factory (i.e.
+        after a process restart) or after `invalidate` was called.
+        """
+        if self._psm is None or self._stale or self.interface.strategy is not self.strategy:
+            return self.generate_psm()
+        return self._psm
+
+    def release(self):
+        "Forget the machine, e.g. before dropping the strategy; the next access rebuilds it"
+        self._psm = None
+        self._stale = True
+
+    def invalidate(self):
+        "Mark the in-memory machine as untrusted so the next access rebuilds it from the log"
+        self._stale = True
+
+    def snapshot(self):
+        "Log a snapshot of the current state name and `_psm_data` and return it"
+        snapshot = Snapshot.of(self.strategy.state, self.strategy._psm_data)
+        snapshot.log(self.logger)
+        self._triggers_since_snapshot = 0
+        self._last_snapshot_time = time.time()
+        return snapshot
+
+    def snapshot_due(self):
+        if self.snapshot_every is not None and \
+           self._triggers_since_snapshot >= self.snapshot_every:
+            return True
+        if self.snapshot_interval is not None and \
+           time.time() - self._last_snapshot_time >= self.snapshot_interval:
+            return True
+        return False
+
+    def compact_log(self, logger):
+        """Start the empty `logger` with a snapshot of the current state.
+
+        The old log can be dropped afterwards; the factory switches to `logger`
+        and the machine is recovered from it, so `logger` has to recover from
+        snapshots (e.g. `MemoryLogger`, `MmapLogger`).
+        """
+        if not hasattr(logger, 'recover'):
+            raise ValueError('{} cannot recover from a snapshot'.format(type(logger).__name__))
+        self.current_psm()
+        self.snapshot().log(logger)
+        self.logger = logger
+        return self.generate_psm()
 
     def generate_psm(self):
         if self.logger.empty():
             state = 'Init'
-            EnterState.logInit(self.logger)
+            self.strategy._psm_data = {'state':{}}
+            if hasattr(self.logger, 'logInit'):
+                self.logger.logInit()
+            else:
+                EnterState.logInit(self.logger)
+        elif hasattr(self.logger, 'recover'):
+            state, self.strategy._psm_data, self._triggers_since_snapshot = self.logger.recover()
         else:
             state, trigger, data = PersistentStateMachine.srp(self.interface, self.logger)
             state = state.name
             self.strategy._psm_data = data
-            # print(state, trigger, data)
+            # the whole log was aggregated, a snapshot would not shorten that
+            self._triggers_since_snapshot = 0
+        self.strategy._psm_keep_loss_quantiles()
 
         # register interface
         self.interface.register_strategy(self.strategy, self)
+        self.strategy._psm_factory = self
 
-        tmp_transition = copy.deepcopy(self.strategy._psm_transitions)
-        for idx, t in enumerate(self.strategy._psm_transitions):
-            # register triggers
-            trigger_func_name = self.strategy.helper_register_trigger(t['trigger'], idx, self.logger)
-            tmp_transition[idx]['trigger'] = t['trigger'].name
-            tmp_transition[idx]['prepare'] = trigger_func_name
-
-            # register action issuers and add transition
-            act_issuer_name = self.strategy.helper_register_action_issuer(t['before'], idx, self.interface, self.logger)
-            tmp_transition[idx]['before'] = act_issuer_name
-
-        logEnterState_withdata = partial(self.logger.logEnterState,
-                                         self.strategy.get_state_data)
-        self._psm = PersistentStateMachine(model=self.strategy,
-                                           states=self.strategy._psm_states,
-                                           after_state_change=logEnterState_withdata,
-                                           initial=state,
-                                           send_event=True,
-                                           transitions=tmp_transition,
-                                           # ignore_invalid_triggers=True,
-                                          )
+        # bind the strategy to the machine compiled once for its class. The bound
+        # trigger methods are all a strategy needs, so it is taken off the machine's
+        # model list again, which would otherwise keep every strategy ever built alive
+        self._psm = self.strategy._psm_compile()
+        if self.strategy.__dict__.get('_psm_bound'):
+            self._psm.set_state(state, model=self.strategy)
+        else:
+            self._psm.add_model(self.strategy, initial=state)
+            self._psm.models.remove(self.strategy)
+            self.strategy._psm_bound = True
+        self._stale = False
         return self._psm
 
 
@@ -66,38 +144,215 @@ class Strategy(object):
     _psm_transitions = []
     _psm_states = []
     _psm_data = {'state':{}}
+    # how new configurations cover the search space, one of `SearchSpace.SAMPLERS`
+    sampler = 'random'
+    # `numpy.random.RandomState` new configurations are drawn with, None for the global one
+    rng = None
+    # quantile of the per-epoch `EpochQuantiles` kept in `_psm_data['lossquantiles']`, None for none
+    loss_quantile = None
 
     def get_state_data(self):
         return self._psm_data['state']
 
+    def sample_hyperparams(self, num):
+        "`num` configurations of the search space received with `ReceiveHyperparams`"
+        return SearchSpace(self._psm_data['hyperparams']).sample(num, self.sampler, self.rng)
+
+    def _psm_keep_loss_quantiles(self):
+        """Start `_psm_data['lossquantiles']` if the strategy keeps them and they are missing.
+
+        Loss triggers only update quantiles that exist, so a log replayed with
+        `srp` has none; they are rebuilt from the `LossStore`, whose rows are in
+        arrival order like the updates of the live strategy were.
+        """
+        if self.loss_quantile is None or 'lossquantiles' in self._psm_data:
+            return
+        quantiles = self._psm_data['lossquantiles'] = EpochQuantiles(self.loss_quantile)
+        store = self._psm_data.get('trainingloss')
+        if store is not None:
+            columns = store.columns()
+            quantiles.extend(columns['epoch'].tolist(), columns['loss_value'].tolist())
+
     def issue_actions(self, actions):
+        factory = self._psm_factory
+        for a in self._psm_dispatch(actions):
+            a.issue(factory.interface, factory.logger)
+
+    def _psm_dispatch(self, actions, release=()):
+        """Apply the `max_concurrent` budget of the factory to `actions`.
+
+        The data of `RunExp` and `RunExps` actions goes to a queue in
+        `_psm_data['dispatch']`, and `KillExp` actions free slots, through one
+        logged `Dispatch` change; see there for the order. As much of the
+        queue as the budget allows is returned as one `RunExps`, other actions
+        pass through.
+        """
+        factory = self._psm_factory
+        if factory.max_concurrent is None:
+            return actions
+        passed = []
+        changes = []
         for a in actions:
-            a.issue(self.interface, self.logger)
+            if isinstance(a, RunExp):
+                changes.append(['run', a.data])
+            elif isinstance(a, RunExps):
+                changes.extend(['run', data] for data in a.data['batch'])
+            else:
+                if isinstance(a, KillExp):
+                    changes.append(['kill', a.data['exp_id']])
+                passed.append(a)
+        if not changes and not release:
+            # nothing was queued or freed, so nothing can start either
+            return passed
+
+        change = Dispatch()
+        change.store({
+            'release': list(release),
+            'actions': changes,
+            'limit'  : factory.max_concurrent,
+        })
+        change.log(factory.logger)
+        batch = change.apply(self._psm_data)
+        if batch:
+            passed.append(RunExps(data={'batch': batch}))
+        return passed
+
+    def _psm_release(self, eventdata):
+        "Free the slots of experiments that reported their end epoch and dispatch queued work"
+        factory = self._psm_factory
+        if factory.max_concurrent is None or eventdata.error is not None:
+            return
+        dispatch = self._psm_data.get('dispatch')
+        if dispatch is None:
+            return
+        if eventdata.event.name == 'ReceiveTrainingLoss':
+            records = [eventdata.kwargs]
+        elif eventdata.event.name == 'ReceiveTrainingLosses':
+            records = eventdata.kwargs['records']
+        else:
+            return
+
+        running = dispatch['running']
+        release = []
+        for record in records:
+            end_epoch = running.get(record['exp_id'])
+            if end_epoch is not None and record['epoch'] >= end_epoch and record['exp_id'] not in release:
+                release.append(record['exp_id'])
+        if not release:
+            return
+        try:
+            for a in self._psm_dispatch([], release):
+                a.issue(factory.interface, factory.logger)
+        except Exception:
+            # transitions only logs errors of finalize callbacks
+            factory.invalidate()
+            raise
+
+    @classmethod
+    def _psm_compile(cls):
+        """Return the machine shared by all instances of this class.
+
+        The transition table, trigger functions and action issuers only depend
+        on the class, so they are compiled on first use and instances are
+        attached to the machine as models.
+        """
+        machine = cls.__dict__.get('_psm_machine')
+        if machine is not None:
+            return machine
+
+        tmp_transition = []
+        for idx, t in enumerate(cls._psm_transitions):
+            t = dict(t)
+            # register triggers
+            trigger_func_name = cls.helper_register_trigger(t['trigger'], idx)
+            t['prepare'] = trigger_func_name
+            t['trigger'] = t['trigger'].name
+
+            # register action issuers and add transition
+            t['before'] = cls.helper_register_action_issuer(t['before'], idx,
+                                                            '{}->{}'.format(t['source'], t['dest']))
+
+            # register conditions given by method name
+            if isinstance(t.get('conditions'), str):
+                t['conditions'] = cls.helper_register_condition(t['conditions'], idx)
+            tmp_transition.append(t)
 
-    def helper_register_trigger(self, trigger, idx, logger):
-        def get_trigger_func(trigger):
-            def func(self, eventdata):
+        machine = PersistentStateMachine(model=[],
+                                         states=cls._psm_states,
+                                         after_state_change='_psm_log_enter_state',
+                                         finalize_event='_psm_release',
+                                         initial=cls._psm_states[0],
+                                         send_event=True,
+                                         transitions=tmp_transition,
+                                         # ignore_invalid_triggers=True,
+                                        )
+        cls._psm_machine = machine
+        return machine
+
+    def _psm_log_enter_state(self, eventdata):
+        factory = self._psm_factory
+        factory.logger.logEnterState(self.get_state_data, eventdata)
+
+    @classmethod
+    def helper_register_trigger(cls, trigger, idx):
+        def func(self, eventdata):
+            factory = self._psm_factory
+            if factory.snapshot_due():
+                factory.snapshot()
+            profiler = factory.profiler
+            if profiler is None:
                 trigger.store(eventdata.kwargs)
-                trigger.log(logger)
+                trigger.log(factory.logger)
+                factory._triggers_since_snapshot += 1
                 trigger.aggregate_data(self._psm_data)
-            return func
+                return
+
+            start = profiler.clock()
+            trigger.store(eventdata.kwargs)
+            trigger.log(factory.logger)
+            factory._triggers_since_snapshot += 1
+            logged = profiler.clock()
+            trigger.aggregate_data(self._psm_data)
+            profiler.observe_trigger(self.__class__.__name__, trigger.name,
+                                     logged - start, profiler.clock() - logged)
 
-        # Use partial to add trigger function to strategy instance as bound method
-        func_trigger = partial(get_trigger_func(trigger), self)
         func_name = '_{}_{}'.format(trigger.__class__.__name__, idx)
-        setattr(self, func_name, func_trigger)
+        setattr(cls, func_name, func)
         return func_name
 
-    def helper_register_action_issuer(self, act_issuer_name, idx, interf, logger):
-        def get_func_act():
-            act_issuer = getattr(self, act_issuer_name)
-            def func(newself, eventdata):
-                actions = act_issuer(eventdata)
-                for a in actions:
-                    a.issue(interf, logger)
-            return func
-
-        func_act = partial(get_func_act(), self)
-        act_issuer_name = act_issuer_name + '_{}'.format(idx)
-        setattr(self, act_issuer_name, func_act)
-        return act_issuer_name
+    @classmethod
+    def helper_register_action_issuer(cls, act_issuer_name, idx, label=None):
+        label = label or act_issuer_name
+
+        def func(self, eventdata):
+            profiler = self._psm_factory.profiler
+            if profiler is None:
+                self.issue_actions(getattr(self, act_issuer_name)(eventdata))
+                return
+
+            start = profiler.clock()
+            actions = getattr(self, act_issuer_name)(eventdata)
+            issued = profiler.clock()
+            self.issue_actions(actions)
+            profiler.observe_transition(self.__class__.__name__, label, eventdata.event.name,
+                                        issued - start, profiler.clock() - issued, actions)
+
+        func_name = act_issuer_name + '_{}'.format(idx)
+        setattr(cls, func_name, func)
+        return func_name
+
+    @classmethod
+    def helper_register_condition(cls, cond_name, idx):
+        def func(self, eventdata):
+            profiler = self._psm_factory.profiler
+            if profiler is None:
+                return getattr(self, cond_name)(eventdata)
+
+            start = profiler.clock()
+            result = getattr(self, cond_name)(eventdata)
+            profiler.observe_condition(self.__class__.__name__, cond_name, profiler.clock() - start)
+            return result
+
+        func_name = cond_name + '_cond_{}'.format(idx)
+        setattr(cls, func_name, func)
+        return func_name
@@ -0,0 +1,238 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import gc
+import random
+
+import numpy
+import pytest
+from psm.logger import MockLogger
+
+from gbstrategy import (AsyncSuccessiveHalvingStrategy, HyperbandStrategy, MedianStoppingStrategy,
+                        SuccessiveHalvingStrategy, TPEStrategy,
+                       )
+from gbstrategy.components.triggers import Dispatch, Snapshot
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, MemoryLogger, StrategyMachineFactory
+from gbstrategy.datastructures import LossStore
+
+
+LEARNING_RATE = ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})
+
+CASES = [
+    (SuccessiveHalvingStrategy, ('ReceiveRandomSearchHyperparams', {'num_exp': 16, 'epoch': 2})),
+    (AsyncSuccessiveHalvingStrategy, ('ReceiveAsyncHalvingHyperparams',
+                                      {'num_workers': 4, 'num_exp': 16, 'epoch': 2,
+                                       'max_epoch': 16, 'eta': 2})),
+    (HyperbandStrategy, ('ReceiveHyperbandHyperparams',
+                         {'max_epoch': 9, 'eta': 3, 'num_brackets': 2})),
+    (MedianStoppingStrategy, ('ReceiveEarlyStoppingHyperparams',
+                              {'num_exp': 16, 'min_epoch': 2, 'max_epoch': 8})),
+    (TPEStrategy, ('ReceiveTPEHyperparams', {'num_workers': 4, 'num_exp': 16, 'epoch': 4})),
+]
+
+
+def start(strategy_cls, trigger, logger, **factory_kwargs):
+    random.seed(0)
+    numpy.random.seed(0)
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    for name, data in [trigger, LEARNING_RATE]:
+        strategy = strategy_cls()
+        StrategyMachineFactory(strategy, logger, interf, **factory_kwargs).generate_psm()
+        strategy.trigger(name, **data)
+    return interf, driver
+
+
+def recover(strategy_cls, logger):
+    strategy = strategy_cls()
+    StrategyMachineFactory(strategy, logger, Interface()).generate_psm()
+    return strategy
+
+
+def assert_same(recovered, live):
+    assert recovered.state == live.state
+    assert recovered._psm_data == live._psm_data
+
+
+@pytest.mark.parametrize('strategy_cls,trigger', CASES)
+@pytest.mark.parametrize('logger_cls,snapshot_every', [
+    (MockLogger, None),
+    (MockLogger, 7),
+    (MemoryLogger, None),
+    (MemoryLogger, 7),
+])
+def test_recovery_matches_live_run(strategy_cls, trigger, logger_cls, snapshot_every):
+    logger = logger_cls()
+    interf, driver = start(strategy_cls, trigger, logger, snapshot_every=snapshot_every)
+    ticks = 0
+    while driver.num_running():
+        interf.next_time_point()
+        ticks += 1
+        if ticks % 25 == 0:
+            assert_same(recover(strategy_cls, logger), interf.strategy)
+    assert_same(recover(strategy_cls, logger), interf.strategy)
+
+
+@pytest.mark.parametrize('strategy_cls,trigger', CASES)
+def test_only_strategies_that_ask_keep_loss_quantiles(strategy_cls, trigger):
+    interf, driver = start(strategy_cls, trigger, MockLogger())
+    while driver.num_running():
+        interf.next_time_point()
+    quantiles = interf.strategy._psm_data.get('lossquantiles')
+    if strategy_cls.loss_quantile is None:
+        assert quantiles is None
+    else:
+        store = interf.strategy._psm_data['trainingloss']
+        assert quantiles.p == strategy_cls.loss_quantile
+        assert all(quantiles.count(epoch) == store.num_reports(epoch) for epoch in store.epochs())
+
+
+@pytest.mark.parametrize('strategy_cls,trigger', CASES)
+@pytest.mark.parametrize('logger_cls', [MockLogger, MemoryLogger])
+def test_run_continues_on_compacted_log(strategy_cls, trigger, logger_cls):
+    interf, driver = start(strategy_cls, trigger, logger_cls())
+    for _ in range(30):
+        interf.next_time_point()
+    with pytest.raises(ValueError):
+        interf.factory.compact_log(MockLogger())
+    logger = MemoryLogger()
+    interf.factory.compact_log(logger)
+    assert_same(recover(strategy_cls, logger), interf.strategy)
+
+    while driver.num_running():
+        interf.next_time_point()
+    assert_same(recover(strategy_cls, logger), interf.strategy)
+
+
+def test_memory_logger_only_aggregates_records_after_the_last_snapshot(monkeypatch):
+    logger = MemoryLogger()
+    interf, driver = start(SuccessiveHalvingStrategy, CASES[0][1], logger, snapshot_every=10)
+    for _ in range(40):
+        interf.next_time_point()
+    triggers = logger._find_all_triggers()
+    last = max(idx for idx, t in enumerate(triggers) if isinstance(t, Snapshot))
+
+    aggregated = []
+    def aggregate(self, data, aggregate=Snapshot.aggregate_data):
+        aggregated.append(self)
+        return aggregate(self, data)
+    monkeypatch.setattr(Snapshot, 'aggregate_data', aggregate)
+    strategy = recover(SuccessiveHalvingStrategy, logger)
+    assert len(aggregated) == 1
+    assert strategy._psm_factory._triggers_since_snapshot == len(triggers) - last - 1
+    assert_same(strategy, interf.strategy)
+
+
+def test_snapshots_share_the_logged_loss_rows():
+    logger = MemoryLogger()
+    interf, driver = start(SuccessiveHalvingStrategy, CASES[0][1], logger, snapshot_every=10)
+    for _ in range(40):
+        interf.next_time_point()
+    snapshots = [t for t in logger._find_all_triggers() if isinstance(t, Snapshot)]
+    first, last = snapshots[0].data['columns'], snapshots[-1].data['columns']
+    store = interf.strategy._psm_data['trainingloss']
+    assert len(first['trainingloss']['epoch']) < len(last['trainingloss']['epoch']) <= len(store)
+    # the columns are views of the store's rows, not copies
+    assert numpy.shares_memory(last['trainingloss']['loss_value'], store.columns()['loss_value'])
+
+
+def test_rebuilt_machines_do_not_keep_strategies_alive():
+    logger = MockLogger()
+    interf, driver = start(SuccessiveHalvingStrategy, CASES[0][1], logger)
+    for _ in range(20):
+        interf.factory.invalidate()
+        interf.next_time_point()
+    gc.collect()
+    alive = [o for o in gc.get_objects() if isinstance(o, SuccessiveHalvingStrategy)]
+    assert alive == [interf.strategy]
+
+
+def job(exp_id, end_epoch):
+    return {'exp_id': exp_id, 'end_epoch': end_epoch, 'hyperparams': {'learning_rate': 0.005}}
+
+
+def apply_dispatch(data, release=(), actions=(), limit=2):
+    change = Dispatch()
+    change.store({'release': list(release), 'actions': list(actions), 'limit': limit})
+    return [(item['exp_id'], item['end_epoch']) for item in change.apply(data)]
+
+
+def test_dispatch_queue_order():
+    data = {'trainingloss': LossStore()}
+    data['trainingloss'].append('p', 2, 'loss', 0.1)
+    assert apply_dispatch(data, actions=[['run', job(exp_id, 2)] for exp_id in 'abc']) == [('a', 2), ('b', 2)]
+    # extensions of running experiments go first and need no slot, then promotions, then new ones
+    assert apply_dispatch(data, actions=[['run', job('d', 2)], ['run', job('p', 4)],
+                                         ['run', job('a', 4)]]) == [('a', 4)]
+    assert apply_dispatch(data, release=['b']) == [('p', 4)]
+    # a kill frees the slot of a running experiment and drops queued work
+    assert apply_dispatch(data, actions=[['kill', 'a'], ['kill', 'd']]) == [('c', 2)]
+    assert apply_dispatch(data, release=['p', 'c']) == []
+    assert data['dispatch']['queue'] == [] and data['dispatch']['running'] == {}
+
+
+class RecordingDriver(object):
+    def __init__(self, interface):
+        self.jobs = []
+        interface.register_driver(self)
+
+    def run_exps(self, batch):
+        self.jobs.extend((exp_id, end_epoch) for exp_id, end_epoch, _ in batch)
+
+
+class EnterCountingLogger(MemoryLogger):
+    def __init__(self):
+        super().__init__()
+        self.entered = 0
+
+    def logEnterState(self, get_state_data, event):
+        super().logEnterState(get_state_data, event)
+        self.entered += 1
+
+
+@pytest.mark.parametrize('recover_cls', [MockLogger, MemoryLogger])
+def test_dispatch_releases_slots_and_is_recovered(recover_cls):
+    logger = EnterCountingLogger() if recover_cls is MemoryLogger else MockLogger()
+    interf = Interface()
+    driver = RecordingDriver(interf)
+    for name, data in [('ReceiveRandomSearchHyperparams', {'num_exp': 4, 'epoch': 2}), LEARNING_RATE]:
+        strategy = SuccessiveHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, interf, max_concurrent=2).generate_psm()
+        strategy.trigger(name, **data)
+    a, b = [exp_id for exp_id, _ in driver.jobs]
+
+    def upload(exp_id, loss):
+        for epoch in (1, 2):
+            interf.upload_training_loss(exp_id, epoch, 'loss', loss)
+        recovered = recover(SuccessiveHalvingStrategy, logger)
+        assert_same(recovered, interf.strategy)
+        assert 'dispatch' not in recovered._psm_data['state']
+
+    entered = getattr(logger, 'entered', None)
+    # a finished experiment frees its slot for the next one, outside of any transition
+    upload(a, 0.1)
+    c = driver.jobs[-1][0]
+    assert driver.jobs[2:] == [(c, 2)]
+    upload(b, 0.2)
+    d = driver.jobs[-1][0]
+    assert driver.jobs[3:] == [(d, 2)]
+    if entered is not None:
+        assert logger.entered == entered
+    upload(c, 0.3)
+    # the last report moves on to halving, a and b are promoted; d still holds its slot
+    # while the transition runs, so b starts once d is released
+    upload(d, 0.4)
+    assert driver.jobs[4:] == [(a, 6), (b, 6)]
+    assert interf.strategy._psm_data['dispatch']['running'] == {a: 6, b: 6}
+    if entered is not None:
+        # only the transition to the halving stage entered a state
+        assert logger.entered == entered + 1
@@ -10,10 +10,28 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-from ._demo import DemoDriver, DemoExp
+from ._async import AsyncDemoDriver, AsyncInterface
+
+from ._demo import BatchDemoDriver, DemoDriver, DemoExp
 
 from ._Interface import Interface
 
+from ._memory_logger import MemoryLogger
+
+from ._mmap_logger import MmapLogger
+
 from ._mock_loss import ExampleLoss1, LossFunc
 
+from ._montecarlo import (anytime_curves, comparison_table, format_table, load_results, run_sweep,
+                          run_sweeps,
+                         )
+
+from ._pool import LossFuncTrainer, ProcessPoolDriver
+
+from ._profiling import StrategyProfiler
+
+from ._router import StudyRouter
+
+from ._simulation import ConstantCost, SimulationDriver
+
 from ._Strategy import Strategy, StrategyMachineFactory
@@ -0,0 +1,172 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import asyncio
+
+from ._demo import DemoExp
+from ._Interface import Interface
+
+
+class AsyncInterface(Interface):
+    """`Interface` for asyncio drivers.
+
+    Reports are awaited into a bounded `asyncio.Queue` (`maxsize`), so many
+    workers can report concurrently while producers are slowed down once the
+    strategy falls behind. `serve()` applies the queued triggers to the
+    strategy one at a time, in order; a trigger that raises does not stop it,
+    the error is raised by the next `join()` instead. `run_exp` does not block
+    the transition that issued it: coroutine drivers are scheduled as tasks,
+    which `drain_actions()` awaits.
+    """
+    def __init__(self, maxsize=1024):
+        super().__init__()
+        self.maxsize = maxsize
+        self._queue = None
+        self._pending = set()
+        self._errors = []
+
+    @property
+    def queue(self):
+        # created lazily so that it binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        return self._queue
+
+    def run_exp(self, data):
+        self._schedule(self.driver.run_exp(*self._run_exp_args(data)))
+
+    def run_exps(self, batch):
+        batch = self._run_exps_batch(batch)
+        run_exps = getattr(self.driver, 'run_exps', None)
+        if run_exps is not None:
+            self._schedule(run_exps(batch))
+        else:
+            for args in batch:
+                self._schedule(self.driver.run_exp(*args))
+
+    def kill_exp(self, data):
+        self._schedule(self.driver.kill_exp(data['exp_id']))
+
+    def _schedule(self, result):
+        if asyncio.iscoroutine(result):
+            task = asyncio.ensure_future(result)
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def drain_actions(self):
+        "Wait for the driver calls issued so far"
+        while self._pending:
+            await asyncio.gather(*list(self._pending))
+
+    async def upload_training_loss(self, exp_id, epoch, loss_name, loss_value):
+        data = {
+            'exp_id': exp_id,
+            'epoch' : epoch,
+            'loss_name' : loss_name,
+            'loss_value': loss_value,
+        }
+        await self.queue.put(('ReceiveTrainingLoss', data))
+
+    async def upload_training_losses(self, records):
+        await self.queue.put(('ReceiveTrainingLosses', {'records': list(records)}))
+
+    async def upload_time(self, time):
+        await self.queue.put(('ReceiveTime', {'time': time}))
+
+    async def serve(self):
+        "Apply queued triggers until `close()`"
+        while True:
+            item = await self.queue.get()
+            try:
+                if item is None:
+                    return
+                trigger_name, data = item
+                if trigger_name == 'ReceiveTime':
+                    Interface.upload_time(self, data['time'])
+                elif trigger_name == 'ReceiveTrainingLosses':
+                    Interface.upload_training_losses(self, data['records'])
+                else:
+                    self.factory.current_psm()
+                    self._trigger(trigger_name, data)
+            except Exception as e:
+                # keep serving the other producers, `_trigger` already invalidated
+                # the machine so the next item rebuilds it from the log
+                self._errors.append(e)
+            finally:
+                self.queue.task_done()
+
+    async def join(self):
+        """Wait until every queued trigger was applied and its actions dispatched.
+
+        Raises the first error of a trigger applied since the previous `join()`.
+        """
+        await self.queue.join()
+        await self.drain_actions()
+        if self._errors:
+            error = self._errors[0]
+            self._errors = []
+            raise error
+
+    async def close(self):
+        await self.queue.put(None)
+
+
+class AsyncDemoDriver(object):
+    """asyncio counterpart of `DemoDriver`: every experiment is a task.
+
+    Each running experiment trains one epoch every `epoch_time` seconds and
+    awaits the interface to report its loss, so the experiments report
+    concurrently.
+    """
+    def __init__(self, interface, lossfunc, epoch_time=0.):
+        self.interface = interface
+        self.lossfunc = lossfunc
+        self.epoch_time = epoch_time
+        self.interface.register_driver(self)
+
+        self._exps = {}
+        self._tasks = {}
+
+    def num_running(self):
+        return len(self._tasks)
+
+    async def run_exp(self, exp_id, end_epoch, hyperparams):
+        exp = self._exps.get(exp_id)
+        if exp is None:
+            exp = self._exps[exp_id] = DemoExp(exp_id, self.lossfunc, end_epoch, hyperparams)
+        elif end_epoch < exp.end_epoch:
+            msg = 'The new end_epoch is even smaller than the previous setting for exp <{}>'
+            raise ValueError(msg.format(exp_id))
+        else:
+            exp.end_epoch = end_epoch
+        if exp_id not in self._tasks and not exp.is_finished():
+            self._tasks[exp_id] = asyncio.ensure_future(self._train(exp))
+
+    async def kill_exp(self, exp_id):
+        exp = self._exps.get(exp_id)
+        if exp is not None:
+            exp.kill()
+
+    async def _train(self, exp):
+        try:
+            while not exp.is_finished():
+                await asyncio.sleep(self.epoch_time)
+                epoch, loss = exp.train_epoch()
+                await self.interface.upload_training_loss(exp.exp_id, epoch,
+                                                          self.lossfunc.loss_name, loss)
+        finally:
+            del self._tasks[exp.exp_id]
+
+    async def wait(self):
+        "Wait until no experiment is running anymore"
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()))
@@ -0,0 +1,139 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import asyncio
+import random
+
+import numpy
+import pytest
+from psm.logger import MockLogger
+from transitions import MachineError
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import AsyncDemoDriver, AsyncInterface, ExampleLoss1, Interface, StrategyMachineFactory
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def start(logger, maxsize=4):
+    random.seed(0)
+    numpy.random.seed(0)
+    interf = AsyncInterface(maxsize=maxsize)
+    driver = AsyncDemoDriver(interf, ExampleLoss1())
+    for name, data in [('ReceiveRandomSearchHyperparams', {'num_exp': 8, 'epoch': 2}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = SuccessiveHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, interf).generate_psm()
+        strategy.trigger(name, **data)
+    return interf, driver
+
+
+async def finish(interf, driver):
+    "Run the search to its end, returning the errors `join()` raised"
+    errors = []
+    while True:
+        await interf.drain_actions()
+        await driver.wait()
+        try:
+            await interf.join()
+        except Exception as e:
+            errors.append(e)
+        if not driver.num_running():
+            return errors
+
+
+def assert_recovers(logger, live):
+    strategy = SuccessiveHalvingStrategy()
+    StrategyMachineFactory(strategy, logger, Interface()).generate_psm()
+    assert strategy.state == live.state
+    assert strategy._psm_data == live._psm_data
+
+
+def serve_search(logger):
+    async def main():
+        interf, driver = start(logger)
+        server = asyncio.ensure_future(interf.serve())
+        assert await finish(interf, driver) == []
+        await interf.close()
+        await server
+        return interf
+    return run(main())
+
+
+def test_serve_matches_the_log():
+    logger = MockLogger()
+    interf = serve_search(logger)
+    assert interf.strategy.state == 'HalvingStage'
+    assert_recovers(logger, interf.strategy)
+
+
+def test_raising_trigger_does_not_stop_serving():
+    logger = MockLogger()
+
+    async def main():
+        interf, driver = start(logger, maxsize=1)
+        server = asyncio.ensure_future(interf.serve())
+        # not a valid trigger once the hyperparams are set
+        await interf.queue.put(('ReceiveHyperparams', {'learning_rate': [0.1, 0.2]}))
+        errors = await finish(interf, driver)
+        await interf.close()
+        await server
+        return interf, errors
+
+    interf, errors = run(main())
+    assert len(errors) == 1 and isinstance(errors[0], MachineError)
+    # the search went on as if the trigger was never sent
+    expected = serve_search(MockLogger()).strategy._psm_data['trainingloss']
+    assert len(interf.strategy._psm_data['trainingloss']) == len(expected)
+    assert_recovers(logger, interf.strategy)
+
+
+def test_upload_training_losses_is_applied():
+    logger = MockLogger()
+
+    async def main():
+        interf, driver = start(logger)
+        server = asyncio.ensure_future(interf.serve())
+        await interf.upload_training_losses([
+            {'exp_id': 'x', 'epoch': 1, 'loss_name': 'loss', 'loss_value': 1.},
+            {'exp_id': 'y', 'epoch': 1, 'loss_name': 'loss', 'loss_value': 2.},
+        ])
+        await finish(interf, driver)
+        await interf.close()
+        await server
+        return interf
+
+    interf = run(main())
+    store = interf.strategy._psm_data['trainingloss']
+    assert list(store.history('x')[1]) == [1.]
+    assert list(store.history('y')[1]) == [2.]
+
+
+def test_join_raises_each_error_once():
+    async def main():
+        interf, driver = start(MockLogger())
+        server = asyncio.ensure_future(interf.serve())
+        await interf.queue.put(('ReceiveHyperparams', {'learning_rate': [0.1, 0.2]}))
+        with pytest.raises(MachineError):
+            await interf.join()
+        await interf.join()
+        await finish(interf, driver)
+        await interf.close()
+        await server
+
+    run(main())
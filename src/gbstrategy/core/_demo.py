@@ -12,44 +12,197 @@
 
 import random
 
+import numpy
+
 
 class DemoDriver(object):
+    """Run one epoch of a randomly chosen unfinished experiment per `next()`.
+
+    Experiments are indexed by exp_id. Unfinished ones are also kept in an
+    active list (with their positions) for O(1) random choice and removal;
+    finished ones are moved to an archive, where a later `run_exp` can revive
+    them, until `drop_finished` hands the archive back to the caller.
+    """
     def __init__(self, interface, lossfunc):
         self.interface = interface
         self.lossfunc = lossfunc
         self.interface.register_driver(self)
 
-        self._running_exps = []
+        self._exps = {}
+        self._active = []
+        self._active_pos = {}
+        self._finished = {}
+        self._dropped = {}
 
     def next(self):
-        not_finished_exps = [i for i in self._running_exps if not i.is_finished()]
-        if not_finished_exps:
-            i = random.choice(not_finished_exps)
-            i.upload_training_loss(self.interface)
+        if self._active:
+            exp = random.choice(self._active)
+            exp.upload_training_loss(self.interface)
+            # the upload may have extended the exp already (e.g. a promotion)
+            if exp.is_finished() and exp.exp_id in self._active_pos:
+                self._deactivate(exp)
+
+    def num_running(self):
+        return len(self._active)
 
     def run_exp(self, exp_id, end_epoch, hyperparams):
         found_exp = self._grab_exp(exp_id)
         if found_exp:
             if end_epoch < found_exp.end_epoch:
                 msg = 'The new end_epoch is even smaller than the previous setting for exp <{}>'
-                msg.format(exp_id)
-                raise ValueError(msg)
+                raise ValueError(msg.format(exp_id))
             else:
                 found_exp.end_epoch = end_epoch
+                if not found_exp.is_finished() and exp_id in self._finished:
+                    del self._finished[exp_id]
+                    self._activate(found_exp)
         else:
             self._register_exp(exp_id, end_epoch, hyperparams)
-    
+
+    def run_exps(self, batch):
+        for exp_id, end_epoch, hyperparams in batch:
+            self.run_exp(exp_id, end_epoch, hyperparams)
+
+    def kill_exp(self, exp_id):
+        exp = self._grab_exp(exp_id)
+        if exp is None:
+            return
+        exp.kill()
+        if exp_id in self._active_pos:
+            self._deactivate(exp)
+
+    def drop_finished(self):
+        """Forget the finished experiments and return them, e.g. to spill them to disk.
+
+        A dropped experiment that is run again starts over from epoch 0 with
+        its first hyperparams, which are kept: strategies only send
+        placeholders when they extend an experiment.
+        """
+        finished = self._finished
+        self._finished = {}
+        for exp_id, exp in finished.items():
+            del self._exps[exp_id]
+            self._dropped[exp_id] = exp.hyperparams
+        return finished
+
     def _register_exp(self, exp_id, end_epoch, hyperparams):
+        hyperparams = self._dropped.pop(exp_id, hyperparams)
         exp = DemoExp(exp_id, self.lossfunc, end_epoch, hyperparams)
-        self._running_exps.append(exp)
+        self._exps[exp_id] = exp
+        if exp.is_finished():
+            self._finished[exp_id] = exp
+        else:
+            self._activate(exp)
 
     def _grab_exp(self, exp_id):
-        _running_exps_id = [exp.exp_id for exp in self._running_exps]
-        if exp_id not in _running_exps_id:
-            return None
+        return self._exps.get(exp_id)
+
+    def _activate(self, exp):
+        self._active_pos[exp.exp_id] = len(self._active)
+        self._active.append(exp)
+
+    def _deactivate(self, exp):
+        idx = self._active_pos.pop(exp.exp_id)
+        last = self._active.pop()
+        if last is not exp:
+            self._active[idx] = last
+            self._active_pos[last.exp_id] = idx
+        self._finished[exp.exp_id] = exp
+
+
+class BatchDemoDriver(object):
+    """Vectorized counterpart of `DemoDriver`.
+
+    Running experiments live in numpy arrays (current epoch, end epoch,
+    hyperparams) and every `next()` advances up to `batch_size` randomly chosen
+    unfinished experiments (all of them if None) by one epoch, evaluating their
+    losses with a single `lossfunc.epoch_loss_batch` call and reporting them
+    with a single `upload_training_losses`.
+    """
+    def __init__(self, interface, lossfunc, batch_size=None, capacity=1024):
+        self.interface = interface
+        self.lossfunc = lossfunc
+        self.batch_size = batch_size
+        self.interface.register_driver(self)
+
+        self._size = 0
+        self._exp_ids = []
+        self._rows = {}
+        self._curr_epoch = numpy.zeros(capacity, dtype=numpy.int64)
+        self._end_epoch = numpy.zeros(capacity, dtype=numpy.int64)
+        self._hyperparams = numpy.zeros((capacity, lossfunc.dim), dtype=numpy.float64)
+
+    def num_running(self):
+        return int(numpy.count_nonzero(self._curr_epoch[:self._size] < self._end_epoch[:self._size]))
+
+    def next(self):
+        size = self._size
+        rows = numpy.flatnonzero(self._curr_epoch[:size] < self._end_epoch[:size])
+        if not len(rows):
+            return
+        if self.batch_size is not None and len(rows) > self.batch_size:
+            rows = numpy.random.choice(rows, self.batch_size, replace=False)
+
+        self._curr_epoch[rows] += 1
+        epochs = self._curr_epoch[rows]
+        losses = self.lossfunc.epoch_loss_batch(epochs, self._hyperparams[rows])
+        loss_name = self.lossfunc.loss_name
+        self.interface.upload_training_losses([{
+            'exp_id'    : self._exp_ids[row],
+            'epoch'     : epoch,
+            'loss_name' : loss_name,
+            'loss_value': loss,
+        } for row, epoch, loss in zip(rows, epochs.tolist(), losses.tolist())])
+
+    def run_exp(self, exp_id, end_epoch, hyperparams):
+        row = self._rows.get(exp_id)
+        if row is not None:
+            if end_epoch < self._end_epoch[row]:
+                msg = 'The new end_epoch is even smaller than the previous setting for exp <{}>'
+                raise ValueError(msg.format(exp_id))
+            self._end_epoch[row] = end_epoch
         else:
-            idx = _running_exps_id.index(exp_id)
-        return self._running_exps[idx]
+            self._register_exp(exp_id, end_epoch, hyperparams)
+
+    def run_exps(self, batch):
+        new = []
+        for exp_id, end_epoch, hyperparams in batch:
+            if exp_id in self._rows:
+                self.run_exp(exp_id, end_epoch, hyperparams)
+            else:
+                new.append((exp_id, end_epoch, hyperparams))
+        if new:
+            self._register_exps(new)
+
+    def kill_exp(self, exp_id):
+        row = self._rows.get(exp_id)
+        if row is not None:
+            self._end_epoch[row] = self._curr_epoch[row]
+
+    def _register_exp(self, exp_id, end_epoch, hyperparams):
+        self._register_exps([(exp_id, end_epoch, hyperparams)])
+
+    def _register_exps(self, batch):
+        start = self._size
+        size = start + len(batch)
+        capacity = len(self._curr_epoch)
+        if size > capacity:
+            extra = max(size, 2*capacity) - capacity
+            self._curr_epoch = numpy.concatenate([self._curr_epoch, numpy.zeros(extra, dtype=numpy.int64)])
+            self._end_epoch = numpy.concatenate([self._end_epoch, numpy.zeros(extra, dtype=numpy.int64)])
+            self._hyperparams = numpy.concatenate([self._hyperparams,
+                                                   numpy.zeros((extra, self.lossfunc.dim),
+                                                               dtype=self._hyperparams.dtype)])
+        for row, (exp_id, end_epoch, hyperparams) in enumerate(batch, start):
+            self._rows[exp_id] = row
+            self._exp_ids.append(exp_id)
+        self._end_epoch[start:size] = [end_epoch for _, end_epoch, _ in batch]
+        hyperparams = self.lossfunc.hyperparams_array([h for _, _, h in batch])
+        if hyperparams.dtype != self._hyperparams.dtype:
+            # keep values that are not numbers as they are from now on
+            self._hyperparams = self._hyperparams.astype(object)
+        self._hyperparams[start:size] = hyperparams
+        self._size = size
 
 
 class DemoExp(object):
@@ -64,9 +217,16 @@ class DemoExp(object):
     def is_finished(self):
         return self._curr_epoch >= self.end_epoch
 
-    def upload_training_loss(self, interface):
+    def kill(self):
+        self.end_epoch = self._curr_epoch
+
+    def train_epoch(self):
         if self.is_finished():
             raise ValueError('This exp <{}> is finished'.format(self.exp_id))
         self._curr_epoch += 1
-        loss = self.lossfunc.epoch_loss(self._curr_epoch, self.hyperparams)
-        interface.upload_training_loss(self.exp_id, self._curr_epoch, self.lossfunc.loss_name, loss)
+        return self._curr_epoch, self.lossfunc.epoch_loss(self._curr_epoch, self.hyperparams)
+
+    def upload_training_loss(self, interface):
+        epoch, loss = self.train_epoch()
+        interface.upload_training_loss(self.exp_id, epoch, self.lossfunc.loss_name, loss)
+        return loss
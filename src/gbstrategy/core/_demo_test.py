@@ -0,0 +1,94 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import numpy
+import pytest
+
+from gbstrategy.core import DemoDriver, ExampleLoss1
+
+
+class RecordingInterface(object):
+    def __init__(self):
+        self.records = []
+
+    def register_driver(self, driver):
+        self.driver = driver
+
+    def upload_training_loss(self, exp_id, epoch, loss_name, loss_value):
+        self.records.append((exp_id, epoch))
+
+
+def hyperparams(learning_rate):
+    return {'hyperparams': {'learning_rate': learning_rate}}
+
+
+def run(driver):
+    while driver.num_running():
+        driver.next()
+
+
+def test_finished_experiments_are_archived_and_revived():
+    random.seed(0)
+    interf = RecordingInterface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    driver.run_exps([('a', 2, hyperparams(0.001)), ('b', 3, hyperparams(0.01)), ('c', 0, hyperparams(0.005))])
+    # an experiment with nothing to train is archived right away
+    assert driver.num_running() == 2
+    run(driver)
+    assert sorted(interf.records) == [('a', 1), ('a', 2), ('b', 1), ('b', 2), ('b', 3)]
+
+    # a promotion carries placeholder hyperparams, the experiment keeps its own
+    driver.run_exp('a', 4, hyperparams(None))
+    assert driver.num_running() == 1
+    run(driver)
+    assert interf.records[-2:] == [('a', 3), ('a', 4)]
+    assert driver._exps['a'].hyperparams == hyperparams(0.001)
+
+    with pytest.raises(ValueError, match='<a>'):
+        driver.run_exp('a', 3, hyperparams(None))
+
+
+def test_kill_stops_an_experiment():
+    interf = RecordingInterface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    driver.run_exps([('a', 5, hyperparams(0.001)), ('b', 5, hyperparams(0.01))])
+    driver.kill_exp('a')
+    driver.kill_exp('unknown')
+    run(driver)
+    assert interf.records == [('b', epoch) for epoch in range(1, 6)]
+    assert set(driver._finished) == {'a', 'b'}
+
+
+def test_dropped_experiments_restart_with_their_hyperparams():
+    random.seed(0)
+    numpy.random.seed(0)
+    interf = RecordingInterface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    driver.run_exp('a', 2, hyperparams(0.001))
+    run(driver)
+    driver.run_exp('b', 4, hyperparams(0.01))
+    dropped = driver.drop_finished()
+    assert list(dropped) == ['a']
+    assert 'a' not in driver._exps and driver.num_running() == 1
+
+    # promoted after it was dropped: it starts over from epoch 0
+    driver.run_exp('a', 3, hyperparams(None))
+    run(driver)
+    assert [epoch for exp_id, epoch in interf.records if exp_id == 'a'] == [1, 2, 1, 2, 3]
+    assert driver._exps['a'].hyperparams == hyperparams(0.001)
+    # dropped and promoted again, it restarts with the same hyperparams
+    driver.drop_finished()
+    driver.run_exp('a', 4, hyperparams(None))
+    run(driver)
+    assert driver._exps['a'].hyperparams == hyperparams(0.001)
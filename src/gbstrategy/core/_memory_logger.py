@@ -0,0 +1,97 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import copy
+
+from gbstrategy.components.triggers import ReceiveTrainingLoss, ReceiveTrainingLosses, Snapshot
+
+
+_TRIGGER, _ACTION, _ENTER = range(3)
+
+
+class MemoryLogger(object):
+    """In-memory log of a strategy, e.g. for tests, simulations and sweeps.
+
+    Logs the same records as psm's `MockLogger`, and like `MmapLogger` it
+    recovers a strategy itself: `recover()` walks the records backwards to
+    the last `Snapshot`, so it only aggregates what was logged after it.
+    """
+    def __init__(self):
+        self._records = []
+
+    def __len__(self):
+        return len(self._records)
+
+    def empty(self):
+        return not self._records
+
+    def logTrigger(self, trigger):
+        self._records.append((_TRIGGER, type(trigger), _copy(type(trigger), trigger.data)))
+
+    def logAction(self, action):
+        self._records.append((_ACTION, type(action), copy.deepcopy(action.data)))
+
+    def logEnterState(self, get_state_data, event):
+        self._records.append((_ENTER, event.model.state, copy.deepcopy(get_state_data())))
+
+    def logInit(self):
+        self._records.append((_ENTER, 'Init', {}))
+
+    def recover(self):
+        """Recover (state name, psm data, number of triggers since the last snapshot).
+
+        The state and its data come from the last entered state after the
+        snapshot, or from the snapshot when nothing was entered since.
+        """
+        records = self._records
+        entered = None
+        start = 0
+        for idx in range(len(records) - 1, -1, -1):
+            kind, key, data = records[idx]
+            if kind == _ENTER and entered is None:
+                entered = (key, data)
+            elif kind == _TRIGGER and key is Snapshot:
+                start = idx
+                if entered is None:
+                    entered = (data['state'], data['psm_data']['state'])
+                break
+
+        psm_data = {}
+        triggers = 0
+        for kind, key, data in records[start:]:
+            if kind == _TRIGGER:
+                self._trigger(key, _copy(key, data)).aggregate_data(psm_data)
+                triggers += 1
+        state, psm_data['state'] = entered[0], copy.deepcopy(entered[1])
+        return state, psm_data, triggers - (records[start][1] is Snapshot)
+
+    def _find_all_triggers(self):
+        "All logged triggers as objects, like `MockLogger`"
+        return [self._trigger(key, _copy(key, data))
+                for kind, key, data in self._records if kind == _TRIGGER]
+
+    @staticmethod
+    def _trigger(cls, data):
+        trigger = cls()
+        trigger.data = data
+        return trigger
+
+
+def _copy(cls, data):
+    "A copy of trigger data that neither the log nor the strategy can change for the other"
+    if issubclass(cls, ReceiveTrainingLosses):
+        # loss records are read-only
+        return {'records': list(data['records'])}
+    if issubclass(cls, (ReceiveTrainingLoss, Snapshot)):
+        # a snapshot copies its data when it is taken and when it is aggregated
+        return data
+    return copy.deepcopy(data)
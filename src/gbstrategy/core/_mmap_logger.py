@@ -0,0 +1,387 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import mmap
+import os
+
+import numpy
+
+from gbstrategy.components.triggers import (ReceiveTrainingLoss, ReceiveTrainingLosses, Snapshot,
+                                            loss_quantiles,
+                                           )
+from gbstrategy.datastructures import LossRecord, LossStore
+
+from ._payload import decode, encode
+
+
+_LOSS_MAGIC = b'GBSLOSS1'
+_EVENT_MAGIC = b'GBSEVNT2'
+
+# batch: 0 for a `ReceiveTrainingLoss`, else the number of its `ReceiveTrainingLosses`
+_LOSS_RECORD = numpy.dtype([
+    ('exp_id'    , '<i4'),
+    ('loss_name' , '<i4'),
+    ('epoch'     , '<i4'),
+    ('batch'     , '<i4'),
+    ('loss_value', '<f8'),
+])
+
+# loss_pos: number of loss records logged before the event, to merge both files in order
+_EVENT_RECORD = numpy.dtype([
+    ('kind'    , '<i4'),
+    ('symbol'  , '<i4'),
+    ('loss_pos', '<i8'),
+    ('offset'  , '<i8'),
+    ('length'  , '<i8'),
+])
+
+_SYMBOL, _TRIGGER, _ACTION, _ENTER = range(4)
+
+
+class MmapLogger(object):
+    """Append-only binary log of a strategy in the directory `path`.
+
+    Loss reports are fixed-width rows of `losses.bin` (exp_id and loss name as
+    symbol codes); every other trigger, action and entered state is a row of
+    `events.bin` pointing at its data in `payloads.bin`, encoded as JSON plus
+    raw array buffers rather than pickled, so reading a log never runs code
+    from it. Symbols (exp_ids, loss names, classes) are logged once as events
+    as well.
+
+    Reading maps the files with `mmap`: `empty()` only looks at file sizes,
+    `loss_columns()` are views of the mapped rows, and `recover()` aggregates
+    the loss rows in bulk, so reopening costs O(symbols) and recovery
+    O(records since the last `Snapshot`). The loss store of a snapshot is
+    only written out when the loss rows of the log do not hold it already
+    (e.g. when compacting); later snapshots refer to those rows instead. Every
+    log call is flushed, a torn row at the end of a file (e.g. after a crash)
+    is cut off when reopening.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._files = {}
+        self._maps = {}
+        for name, magic in [('losses.bin', _LOSS_MAGIC), ('events.bin', _EVENT_MAGIC),
+                            ('payloads.bin', b'')]:
+            fname = os.path.join(path, name)
+            f = open(fname, 'ab')
+            if not f.tell():
+                f.write(magic)
+                f.flush()
+            elif magic:
+                with open(fname, 'rb') as check:
+                    if check.read(len(magic)) != magic:
+                        raise ValueError('{} is not a strategy log'.format(fname))
+            self._files[name] = f
+
+        self._num_losses = self._count('losses.bin', _LOSS_MAGIC, _LOSS_RECORD)
+        self._num_events = self._count('events.bin', _EVENT_MAGIC, _EVENT_RECORD)
+        self._truncate('losses.bin', len(_LOSS_MAGIC) + self._num_losses*_LOSS_RECORD.itemsize)
+        self._truncate('events.bin', len(_EVENT_MAGIC) + self._num_events*_EVENT_RECORD.itemsize)
+        # a payload is written before its event, drop the one of a torn event
+        events = self.events()
+        self._payload_size = int(events[-1]['offset'] + events[-1]['length']) if len(events) else 0
+        self._truncate('payloads.bin', self._payload_size)
+        self._num_batches = 0
+        self._symbols = []
+        self._symbol_codes = {}
+        self._load_symbols()
+        # (event, loss rows, loss_pos) of the snapshot whose loss store was written out
+        self._base = (-1, 0, 0)
+        self._load_base()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def empty(self):
+        return not self._num_losses and not self._num_events
+
+    # writing
+
+    def logTrigger(self, trigger):
+        if isinstance(trigger, ReceiveTrainingLoss):
+            self._log_losses([trigger.data], 0)
+        elif isinstance(trigger, ReceiveTrainingLosses):
+            self._num_batches += 1
+            self._log_losses(trigger.data['records'], self._num_batches)
+        elif isinstance(trigger, Snapshot):
+            self._log_snapshot(trigger)
+        else:
+            self._log_event(_TRIGGER, type(trigger), trigger.data)
+
+    def logAction(self, action):
+        self._log_event(_ACTION, type(action), action.data)
+
+    def logEnterState(self, get_state_data, event):
+        self._log_event(_ENTER, None, (event.model.state, get_state_data()))
+
+    def logInit(self):
+        self._log_event(_ENTER, None, ('Init', {}))
+
+    def _log_losses(self, records, batch):
+        rows = numpy.empty(len(records), dtype=_LOSS_RECORD)
+        rows['exp_id'] = [self._symbol(r['exp_id']) for r in records]
+        rows['loss_name'] = [self._symbol(r['loss_name']) for r in records]
+        rows['epoch'] = [r['epoch'] for r in records]
+        rows['batch'] = batch
+        rows['loss_value'] = [r['loss_value'] for r in records]
+        f = self._files['losses.bin']
+        f.write(rows.tobytes())
+        f.flush()
+        self._num_losses += len(records)
+
+    def _log_snapshot(self, snapshot):
+        key = ReceiveTrainingLoss._psm_data_prefix
+        columns = dict(snapshot.data['columns'])
+        store = columns.get(key)
+        symbol = self._symbol(Snapshot)
+        base, base_rows, base_pos = self._base
+        if store is not None and len(store['epoch']) == base_rows + self._num_losses - base_pos:
+            # the base snapshot and the loss rows after it hold the store already
+            columns[key] = {'base': base}
+        elif store is not None:
+            self._base = (self._num_events, len(store['epoch']), self._num_losses)
+        payload = encode(dict(snapshot.data, columns=columns))
+        self._write_event(_TRIGGER, symbol, payload)
+
+    def _log_event(self, kind, cls, data):
+        symbol = self._symbol(cls) if cls is not None else -1
+        self._write_event(kind, symbol, encode(data))
+
+    def _write_event(self, kind, symbol, payload):
+        f = self._files['payloads.bin']
+        f.write(payload)
+        f.flush()
+        row = numpy.array([(kind, symbol, self._num_losses, self._payload_size, len(payload))],
+                          dtype=_EVENT_RECORD)
+        self._payload_size += len(payload)
+        f = self._files['events.bin']
+        f.write(row.tobytes())
+        f.flush()
+        self._num_events += 1
+
+    def _symbol(self, value):
+        key = (type(value), value)
+        code = self._symbol_codes.get(key)
+        if code is None:
+            code = self._symbol_codes[key] = len(self._symbols)
+            self._symbols.append(value)
+            self._write_event(_SYMBOL, code, encode(value))
+        return code
+
+    # reading
+
+    def loss_rows(self):
+        "Read-only structured view of all loss rows, straight from the mapped file"
+        return self._rows('losses.bin', _LOSS_MAGIC, _LOSS_RECORD, self._num_losses)
+
+    def events(self):
+        return self._rows('events.bin', _EVENT_MAGIC, _EVENT_RECORD, self._num_events)
+
+    def loss_columns(self):
+        """Columns of all loss reports for analytics, without decoding every row.
+
+        exp_id/loss_name are symbol codes, `symbols` decodes them.
+        """
+        rows = self.loss_rows()
+        return {
+            'exp_id'    : rows['exp_id'],
+            'epoch'     : rows['epoch'],
+            'loss_name' : rows['loss_name'],
+            'loss_value': rows['loss_value'],
+        }
+
+    @property
+    def symbols(self):
+        return self._symbols
+
+    def payload(self, event):
+        offset = int(event['offset'])
+        data = self._map('payloads.bin', self._payload_size)
+        return decode(data[offset:offset + int(event['length'])])
+
+    def recover(self):
+        """Recover (state name, psm data, number of triggers since the last snapshot).
+
+        Loss rows are aggregated in bulk, other triggers one by one in log
+        order; the state and its data come from the last entered state after
+        the snapshot, or from the snapshot when nothing was entered since.
+        """
+        events = self.events()
+        triggers = numpy.flatnonzero(events['kind'] == _TRIGGER)
+        enters = numpy.flatnonzero(events['kind'] == _ENTER)
+
+        data = {}
+        state = None
+        pos = 0
+        snapshot_code = self._symbol_codes.get((type(Snapshot), Snapshot))
+        if snapshot_code is not None:
+            snapshots = triggers[events['symbol'][triggers] == snapshot_code]
+            if len(snapshots):
+                snapshot = events[snapshots[-1]]
+                state, data = self._snapshot(snapshot)
+                pos = int(snapshot['loss_pos'])
+                triggers = triggers[triggers > snapshots[-1]]
+                enters = enters[enters > snapshots[-1]]
+
+        batches = self.loss_rows()['batch'][pos:]
+        since_snapshot = len(triggers) + int(numpy.count_nonzero(batches == 0)) + \
+                         int(numpy.count_nonzero(numpy.diff(batches, prepend=0)[batches > 0]))
+        for idx in triggers:
+            event = events[idx]
+            self._aggregate_losses(data, pos, int(event['loss_pos']))
+            pos = int(event['loss_pos'])
+            trigger = self._symbols[event['symbol']]()
+            trigger.data = self.payload(event)
+            trigger.aggregate_data(data)
+        self._aggregate_losses(data, pos, self._num_losses)
+
+        if len(enters):
+            state, data['state'] = self.payload(events[enters[-1]])
+        return state, data, since_snapshot
+
+    def _snapshot(self, event):
+        "(state name, psm data) of a logged snapshot, filling in the loss stores it refers to"
+        trigger = Snapshot()
+        trigger.data = self.payload(event)
+        refs = {key: columns for key, columns in trigger.data['columns'].items() if 'base' in columns}
+        trigger.data['columns'] = {key: columns for key, columns in trigger.data['columns'].items()
+                                   if key not in refs}
+        data = {}
+        trigger.aggregate_data(data)
+        for key, ref in refs.items():
+            base = int(ref['base'])
+            if base < 0:
+                store, start = LossStore(), 0
+            else:
+                base_event = self.events()[base]
+                store = LossStore.from_columns(self.payload(base_event)['columns'][key])
+                start = int(base_event['loss_pos'])
+            rows = self.loss_rows()[start:int(event['loss_pos'])]
+            store.extend_encoded(self._symbols, rows['exp_id'], rows['epoch'],
+                                 self._symbols, rows['loss_name'], rows['loss_value'])
+            data[key] = store
+        return trigger.data['state'], data
+
+    def _load_base(self):
+        snapshot_code = self._symbol_codes.get((type(Snapshot), Snapshot))
+        if snapshot_code is None:
+            return
+        events = self.events()
+        snapshots = numpy.flatnonzero((events['kind'] == _TRIGGER) & (events['symbol'] == snapshot_code))
+        for idx in snapshots[::-1]:
+            store = self.payload(events[idx])['columns'].get(ReceiveTrainingLoss._psm_data_prefix)
+            if store is None:
+                continue
+            base = int(store['base']) if 'base' in store else int(idx)
+            if base >= 0:
+                event = events[base]
+                rows = len(self.payload(event)['columns'][ReceiveTrainingLoss._psm_data_prefix]['epoch'])
+                self._base = (base, rows, int(event['loss_pos']))
+            return
+
+    def _aggregate_losses(self, data, start, stop):
+        if stop <= start:
+            return
+        rows = self.loss_rows()[start:stop]
+        store = data.get(ReceiveTrainingLoss._psm_data_prefix)
+        if store is None:
+            store = data[ReceiveTrainingLoss._psm_data_prefix] = LossStore()
+        store.extend_encoded(self._symbols, rows['exp_id'], rows['epoch'],
+                             self._symbols, rows['loss_name'], rows['loss_value'])
+        quantiles = loss_quantiles(data)
+        if quantiles is not None:
+            quantiles.extend(rows['epoch'].tolist(), rows['loss_value'].tolist())
+
+    def _find_all_triggers(self):
+        "All logged triggers as objects, like `MockLogger` (materializes the whole log)"
+        triggers = []
+        pos = 0
+        events = self.events()
+        for idx in numpy.flatnonzero(events['kind'] == _TRIGGER):
+            event = events[idx]
+            triggers.extend(self._loss_triggers(pos, int(event['loss_pos'])))
+            pos = int(event['loss_pos'])
+            cls = self._symbols[event['symbol']]
+            if cls is Snapshot:
+                trigger = Snapshot.of(*self._snapshot(event))
+            else:
+                trigger = cls()
+                trigger.data = self.payload(event)
+            triggers.append(trigger)
+        triggers.extend(self._loss_triggers(pos, self._num_losses))
+        return triggers
+
+    def _loss_triggers(self, start, stop):
+        symbols = self._symbols
+        triggers = []
+        last_batch = 0
+        for exp_id, loss_name, epoch, batch, loss_value in self.loss_rows()[start:stop].tolist():
+            record = LossRecord(symbols[exp_id], epoch, symbols[loss_name], loss_value)
+            if batch and batch == last_batch:
+                triggers[-1].data['records'].append(record)
+                continue
+            if batch:
+                trigger = ReceiveTrainingLosses()
+                trigger.data = {'records': [record]}
+            else:
+                trigger = ReceiveTrainingLoss()
+                trigger.data = record
+            triggers.append(trigger)
+            last_batch = batch
+        return triggers
+
+    def _load_symbols(self):
+        events = self.events()
+        kinds = events['kind']
+        for idx in numpy.flatnonzero(kinds == _SYMBOL):
+            value = self.payload(events[idx])
+            self._symbol_codes[(type(value), value)] = len(self._symbols)
+            self._symbols.append(value)
+        # batch numbers only have to differ from the batch right before
+        rows = self.loss_rows()
+        self._num_batches = int(rows['batch'][-1]) if len(rows) else 0
+
+    def _count(self, name, magic, dtype):
+        size = os.path.getsize(os.path.join(self.path, name)) - len(magic)
+        return max(size, 0) // dtype.itemsize
+
+    def _truncate(self, name, size):
+        f = self._files[name]
+        if f.tell() > size:
+            f.truncate(size)
+            f.seek(size)
+
+    def _rows(self, name, magic, dtype, count):
+        data = self._map(name, len(magic) + count*dtype.itemsize)
+        if data is None:
+            return numpy.empty(0, dtype=dtype)
+        return numpy.frombuffer(data, dtype=dtype, count=count, offset=len(magic))
+
+    def _map(self, name, size):
+        "A read-only map of the file covering at least `size` bytes, remapped as the file grows"
+        mapped = self._maps.get(name)
+        if mapped is None or len(mapped) < size:
+            if not size:
+                return None
+            with open(os.path.join(self.path, name), 'rb') as f:
+                mapped = self._maps[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped
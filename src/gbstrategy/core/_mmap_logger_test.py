@@ -0,0 +1,108 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import random
+
+import numpy
+import pytest
+
+from gbstrategy import AsyncSuccessiveHalvingStrategy
+from gbstrategy.core import DemoDriver, ExampleLoss1, Interface, MmapLogger, StrategyMachineFactory
+
+
+TRIGGERS = [
+    ('ReceiveAsyncHalvingHyperparams', {'num_workers': 8, 'num_exp': 32, 'epoch': 2,
+                                        'max_epoch': 16, 'eta': 2}),
+    ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]}),
+]
+
+
+def start(logger, **factory_kwargs):
+    random.seed(0)
+    numpy.random.seed(0)
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    for name, data in TRIGGERS:
+        strategy = AsyncSuccessiveHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, interf, **factory_kwargs).generate_psm()
+        strategy.trigger(name, **data)
+    return interf, driver
+
+
+def reopen(interf, path):
+    strategy = AsyncSuccessiveHalvingStrategy()
+    factory = StrategyMachineFactory(strategy, MmapLogger(path), interf)
+    factory.generate_psm()
+    return factory
+
+
+def assert_recovers(path, live):
+    strategy = AsyncSuccessiveHalvingStrategy()
+    StrategyMachineFactory(strategy, MmapLogger(path), Interface()).generate_psm()
+    assert strategy.state == live.state
+    assert strategy._psm_data == live._psm_data
+
+
+@pytest.mark.parametrize('snapshot_every', [None, 7])
+def test_recovery_matches_live_run(tmpdir, snapshot_every):
+    path = str(tmpdir)
+    interf, driver = start(MmapLogger(path), snapshot_every=snapshot_every)
+    ticks = 0
+    while driver.num_running():
+        interf.next_time_point()
+        ticks += 1
+        if ticks % 40 == 0:
+            assert_recovers(path, interf.strategy)
+    assert_recovers(path, interf.strategy)
+
+
+def test_triggers_match_the_logged_ones(tmpdir):
+    path = str(tmpdir)
+    interf, driver = start(MmapLogger(path))
+    while driver.num_running():
+        interf.next_time_point()
+    data = {}
+    for trigger in MmapLogger(path)._find_all_triggers():
+        trigger.aggregate_data(data)
+    assert data['trainingloss'] == interf.strategy._psm_data['trainingloss']
+
+
+@pytest.mark.parametrize('name', ['losses.bin', 'events.bin', 'payloads.bin'])
+def test_torn_row_is_cut_off(tmpdir, name):
+    path = str(tmpdir)
+    logger = MmapLogger(path)
+    interf, driver = start(logger)
+    for _ in range(50):
+        interf.next_time_point()
+    logger.close()
+    with open(os.path.join(path, name), 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    reopen(interf, path)
+    while driver.num_running():
+        interf.next_time_point()
+    assert_recovers(path, interf.strategy)
+
+
+def test_recover_compacted_log(tmpdir):
+    interf, driver = start(MmapLogger(str(tmpdir.mkdir('full'))))
+    for _ in range(50):
+        interf.next_time_point()
+    compacted = str(tmpdir.mkdir('compacted'))
+    interf.strategy._psm_factory.compact_log(MmapLogger(compacted))
+    assert_recovers(compacted, interf.strategy)
+
+    reopen(interf, compacted)
+    while driver.num_running():
+        interf.next_time_point()
+    assert_recovers(compacted, interf.strategy)
@@ -18,6 +18,7 @@ import numpy
 class LossFunc(object):
     dim = 0
     loss_name = ""
+    hyperparam_names = []
 
     @classmethod
     def epoch_loss(cls, epoch, hyperparams):
@@ -25,6 +26,44 @@ class LossFunc(object):
         epoch_loss = cls._interpolation(final_loss, epoch)
         return epoch_loss
 
+    @classmethod
+    def epoch_loss_batch(cls, epochs, hyperparams_array):
+        """Losses of a whole cohort in one call.
+
+        `epochs` has shape (n,) and `hyperparams_array` shape (n, dim), with the
+        columns in `hyperparam_names` order. Subclasses override the `_batch`
+        methods with vectorized versions; `epoch_loss` is the reference.
+        """
+        final_loss = cls._final_loss_batch(hyperparams_array)
+        return cls._interpolation_batch(final_loss, numpy.asarray(epochs))
+
+    @classmethod
+    def hyperparams_array(cls, hyperparams_list):
+        """Stack hyperparams as passed to `run_exp` into a (n, dim) array.
+
+        The array is float64 when every value is a number, otherwise (e.g.
+        categorical choices or inactive None values) it has dtype object and
+        holds the values as they are, for the row-by-row `_final_loss_batch`.
+        """
+        rows = [[h['hyperparams'][name] for name in cls.hyperparam_names] for h in hyperparams_list]
+        try:
+            return numpy.array(rows, dtype=numpy.float64).reshape(-1, cls.dim)
+        except (TypeError, ValueError):
+            array = numpy.empty((len(rows), cls.dim), dtype=object)
+            for i, row in enumerate(rows):
+                for j, value in enumerate(row):
+                    array[i, j] = value
+            return array
+
+    @classmethod
+    def _final_loss_batch(cls, hyperparams_array):
+        return numpy.array([cls._final_loss({'hyperparams': dict(zip(cls.hyperparam_names, row))})
+                            for row in hyperparams_array])
+
+    @classmethod
+    def _interpolation_batch(cls, final_loss, epochs):
+        return numpy.array([cls._interpolation(l, e) for l, e in zip(final_loss, epochs)])
+
     @classmethod
     def _final_loss(cls, hyperparams):
         raise NotImplementedError
@@ -37,6 +76,7 @@ class LossFunc(object):
 class ExampleLoss1(LossFunc):
     loss_name = 'ExampleLoss1'
     dim = 1
+    hyperparam_names = ['learning_rate']
 
     @classmethod
     def _final_loss(cls, hyperparams):
@@ -48,3 +88,15 @@ class ExampleLoss1(LossFunc):
         outer_scale = max(0.7 + random.gauss(0., 0.02), 0.02)
         inner_scale = max(0.01 + random.gauss(0., 0.02), 0.1)
         return outer_scale*(inner_scale*epoch+1)**(-2)+final_loss+random.gauss(0., 0.005)
+
+    @classmethod
+    def _final_loss_batch(cls, hyperparams_array):
+        learning_rate = hyperparams_array[:, 0]
+        return 0.1 + 0.1*(numpy.log10(learning_rate)-0.004)**2
+
+    @classmethod
+    def _interpolation_batch(cls, final_loss, epochs):
+        size = len(final_loss)
+        outer_scale = numpy.maximum(0.7 + numpy.random.normal(0., 0.02, size), 0.02)
+        inner_scale = numpy.maximum(0.01 + numpy.random.normal(0., 0.02, size), 0.1)
+        return outer_scale*(inner_scale*epochs+1)**(-2)+final_loss+numpy.random.normal(0., 0.005, size)
@@ -0,0 +1,84 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import numpy
+
+from gbstrategy.core import BatchDemoDriver, ExampleLoss1, LossFunc
+
+
+def hyperparams(**values):
+    return {'hyperparams': values}
+
+
+def test_batch_losses_match_the_scalar_path(monkeypatch):
+    # without noise both paths compute the same curve
+    monkeypatch.setattr(random, 'gauss', lambda mu, sigma: 0.)
+    monkeypatch.setattr(numpy.random, 'normal', lambda loc, scale, size: numpy.zeros(size))
+    rates = numpy.linspace(0.001, 0.01, 7).tolist()
+    epochs = [1, 2, 3, 5, 8, 13, 21]
+    hyperparams_list = [hyperparams(learning_rate=r) for r in rates]
+
+    batch = ExampleLoss1.epoch_loss_batch(epochs, ExampleLoss1.hyperparams_array(hyperparams_list))
+    scalar = [ExampleLoss1.epoch_loss(e, h) for e, h in zip(epochs, hyperparams_list)]
+    assert numpy.allclose(batch, scalar, rtol=1e-12)
+
+
+class OptimizerLoss(LossFunc):
+    "Scalar only loss over a categorical and a conditional hyperparameter"
+    loss_name = 'OptimizerLoss'
+    dim = 2
+    hyperparam_names = ['optimizer', 'momentum']
+
+    @classmethod
+    def _final_loss(cls, hyperparams):
+        h = hyperparams['hyperparams']
+        return {'sgd': 0.3, 'adam': 0.2}[h['optimizer']] - 0.1 * (h['momentum'] or 0.)
+
+    @classmethod
+    def _interpolation(cls, final_loss, epoch):
+        return final_loss + 1. / epoch
+
+
+def test_categorical_hyperparams_fall_back_to_the_scalar_path():
+    hyperparams_list = [hyperparams(optimizer='sgd', momentum=0.9),
+                        hyperparams(optimizer='adam', momentum=None)]
+    array = OptimizerLoss.hyperparams_array(hyperparams_list)
+    assert array.dtype == object
+    assert array.tolist() == [['sgd', 0.9], ['adam', None]]
+    assert numpy.allclose(OptimizerLoss.epoch_loss_batch([1, 2], array),
+                          [OptimizerLoss.epoch_loss(1, hyperparams_list[0]),
+                           OptimizerLoss.epoch_loss(2, hyperparams_list[1])])
+
+
+class RecordingInterface(object):
+    def __init__(self):
+        self.records = []
+
+    def register_driver(self, driver):
+        self.driver = driver
+
+    def upload_training_losses(self, records):
+        self.records.extend(records)
+
+
+def test_batch_driver_keeps_categorical_hyperparams():
+    interf = RecordingInterface()
+    driver = BatchDemoDriver(interf, OptimizerLoss(), capacity=1)
+    driver.run_exps([('a', 2, hyperparams(optimizer='sgd', momentum=0.5))])
+    driver.run_exps([('b', 1, hyperparams(optimizer='adam', momentum=None)),
+                     ('c', 1, hyperparams(optimizer='sgd', momentum=0.))])
+    while driver.num_running():
+        driver.next()
+    losses = {(r['exp_id'], r['epoch']): r['loss_value'] for r in interf.records}
+    assert losses == {('a', 1): 1.25, ('a', 2): 0.75, ('b', 1): 1.2, ('c', 1): 1.3}
@@ -0,0 +1,199 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import concurrent.futures
+import os
+import random
+import time
+
+import numpy
+from psm.logger import MockLogger
+
+from ._demo import DemoDriver
+from ._Interface import Interface
+from ._Strategy import StrategyMachineFactory
+
+
+_COLUMNS = ['run_id', 'label', 'lossfunc', 'budget', 'seed', 'num_epochs', 'best_loss',
+            'wall_time', 'curve_epochs', 'curve_losses']
+
+
+def run_sweep(job):
+    """Run one seeded simulated sweep and summarize it.
+
+    `job` is a dict with `strategy_cls`, `triggers` (list of (trigger name,
+    data)), `lossfunc`, `budget` (max epochs) and `seed`, optionally
+    `driver_cls` (default `DemoDriver`) and `label` (default the strategy
+    class name). The anytime curve holds the epochs consumed and the best
+    loss at every improvement.
+    """
+    random.seed(job['seed'])
+    numpy.random.seed(job['seed'])
+    start = time.perf_counter()
+
+    interf = Interface()
+    driver = job.get('driver_cls', DemoDriver)(interf, job['lossfunc'])
+    strategy = job['strategy_cls']()
+    factory = StrategyMachineFactory(strategy, MockLogger(), interf)
+    factory.generate_psm()
+    for name, data in job['triggers']:
+        strategy.trigger(name, **data)
+
+    num_epochs = 0
+    best_loss = None
+    curve_epochs, curve_losses = [], []
+    while driver.num_running() and num_epochs < job['budget']:
+        interf.next_time_point()
+        loss_store = strategy._psm_data.get('trainingloss')
+        if loss_store is None:
+            continue
+        num_epochs = len(loss_store)
+        if loss_store.best_loss() is not None and loss_store.best_loss() != best_loss:
+            best_loss = loss_store.best_loss()
+            curve_epochs.append(num_epochs)
+            curve_losses.append(best_loss)
+    factory.release()
+
+    return {
+        'label'       : job.get('label', job['strategy_cls'].__name__),
+        'lossfunc'    : job['lossfunc'].loss_name,
+        'budget'      : job['budget'],
+        'seed'        : job['seed'],
+        'num_epochs'  : num_epochs,
+        'best_loss'   : best_loss if best_loss is not None else float('nan'),
+        'wall_time'   : time.perf_counter() - start,
+        'curve_epochs': curve_epochs,
+        'curve_losses': curve_losses,
+    }
+
+
+def run_sweeps(jobs, path, max_workers=None):
+    """Fan `jobs` (see `run_sweep`) out over a process pool.
+
+    The summaries go to the `.npz` file `path`, one array per column, with
+    the curves of all runs concatenated and split by `curve_offsets`. The
+    file is replaced after every finished run, so an interrupted study keeps
+    the runs that finished. Returns the number of runs written.
+    """
+    columns = {c: [] for c in _COLUMNS}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_sweep, job): run_id for run_id, job in enumerate(jobs)}
+        for future in concurrent.futures.as_completed(futures):
+            summary = dict(future.result(), run_id=futures[future])
+            for c in _COLUMNS:
+                columns[c].append(summary[c])
+            _write_columns(path, columns)
+    if not futures:
+        _write_columns(path, columns)
+    return len(columns['run_id'])
+
+
+def _write_columns(path, columns):
+    curve_lengths = [len(curve) for curve in columns['curve_epochs']]
+    arrays = {
+        'run_id'       : numpy.array(columns['run_id'], dtype=numpy.int64),
+        'label'        : numpy.array(columns['label'], dtype=str),
+        'lossfunc'     : numpy.array(columns['lossfunc'], dtype=str),
+        'budget'       : numpy.array(columns['budget'], dtype=numpy.int64),
+        'seed'         : numpy.array(columns['seed'], dtype=numpy.int64),
+        'num_epochs'   : numpy.array(columns['num_epochs'], dtype=numpy.int64),
+        'best_loss'    : numpy.array(columns['best_loss'], dtype=numpy.float64),
+        'wall_time'    : numpy.array(columns['wall_time'], dtype=numpy.float64),
+        'curve_offsets': numpy.concatenate([[0], numpy.cumsum(curve_lengths, dtype=numpy.int64)]),
+        'curve_epochs' : numpy.array([e for curve in columns['curve_epochs'] for e in curve],
+                                     dtype=numpy.int64),
+        'curve_losses' : numpy.array([l for curve in columns['curve_losses'] for l in curve],
+                                     dtype=numpy.float64),
+    }
+    # write next to `path` and rename, so readers never see a partial file
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'wb') as f:
+        numpy.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_results(path):
+    "Columns of a `run_sweeps` result file, curves as lists of arrays, ordered by run_id"
+    with numpy.load(path) as f:
+        arrays = {name: f[name] for name in f.files}
+    order = numpy.argsort(arrays['run_id'], kind='stable')
+    offsets = arrays.pop('curve_offsets')
+    results = {}
+    for c in _COLUMNS:
+        if c in ('curve_epochs', 'curve_losses'):
+            curves = numpy.split(arrays[c], offsets[1:-1])
+            results[c] = [curves[i] for i in order]
+        elif c in ('label', 'lossfunc'):
+            results[c] = [str(v) for v in arrays[c][order]]
+        else:
+            results[c] = arrays[c][order]
+    return results
+
+
+def _group(results, by):
+    groups = {}
+    for idx in range(len(results['run_id'])):
+        key = tuple(results[column][idx] for column in by)
+        key = tuple(k.item() if isinstance(k, numpy.generic) else k for k in key)
+        groups.setdefault(key, []).append(idx)
+    return groups
+
+
+def comparison_table(results, by=('label', 'lossfunc', 'budget')):
+    "One row of best loss and cost statistics per group of runs, sorted by the `by` columns"
+    table = []
+    for key, idx in sorted(_group(results, by).items()):
+        best_loss = results['best_loss'][idx]
+        row = dict(zip(by, key))
+        row.update({
+            'runs'            : len(idx),
+            'best_loss_mean'  : float(numpy.nanmean(best_loss)),
+            'best_loss_std'   : float(numpy.nanstd(best_loss)),
+            'best_loss_median': float(numpy.nanmedian(best_loss)),
+            'num_epochs_mean' : float(results['num_epochs'][idx].mean()),
+            'wall_time_mean'  : float(results['wall_time'][idx].mean()),
+        })
+        table.append(row)
+    return table
+
+
+def anytime_curves(results, grid, by=('label',), quantiles=(0.25, 0.5, 0.75)):
+    """Best loss so far after each number of epochs in `grid`, per group of runs.
+
+    Returns {group: array of shape (len(quantiles), len(grid))} with the
+    quantiles over the runs; NaN where fewer than half the runs had reported.
+    """
+    grid = numpy.asarray(grid)
+    curves = {}
+    for key, idx in sorted(_group(results, by).items()):
+        best = numpy.full((len(idx), len(grid)), numpy.nan)
+        for row, i in enumerate(idx):
+            epochs, losses = results['curve_epochs'][i], results['curve_losses'][i]
+            pos = numpy.searchsorted(epochs, grid, side='right') - 1
+            best[row, pos >= 0] = losses[pos[pos >= 0]]
+        reported = numpy.isfinite(best).sum(axis=0) * 2 >= len(idx)
+        curve = numpy.full((len(quantiles), len(grid)), numpy.nan)
+        if reported.any():
+            curve[:, reported] = numpy.nanquantile(best[:, reported], quantiles, axis=0)
+        curves[key if len(by) > 1 else key[0]] = curve
+    return curves
+
+
+def format_table(table):
+    "Plain text rendering of `comparison_table` rows"
+    if not table:
+        return ''
+    columns = list(table[0])
+    cells = [[c for c in columns]] + [['{:.4g}'.format(row[c]) if isinstance(row[c], float)
+                                       else str(row[c]) for c in columns] for row in table]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    return '\n'.join('  '.join(cell.rjust(w) for cell, w in zip(line, widths)) for line in cells)
@@ -0,0 +1,101 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+
+import numpy
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.core import (ExampleLoss1, anytime_curves, comparison_table, format_table,
+                             load_results, run_sweep, run_sweeps,
+                            )
+
+
+def jobs(num_seeds):
+    for seed in range(num_seeds):
+        for budget in [16, 40]:
+            yield {
+                'strategy_cls': SuccessiveHalvingStrategy,
+                'triggers'    : [('ReceiveRandomSearchHyperparams', {'num_exp': 8, 'epoch': 2}),
+                                 ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})],
+                'lossfunc'    : ExampleLoss1(),
+                'budget'      : budget,
+                'seed'        : seed,
+            }
+
+
+def test_run_sweeps_writes_one_column_per_summary_field(tmpdir):
+    path = str(tmpdir.join('results.npz'))
+    assert run_sweeps(jobs(3), path, max_workers=2) == 6
+    assert not os.path.exists(path + '.tmp')
+    with numpy.load(path) as f:
+        assert set(f.files) == {'run_id', 'label', 'lossfunc', 'budget', 'seed', 'num_epochs',
+                                'best_loss', 'wall_time', 'curve_offsets', 'curve_epochs',
+                                'curve_losses'}
+        assert f['run_id'].shape == (6,)
+        assert f['curve_offsets'][-1] == len(f['curve_epochs']) == len(f['curve_losses'])
+
+    results = load_results(path)
+    assert list(results['run_id']) == list(range(6))
+    # the same seed gives the same run in a worker process
+    for run_id, job in enumerate(jobs(3)):
+        summary = run_sweep(job)
+        for c in ['label', 'lossfunc', 'budget', 'seed', 'num_epochs', 'best_loss']:
+            assert results[c][run_id] == summary[c]
+        assert list(results['curve_epochs'][run_id]) == summary['curve_epochs']
+        assert list(results['curve_losses'][run_id]) == summary['curve_losses']
+
+
+def test_run_sweeps_without_jobs(tmpdir):
+    path = str(tmpdir.join('results.npz'))
+    assert run_sweeps([], path) == 0
+    results = load_results(path)
+    assert len(results['run_id']) == 0
+    assert results['curve_epochs'] == []
+    assert comparison_table(results) == []
+
+
+def results(best_losses, curves):
+    return {
+        'run_id'      : numpy.arange(len(best_losses)),
+        'label'       : ['a', 'a', 'b', 'b'],
+        'lossfunc'    : ['loss'] * 4,
+        'budget'      : numpy.array([10] * 4),
+        'seed'        : numpy.array([0, 1, 0, 1]),
+        'num_epochs'  : numpy.array([10, 8, 10, 6]),
+        'best_loss'   : numpy.array(best_losses),
+        'wall_time'   : numpy.ones(4),
+        'curve_epochs': [numpy.array(e) for e, _ in curves],
+        'curve_losses': [numpy.array(l) for _, l in curves],
+    }
+
+
+def test_comparison_table_groups_runs():
+    table = comparison_table(results([0.2, 0.4, 0.1, float('nan')],
+                                     [([], [])] * 4))
+    assert [(row['label'], row['runs']) for row in table] == [('a', 2), ('b', 2)]
+    assert numpy.isclose(table[0]['best_loss_mean'], 0.3)
+    # runs without a loss are left out of the loss statistics
+    assert table[1]['best_loss_mean'] == 0.1
+    assert table[1]['num_epochs_mean'] == 8
+    lines = format_table(table).splitlines()
+    assert len(lines) == 3 and lines[0].split()[:3] == ['label', 'lossfunc', 'budget']
+
+
+def test_anytime_curves_take_the_best_loss_so_far():
+    curves = anytime_curves(results([0.2, 0.4, 0.1, 0.3],
+                                    [([2, 6], [0.5, 0.2]), ([4], [0.4]),
+                                     ([2], [0.1]), ([8], [0.3])]),
+                            grid=[1, 2, 4, 6, 8], quantiles=(0.5,))
+    # nothing reported after one epoch; one of two runs is enough for a quantile
+    numpy.testing.assert_allclose(curves['a'][0], [numpy.nan, 0.5, 0.45, 0.3, 0.3])
+    numpy.testing.assert_allclose(curves['b'][0], [numpy.nan, 0.1, 0.1, 0.1, 0.2])
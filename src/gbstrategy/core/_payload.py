@@ -0,0 +1,176 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import array
+import datetime
+import json
+import struct
+import uuid
+
+import numpy
+from psm.components import Action, Trigger
+
+from gbstrategy.datastructures import EpochQuantiles, LossRecord, LossStore, P2Quantile
+
+
+_HEADER = struct.Struct('<I')
+
+# classes whose attributes are logged as they are
+_OBJECTS = {cls.__name__: cls for cls in [EpochQuantiles, P2Quantile]}
+
+
+def encode(value):
+    """Encode `value` as a JSON tree followed by the raw bytes of its arrays.
+
+    JSON covers None, bools, numbers, strings, lists and dicts with string
+    keys; everything else is a tagged object: tuples, sets, other dicts,
+    datetimes, UUIDs, numpy and `array` arrays (as buffers), `LossRecord`s,
+    `LossStore`s (as their columns), the quantile estimators and `Trigger`
+    and `Action` classes (by name). Other values raise TypeError, so unlike
+    pickle decoding never runs code it reads.
+    """
+    buffers = []
+    tree = json.dumps(_encode(value, buffers), separators=(',', ':')).encode('utf-8')
+    return b''.join([_HEADER.pack(len(tree)), tree] + buffers)
+
+
+def decode(payload):
+    "Inverse of `encode`; classes are looked up among the `Trigger` and `Action` subclasses defined"
+    payload = memoryview(payload)
+    size, = _HEADER.unpack_from(payload)
+    start = _HEADER.size + size
+    tree = json.loads(bytes(payload[_HEADER.size:start]).decode('utf-8'))
+    return _decode(tree, payload[start:])
+
+
+_classes = {}
+
+
+def _logged_class(name):
+    cls = _classes.get(name)
+    if cls is None:
+        # look again for subclasses defined since the last miss
+        pending = [Trigger, Action]
+        while pending:
+            for sub in pending.pop().__subclasses__():
+                _classes[_class_name(sub)] = sub
+                pending.append(sub)
+        cls = _classes.get(name)
+        if cls is None:
+            raise ValueError('Unknown logged class <{}>'.format(name))
+    return cls
+
+
+def _class_name(cls):
+    return '{}.{}'.format(cls.__module__, cls.__qualname__)
+
+
+def _encode(value, buffers):
+    if value is None or type(value) in (bool, int, float, str):
+        return value
+    if isinstance(value, numpy.generic):
+        return _encode(value.item(), buffers)
+    for base in (bool, int, float, str):
+        if isinstance(value, base):
+            return base(value)
+    if isinstance(value, list):
+        return [_encode(v, buffers) for v in value]
+    if isinstance(value, dict):
+        if all(type(k) is str for k in value) and '__t' not in value:
+            return {k: _encode(v, buffers) for k, v in value.items()}
+        return {'__t': 'dict', 'v': [[_encode(k, buffers), _encode(v, buffers)] for k, v in value.items()]}
+    if isinstance(value, tuple):
+        return {'__t': 'tuple', 'v': [_encode(v, buffers) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {'__t': type(value).__name__, 'v': [_encode(v, buffers) for v in value]}
+    if isinstance(value, uuid.UUID):
+        return {'__t': 'uuid', 'v': value.hex}
+    if isinstance(value, datetime.datetime):
+        offset = value.utcoffset()
+        return {'__t': 'datetime', 'v': list(value.timetuple()[:6]) + [value.microsecond],
+                'utcoffset': offset.total_seconds() if offset is not None else None}
+    if isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError('Arrays of Python objects cannot be logged')
+        return {'__t': 'ndarray', 'dtype': value.dtype.str, 'shape': list(value.shape),
+                'b': _buffer(numpy.ascontiguousarray(value).tobytes(), buffers)}
+    if isinstance(value, array.array):
+        return {'__t': 'array', 'typecode': value.typecode, 'b': _buffer(value.tobytes(), buffers)}
+    if isinstance(value, LossRecord):
+        return {'__t': 'LossRecord', 'v': [_encode(value[k], buffers) for k in LossRecord.__slots__]}
+    if isinstance(value, LossStore):
+        return {'__t': 'LossStore', 'v': _encode(value.columns(), buffers)}
+    if type(value).__name__ in _OBJECTS and _OBJECTS[type(value).__name__] is type(value):
+        return {'__t': 'object', 'cls': type(value).__name__, 'v': _encode(_attributes(value), buffers)}
+    if isinstance(value, type) and issubclass(value, (Trigger, Action)):
+        return {'__t': 'class', 'v': _class_name(value)}
+    raise TypeError('Values of type {} cannot be logged'.format(type(value).__name__))
+
+
+def _buffer(data, buffers):
+    offset = sum(len(b) for b in buffers)
+    buffers.append(data)
+    return [offset, len(data)]
+
+
+def _attributes(obj):
+    slots = getattr(type(obj), '__slots__', None)
+    if slots is not None:
+        return {name: getattr(obj, name) for name in slots}
+    return dict(vars(obj))
+
+
+def _decode(tree, buffers):
+    if isinstance(tree, list):
+        return [_decode(v, buffers) for v in tree]
+    if not isinstance(tree, dict):
+        return tree
+    tag = tree.get('__t')
+    if tag is None:
+        return {k: _decode(v, buffers) for k, v in tree.items()}
+    if tag == 'dict':
+        return {_decode(k, buffers): _decode(v, buffers) for k, v in tree['v']}
+    if tag == 'tuple':
+        return tuple(_decode(v, buffers) for v in tree['v'])
+    if tag == 'set':
+        return set(_decode(v, buffers) for v in tree['v'])
+    if tag == 'frozenset':
+        return frozenset(_decode(v, buffers) for v in tree['v'])
+    if tag == 'uuid':
+        return uuid.UUID(hex=tree['v'])
+    if tag == 'datetime':
+        offset = tree['utcoffset']
+        tzinfo = datetime.timezone(datetime.timedelta(seconds=offset)) if offset is not None else None
+        return datetime.datetime(*tree['v'], tzinfo=tzinfo)
+    if tag == 'ndarray':
+        offset, length = tree['b']
+        dtype = numpy.dtype(tree['dtype'])
+        return numpy.frombuffer(buffers[offset:offset + length], dtype=dtype).reshape(tree['shape']).copy()
+    if tag == 'array':
+        offset, length = tree['b']
+        values = array.array(tree['typecode'])
+        values.frombytes(buffers[offset:offset + length])
+        return values
+    if tag == 'LossRecord':
+        return LossRecord(*_decode(tree['v'], buffers))
+    if tag == 'LossStore':
+        return LossStore.from_columns(_decode(tree['v'], buffers))
+    if tag == 'object':
+        cls = _OBJECTS[tree['cls']]
+        obj = cls.__new__(cls)
+        for name, value in _decode(tree['v'], buffers).items():
+            setattr(obj, name, value)
+        return obj
+    if tag == 'class':
+        return _logged_class(tree['v'])
+    raise ValueError('Unknown payload tag <{}>'.format(tag))
+
@@ -0,0 +1,87 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import array
+import datetime
+import json
+import uuid
+
+import numpy
+import pytest
+
+from gbstrategy.components.actions import RunExps
+from gbstrategy.components.triggers import ReceiveTrainingLoss
+from gbstrategy.core._payload import decode, encode
+from gbstrategy.datastructures import EpochQuantiles, LossRecord, LossStore
+
+
+def round_trip(value):
+    return decode(encode(value))
+
+
+def test_round_trips():
+    exp_id = uuid.uuid4()
+    value = {
+        'state'    : ('HalvingStage', {'num_exp': 4, 'ratio': 0.5, 'stopped': False, 'best': None}),
+        'running'  : {exp_id: 6, 'name': [1, 2.5, float('inf')]},
+        'promoted' : [{exp_id, 'b'}, set(), frozenset([1])],
+        '__t'      : 'not a tag',
+        'time'     : {'start': datetime.datetime(2020, 1, 2, 3, 4, 5, 678),
+                      'utc': datetime.datetime(2020, 1, 2, tzinfo=datetime.timezone.utc)},
+        'numbers'  : [numpy.float64(0.25), numpy.int64(3), numpy.bool_(True)],
+        'array'    : numpy.arange(12, dtype=numpy.float32).reshape(3, 4),
+        'typecodes': array.array('d', [0.5, 1.5]),
+        'record'   : LossRecord(exp_id, 3, 'loss', 0.5),
+        'classes'  : [ReceiveTrainingLoss, RunExps],
+    }
+    decoded = round_trip(value)
+    array_value = decoded.pop('array')
+    assert array_value.dtype == numpy.float32 and array_value.shape == (3, 4)
+    assert (array_value == value.pop('array')).all()
+    assert decoded == value
+    assert decoded['numbers'] == [0.25, 3, True]
+    assert type(decoded['record']) is LossRecord
+
+
+def test_nan_round_trips():
+    assert numpy.isnan(round_trip([float('nan')])[0])
+
+
+def test_datastructures_round_trip():
+    store = LossStore()
+    store.extend([LossRecord('a', 1, 'loss', 0.3), LossRecord('b', 1, 'loss', 0.1),
+                  LossRecord('a', 2, 'loss', 0.2)])
+    quantiles = EpochQuantiles(0.3)
+    quantiles.extend([1] * 9 + [2], numpy.linspace(0, 1, 10).tolist())
+    decoded = round_trip({'trainingloss': store, 'lossquantiles': quantiles, 'columns': store.columns()})
+    assert decoded['trainingloss'] == store
+    assert decoded['lossquantiles'] == quantiles
+    assert decoded['lossquantiles'].estimator(1).previous_value == quantiles.estimator(1).previous_value
+    assert LossStore.from_columns(decoded['columns']) == store
+
+
+class Opaque(object):
+    pass
+
+
+@pytest.mark.parametrize('value', [Opaque(), Opaque, numpy.array([object()]), {1: len}])
+def test_other_values_are_refused(value):
+    with pytest.raises(TypeError):
+        encode(value)
+
+
+def test_decoding_only_resolves_logged_classes():
+    payload = encode(ReceiveTrainingLoss)
+    assert decode(payload) is ReceiveTrainingLoss
+    tree = json.dumps({'__t': 'class', 'v': 'os.system'}).encode('utf-8')
+    with pytest.raises(ValueError):
+        decode(len(tree).to_bytes(4, 'little') + tree)
@@ -0,0 +1,138 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import concurrent.futures
+import queue
+from functools import partial
+
+
+class LossFuncTrainer(object):
+    "Picklable training callable that evaluates a `LossFunc` for one epoch"
+    def __init__(self, lossfunc):
+        self.lossfunc = lossfunc
+
+    def __call__(self, exp_id, epoch, hyperparams):
+        return self.lossfunc.epoch_loss(epoch, hyperparams)
+
+
+class _PoolExp(object):
+    __slots__ = ('exp_id', 'hyperparams', 'end_epoch', 'curr_epoch', 'running')
+
+    def __init__(self, exp_id, end_epoch, hyperparams):
+        self.exp_id = exp_id
+        self.hyperparams = hyperparams
+        self.end_epoch = end_epoch
+        self.curr_epoch = 0
+        self.running = False
+
+
+class ProcessPoolDriver(object):
+    """Train experiments concurrently in a `concurrent.futures` process pool.
+
+    Every epoch of an experiment is one `train_func(exp_id, epoch, hyperparams)`
+    task returning the loss value; `train_func` must be picklable and should
+    checkpoint its model by exp_id if training is stateful. Results are queued
+    as they complete and `next()` uploads them to the interface on the calling
+    (strategy) thread, in arrival order, before submitting the following epoch.
+    `run_exp` on a running experiment only moves its end epoch. If training or
+    uploading fails, `next()` still handles the other finished epochs before
+    raising the first error.
+    """
+    def __init__(self, interface, train_func, loss_name, max_workers=None):
+        self.interface = interface
+        self.train_func = train_func
+        self.loss_name = loss_name
+        self.interface.register_driver(self)
+
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+        self._results = queue.Queue()
+        self._exps = {}
+        self._num_running = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def num_running(self):
+        return self._num_running
+
+    def next(self, timeout=None):
+        "Wait for at least one finished epoch (if any is running) and upload all finished ones"
+        if not self._num_running:
+            return
+        try:
+            results = [self._results.get(timeout=timeout)]
+        except queue.Empty:
+            return
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+
+        # every dequeued result is accounted for even if one of them fails,
+        # the first error is raised once they all were handled
+        error = None
+        for exp_id, epoch, future in results:
+            exp = self._exps[exp_id]
+            exp.running = False
+            self._num_running -= 1
+            try:
+                loss_value = future.result()
+            except Exception as e:
+                # the experiment stops before the failed epoch, `run_exp` retries it
+                exp.curr_epoch = epoch - 1
+                error = error or e
+                continue
+            try:
+                self.interface.upload_training_loss(exp_id, epoch, self.loss_name, loss_value)
+            except Exception as e:
+                error = error or e
+            finally:
+                self._submit(exp)
+        if error is not None:
+            raise error
+
+    def run_exp(self, exp_id, end_epoch, hyperparams):
+        exp = self._exps.get(exp_id)
+        if exp is None:
+            exp = self._exps[exp_id] = _PoolExp(exp_id, end_epoch, hyperparams)
+        elif end_epoch < exp.end_epoch:
+            msg = 'The new end_epoch is even smaller than the previous setting for exp <{}>'
+            raise ValueError(msg.format(exp_id))
+        else:
+            exp.end_epoch = end_epoch
+        self._submit(exp)
+
+    def kill_exp(self, exp_id):
+        "Stop after the epoch in flight, whose loss is still reported"
+        exp = self._exps.get(exp_id)
+        if exp is not None:
+            exp.end_epoch = exp.curr_epoch
+
+    def _submit(self, exp):
+        if exp.running or exp.curr_epoch >= exp.end_epoch:
+            return
+        exp.curr_epoch += 1
+        exp.running = True
+        self._num_running += 1
+        future = self._executor.submit(self.train_func, exp.exp_id, exp.curr_epoch, exp.hyperparams)
+        future.add_done_callback(partial(self._done, exp.exp_id, exp.curr_epoch))
+
+    def _done(self, exp_id, epoch, future):
+        # runs on the executor's thread, only hand the result over
+        self._results.put((exp_id, epoch, future))
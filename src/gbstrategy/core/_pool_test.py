@@ -0,0 +1,88 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import pytest
+
+from gbstrategy.core import ProcessPoolDriver
+
+
+def train(exp_id, epoch, hyperparams):
+    if (exp_id, epoch) == hyperparams.get('fail_at'):
+        raise RuntimeError('training failed')
+    return 1. / epoch
+
+
+class RecordingInterface(object):
+    def __init__(self, reject=()):
+        self.reject = reject
+        self.losses = []
+
+    def register_driver(self, driver):
+        self.driver = driver
+
+    def upload_training_loss(self, exp_id, epoch, loss_name, loss_value):
+        self.losses.append((exp_id, epoch))
+        if (exp_id, epoch) in self.reject:
+            raise ValueError('rejected')
+
+
+def run_all(driver):
+    errors = []
+    while driver.num_running():
+        try:
+            driver.next(timeout=30)
+        except Exception as e:
+            errors.append(e)
+    return errors
+
+
+def test_runs_every_epoch():
+    interf = RecordingInterface()
+    with ProcessPoolDriver(interf, train, 'loss', max_workers=2) as driver:
+        for exp_id in 'abc':
+            driver.run_exp(exp_id, 3, {})
+        assert run_all(driver) == []
+    assert sorted(interf.losses) == [(e, i) for e in 'abc' for i in (1, 2, 3)]
+
+
+def test_failed_epoch_stops_only_its_experiment():
+    interf = RecordingInterface()
+    with ProcessPoolDriver(interf, train, 'loss', max_workers=2) as driver:
+        driver.run_exp('a', 3, {})
+        driver.run_exp('b', 3, {'fail_at': ('b', 2)})
+        errors = run_all(driver)
+        assert [str(e) for e in errors] == ['training failed']
+        assert sorted(interf.losses) == [('a', 1), ('a', 2), ('a', 3), ('b', 1)]
+
+        # run_exp retries the failed epoch (which fails again here)
+        driver.run_exp('b', 3, {})
+        assert driver.num_running() == 1
+        assert [str(e) for e in run_all(driver)] == ['training failed']
+
+
+def test_failed_upload_keeps_training():
+    interf = RecordingInterface(reject=[('a', 1)])
+    with ProcessPoolDriver(interf, train, 'loss', max_workers=2) as driver:
+        driver.run_exp('a', 2, {})
+        driver.run_exp('b', 2, {})
+        errors = run_all(driver)
+        assert len(errors) == 1 and isinstance(errors[0], ValueError)
+        assert driver.num_running() == 0
+    assert sorted(interf.losses) == [('a', 1), ('a', 2), ('b', 1), ('b', 2)]
+
+
+def test_end_epoch_cannot_shrink():
+    with ProcessPoolDriver(RecordingInterface(), train, 'loss', max_workers=1) as driver:
+        driver.run_exp('a', 2, {})
+        with pytest.raises(ValueError):
+            driver.run_exp('a', 1, {})
+        run_all(driver)
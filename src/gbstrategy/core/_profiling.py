@@ -0,0 +1,149 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+from bisect import bisect_left
+import json
+import time
+
+
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1., 2.5, 5., 10.)
+FANOUT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_METRICS = {
+    'gbstrategy_trigger_seconds'   : ('histogram', 'Time in trigger wrappers by phase (log, aggregate)'),
+    'gbstrategy_condition_seconds' : ('histogram', 'Time in transition conditions'),
+    'gbstrategy_transition_seconds': ('histogram', 'Time in fired transitions by phase '
+                                                   '(issuer computing actions, issue to the driver)'),
+    'gbstrategy_transition_fanout' : ('histogram', 'Experiments started, extended or killed '
+                                                   'per fired transition'),
+    'gbstrategy_actions_total'     : ('counter', 'Actions returned by action issuers'),
+}
+
+
+class Histogram(object):
+    "Cumulative-bucket histogram as in the Prometheus data model"
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class StrategyProfiler(object):
+    """Counts and latency histograms of what strategy machines spend time on.
+
+    Pass one to `StrategyMachineFactory(profiler=...)` (several factories can
+    share one); the trigger, condition and action issuer wrappers of
+    `Strategy` only read the clock when a profiler is set. `snapshot()`
+    returns plain data, `to_prometheus()` the text exposition format and
+    `write_jsonl()` one JSON object per series.
+    """
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self):
+        self._series = {}
+
+    def reset(self):
+        self._series = {}
+
+    def _histogram(self, metric, labels, bounds):
+        key = (metric, labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = Histogram(bounds)
+        return series
+
+    def observe_trigger(self, strategy, trigger, log_seconds, aggregate_seconds):
+        self._histogram('gbstrategy_trigger_seconds', (('strategy', strategy), ('trigger', trigger),
+                        ('phase', 'log')), LATENCY_BUCKETS).observe(log_seconds)
+        self._histogram('gbstrategy_trigger_seconds', (('strategy', strategy), ('trigger', trigger),
+                        ('phase', 'aggregate')), LATENCY_BUCKETS).observe(aggregate_seconds)
+
+    def observe_condition(self, strategy, condition, seconds):
+        self._histogram('gbstrategy_condition_seconds', (('strategy', strategy),
+                        ('condition', condition)), LATENCY_BUCKETS).observe(seconds)
+
+    def observe_transition(self, strategy, transition, trigger, issuer_seconds, issue_seconds,
+                           actions):
+        labels = (('strategy', strategy), ('transition', transition), ('trigger', trigger))
+        self._histogram('gbstrategy_transition_seconds', labels + (('phase', 'issuer'),),
+                        LATENCY_BUCKETS).observe(issuer_seconds)
+        self._histogram('gbstrategy_transition_seconds', labels + (('phase', 'issue'),),
+                        LATENCY_BUCKETS).observe(issue_seconds)
+
+        fanout = 0
+        for a in actions:
+            key = ('gbstrategy_actions_total', labels + (('action', a.__class__.__name__),))
+            self._series[key] = self._series.get(key, 0) + 1
+            batch = a.data.get('batch') if isinstance(a.data, dict) else None
+            fanout += len(batch) if batch is not None else 1
+        self._histogram('gbstrategy_transition_fanout', labels, FANOUT_BUCKETS).observe(fanout)
+
+    def snapshot(self):
+        "{metric: {'type', 'help', 'series': [{'labels': dict, ...values}]}}"
+        metrics = {}
+        for (metric, labels), series in sorted(self._series.items(), key=lambda item: item[0]):
+            kind, doc = _METRICS[metric]
+            family = metrics.setdefault(metric, {'type': kind, 'help': doc, 'series': []})
+            values = series.snapshot() if kind == 'histogram' else {'value': series}
+            family['series'].append(dict(values, labels=dict(labels)))
+        return metrics
+
+    def to_prometheus(self):
+        lines = []
+        for metric, family in self.snapshot().items():
+            lines.append('# HELP {} {}'.format(metric, family['help']))
+            lines.append('# TYPE {} {}'.format(metric, family['type']))
+            for series in family['series']:
+                labels = series['labels']
+                if family['type'] == 'counter':
+                    lines.append('{}{} {}'.format(metric, _labels(labels), series['value']))
+                    continue
+                for bound, count in series['buckets']:
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append('{}_bucket{} {}'.format(metric, _labels(dict(labels, le=le)), count))
+                lines.append('{}_sum{} {!r}'.format(metric, _labels(labels), series['sum']))
+                lines.append('{}_count{} {}'.format(metric, _labels(labels), series['count']))
+        return '\n'.join(lines) + '\n'
+
+    def write_jsonl(self, f, timestamp=None):
+        "Append one JSON line per series to the text file `f`"
+        timestamp = timestamp if timestamp is not None else time.time()
+        for metric, family in self.snapshot().items():
+            for series in family['series']:
+                record = dict(series, metric=metric, type=family['type'], timestamp=timestamp)
+                if 'buckets' in record:
+                    record['buckets'] = [['+Inf' if b == float('inf') else b, c]
+                                         for b, c in record['buckets']]
+                f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def _labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join('{}="{}"'.format(k, escape(v)) for k, v in labels.items()) + '}'
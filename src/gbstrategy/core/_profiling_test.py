@@ -0,0 +1,122 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import io
+import itertools
+import json
+import random
+
+import numpy
+from psm.logger import MockLogger
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.components.actions import KillExp, RunExps
+from gbstrategy.core import (DemoDriver, ExampleLoss1, Interface, StrategyMachineFactory,
+                             StrategyProfiler,
+                            )
+
+
+def sweep(profiler):
+    random.seed(0)
+    numpy.random.seed(0)
+    logger = MockLogger()
+    interf = Interface()
+    driver = DemoDriver(interf, ExampleLoss1())
+    for name, data in [('ReceiveRandomSearchHyperparams', {'num_exp': 8, 'epoch': 2}),
+                       ('ReceiveHyperparams', {'learning_rate': [0.001, 0.01]})]:
+        strategy = SuccessiveHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, interf, profiler=profiler).generate_psm()
+        strategy.trigger(name, **data)
+    while driver.num_running():
+        interf.next_time_point()
+    return interf.strategy
+
+
+def series(snapshot, metric, **labels):
+    return [s for s in snapshot[metric]['series']
+            if all(s['labels'].get(k) == v for k, v in labels.items())]
+
+
+def test_profiles_triggers_conditions_and_transitions():
+    profiler = StrategyProfiler()
+    # every clock read is 1ms after the previous one
+    profiler.clock = itertools.count(step=1e-3).__next__
+    strategy = sweep(profiler)
+    # profiling does not change the sweep (experiment ids are random)
+    unprofiled = sweep(None)
+    assert strategy.state == unprofiled.state
+    assert [r['loss_value'] for r in strategy._psm_data['trainingloss']] == \
+           [r['loss_value'] for r in unprofiled._psm_data['trainingloss']]
+
+    snapshot = profiler.snapshot()
+    num_losses = len(strategy._psm_data['trainingloss'])
+    for phase in ['log', 'aggregate']:
+        losses, = series(snapshot, 'gbstrategy_trigger_seconds', trigger='ReceiveTrainingLoss',
+                         phase=phase)
+        assert losses['count'] == num_losses
+        assert numpy.isclose(losses['sum'], num_losses * 1e-3)
+        # the buckets are cumulative and end with +Inf
+        assert [c for _, c in losses['buckets']] == sorted(c for _, c in losses['buckets'])
+        assert losses['buckets'][-1] == (float('inf'), num_losses)
+
+    fired = series(snapshot, 'gbstrategy_transition_fanout', trigger='ReceiveHyperparams')
+    assert [(f['count'], f['sum']) for f in fired] == [(1, 8)]
+    actions = series(snapshot, 'gbstrategy_actions_total', trigger='ReceiveHyperparams')
+    assert [(a['labels']['action'], a['value']) for a in actions] == [('RunExps', 1)]
+    assert series(snapshot, 'gbstrategy_condition_seconds', condition='exp_finished')
+
+    profiler.reset()
+    assert profiler.snapshot() == {}
+
+
+def fed_profiler():
+    profiler = StrategyProfiler()
+    profiler.observe_trigger('S', 'ReceiveTrainingLoss', 2e-6, 0.3)
+    profiler.observe_transition('S', 'A->"B"', 'ReceiveTrainingLoss', 1e-3, 20.,
+                                [RunExps(data={'batch': [{}, {}, {}]}), KillExp(data='x')])
+    return profiler
+
+
+def test_prometheus_exposition():
+    lines = fed_profiler().to_prometheus().splitlines()
+    assert '# TYPE gbstrategy_actions_total counter' in lines
+    assert '# TYPE gbstrategy_trigger_seconds histogram' in lines
+    labels = 'strategy="S",trigger="ReceiveTrainingLoss",phase="aggregate"'
+    assert 'gbstrategy_trigger_seconds_bucket{{{},le="0.25"}} 0'.format(labels) in lines
+    assert 'gbstrategy_trigger_seconds_bucket{{{},le="0.5"}} 1'.format(labels) in lines
+    assert 'gbstrategy_trigger_seconds_bucket{{{},le="+Inf"}} 1'.format(labels) in lines
+    assert 'gbstrategy_trigger_seconds_sum{{{}}} 0.3'.format(labels) in lines
+    assert 'gbstrategy_trigger_seconds_count{{{}}} 1'.format(labels) in lines
+    # label values are escaped, the issue time is past the last bound
+    labels = 'strategy="S",transition="A->\\"B\\"",trigger="ReceiveTrainingLoss"'
+    assert 'gbstrategy_actions_total{{{},action="KillExp"}} 1'.format(labels) in lines
+    assert 'gbstrategy_transition_fanout_sum{{{}}} 4.0'.format(labels) in lines
+    assert 'gbstrategy_transition_seconds_bucket{{{},phase="issue",le="10.0"}} 0'.format(labels) in lines
+    assert 'gbstrategy_transition_seconds_bucket{{{},phase="issue",le="+Inf"}} 1'.format(labels) in lines
+
+
+def test_jsonl_export():
+    profiler = fed_profiler()
+    f = io.StringIO()
+    profiler.write_jsonl(f, timestamp=123.)
+    records = [json.loads(line) for line in f.getvalue().splitlines()]
+    assert len(records) == sum(len(family['series']) for family in profiler.snapshot().values())
+    assert all(r['timestamp'] == 123. for r in records)
+
+    kill, = [r for r in records if r['labels'].get('action') == 'KillExp']
+    assert kill['metric'] == 'gbstrategy_actions_total'
+    assert kill['type'] == 'counter' and kill['value'] == 1
+    fanout, = [r for r in records if r['metric'] == 'gbstrategy_transition_fanout']
+    assert fanout['type'] == 'histogram'
+    assert fanout['count'] == 1 and fanout['sum'] == 4
+    assert fanout['buckets'][-1] == ['+Inf', 1]
+    assert [b for b, c in fanout['buckets'] if c] == [4, 8, 16, 32, 64, 128, 256, 512, 1024, '+Inf']
@@ -0,0 +1,193 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import collections
+
+from ._Interface import Interface
+from ._Strategy import StrategyMachineFactory
+
+
+class StudyRouter(object):
+    """Host many studies (strategy + log each) on one driver.
+
+    The driver registers with the router like with an `Interface` and sees
+    composite exp_ids `(study_id, exp_id)`; losses are routed back to the
+    study, whose strategy only ever sees its own exp_ids.
+
+    At most `max_loaded` studies keep a live machine and `_psm_data`; the least
+    recently used one is released and recovered from its log on its next
+    event. A study released with at least `snapshot_every` triggers logged
+    since its last snapshot logs a new one. With a logger that has `recover()`
+    (`MemoryLogger`, `MmapLogger`) reloading it then aggregates at most that
+    many records instead of replaying its whole log; other loggers are still
+    replayed from the start with `srp`.
+
+    With `num_workers` set, at most that many experiments are handed to the
+    driver at once and free workers go to the studies with waiting runs in
+    round-robin order. Runs waiting in the router are not logged apart from the
+    issuing actions; use `max_concurrent` of the studies to keep queues in the
+    logs.
+    """
+    def __init__(self, num_workers=None, max_loaded=64, snapshot_every=64):
+        self.driver = None
+        self.num_workers = num_workers
+        self.max_loaded = max_loaded
+        self.snapshot_every = snapshot_every
+
+        self._studies = {}
+        self._loaded = collections.OrderedDict()
+        self._pending = {}
+        self._turns = collections.deque()
+        self._running = {}
+
+    def register_driver(self, driver):
+        self.driver = driver
+
+    def add_study(self, study_id, strategy_cls, logger, **factory_kwargs):
+        "Register a study; `factory_kwargs` go to its `StrategyMachineFactory`"
+        if study_id in self._studies:
+            raise ValueError('Study <{}> is registered already'.format(study_id))
+        self._studies[study_id] = (strategy_cls, logger, factory_kwargs)
+
+    def num_loaded(self):
+        return len(self._loaded)
+
+    def strategy(self, study_id):
+        "The live strategy of a study, loading it if needed"
+        return self._load(study_id).strategy
+
+    def trigger(self, study_id, trigger_name, **data):
+        "Send a trigger (e.g. hyperparams) to a study"
+        self._load(study_id)._trigger(trigger_name, data)
+
+    def next_time_point(self):
+        self.driver.next()
+
+    def upload_training_loss(self, exp_id, epoch, loss_name, loss_value):
+        study_id, study_exp_id = exp_id
+        self._load(study_id).upload_training_loss(study_exp_id, epoch, loss_name, loss_value)
+        self._release(exp_id, epoch)
+        self._fill()
+
+    def upload_training_losses(self, records):
+        by_study = collections.OrderedDict()
+        for data in records:
+            study_id, study_exp_id = data['exp_id']
+            data = dict(data, exp_id=study_exp_id)
+            by_study.setdefault(study_id, []).append(data)
+        for study_id, study_records in by_study.items():
+            self._load(study_id).upload_training_losses(study_records)
+            for data in study_records:
+                self._release((study_id, data['exp_id']), data['epoch'])
+        self._fill()
+
+    def upload_time(self, time):
+        "Send the time to the loaded studies only, idle ones are not woken up for it"
+        for interface in list(self._loaded.values()):
+            interface.upload_time(time)
+
+    def _load(self, study_id):
+        interface = self._loaded.get(study_id)
+        if interface is not None:
+            self._loaded.move_to_end(study_id)
+            interface.factory.current_psm()
+            return interface
+
+        strategy_cls, logger, factory_kwargs = self._studies[study_id]
+        interface = _StudyInterface(self, study_id)
+        factory = StrategyMachineFactory(strategy_cls(), logger, interface, **factory_kwargs)
+        factory.generate_psm()
+        self._loaded[study_id] = interface
+        while len(self._loaded) > self.max_loaded:
+            _, evicted = self._loaded.popitem(last=False)
+            released = evicted.factory
+            if released._triggers_since_snapshot >= self.snapshot_every and not released._stale:
+                released.snapshot()
+            released.release()
+        return interface
+
+    def _enqueue(self, study_id, batch):
+        direct = []
+        for exp_id, end_epoch, hyperparams in batch:
+            key = (study_id, exp_id)
+            if key in self._running:
+                # extending a running experiment needs no extra worker
+                self._running[key] = end_epoch
+                direct.append((key, end_epoch, hyperparams))
+                continue
+            pending = self._pending.get(study_id)
+            if pending is None:
+                pending = self._pending[study_id] = collections.deque()
+                self._turns.append(study_id)
+            pending.append((exp_id, end_epoch, hyperparams))
+        if direct:
+            self._run(direct)
+        self._fill()
+
+    def _kill(self, study_id, exp_id):
+        key = (study_id, exp_id)
+        self._running.pop(key, None)
+        pending = self._pending.get(study_id)
+        if pending is not None:
+            pending = collections.deque(args for args in pending if args[0] != exp_id)
+            if pending:
+                self._pending[study_id] = pending
+            else:
+                del self._pending[study_id]
+                self._turns.remove(study_id)
+        self.driver.kill_exp(key)
+        self._fill()
+
+    def _release(self, key, epoch):
+        end_epoch = self._running.get(key)
+        if end_epoch is not None and epoch >= end_epoch:
+            del self._running[key]
+
+    def _fill(self):
+        batch = []
+        while self._turns and (self.num_workers is None or len(self._running) < self.num_workers):
+            study_id = self._turns.popleft()
+            pending = self._pending[study_id]
+            exp_id, end_epoch, hyperparams = pending.popleft()
+            if pending:
+                self._turns.append(study_id)
+            else:
+                del self._pending[study_id]
+            self._running[(study_id, exp_id)] = end_epoch
+            batch.append(((study_id, exp_id), end_epoch, hyperparams))
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch):
+        run_exps = getattr(self.driver, 'run_exps', None)
+        if run_exps is not None:
+            run_exps(tuple(batch))
+        else:
+            for args in batch:
+                self.driver.run_exp(*args)
+
+
+class _StudyInterface(Interface):
+    "The `Interface` of one study of a `StudyRouter`"
+    def __init__(self, router, study_id):
+        super().__init__()
+        self.router = router
+        self.study_id = study_id
+
+    def run_exp(self, data):
+        self.router._enqueue(self.study_id, [self._run_exp_args(data)])
+
+    def run_exps(self, batch):
+        self.router._enqueue(self.study_id, self._run_exps_batch(batch))
+
+    def kill_exp(self, data):
+        self.router._kill(self.study_id, data['exp_id'])
@@ -0,0 +1,44 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import numpy
+
+from gbstrategy import SuccessiveHalvingStrategy
+from gbstrategy.components.triggers import Snapshot
+from gbstrategy.core import (DemoDriver, ExampleLoss1, Interface, MemoryLogger, StrategyMachineFactory,
+                             StudyRouter,
+                            )
+
+
+def test_reloaded_studies_match_their_logs():
+    random.seed(0)
+    numpy.random.seed(0)
+    router = StudyRouter(num_workers=8, max_loaded=2, snapshot_every=16)
+    driver = DemoDriver(router, ExampleLoss1())
+    loggers = [MemoryLogger() for _ in range(6)]
+    for study_id, logger in enumerate(loggers):
+        router.add_study(study_id, SuccessiveHalvingStrategy, logger)
+        router.trigger(study_id, 'ReceiveRandomSearchHyperparams', num_exp=16, epoch=2)
+        router.trigger(study_id, 'ReceiveHyperparams', learning_rate=[0.001, 0.01])
+    while driver.num_running():
+        router.next_time_point()
+
+    for study_id, logger in enumerate(loggers):
+        # released studies were snapshotted, so reloads did not replay whole logs
+        assert any(isinstance(t, Snapshot) for t in logger._find_all_triggers())
+        live = router.strategy(study_id)
+        strategy = SuccessiveHalvingStrategy()
+        StrategyMachineFactory(strategy, logger, Interface()).generate_psm()
+        assert strategy.state == live.state
+        assert strategy._psm_data == live._psm_data
@@ -0,0 +1,132 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import collections
+import datetime
+import heapq
+
+from ._demo import DemoExp
+
+
+class ConstantCost(object):
+    "Every epoch takes `seconds`"
+    def __init__(self, seconds=1.):
+        self.seconds = seconds
+
+    def __call__(self, epoch, hyperparams):
+        return self.seconds
+
+
+class SimulationDriver(object):
+    """Discrete-event simulation of a pool of `num_workers` workers.
+
+    Each worker trains one experiment at a time, one epoch per event. The
+    duration of an epoch comes from `cost_model(epoch, hyperparams)` (any
+    callable, e.g. `ConstantCost` or a function of the hyperparams). Every
+    `next()` pops the earliest epoch completion from a priority queue,
+    advances the simulated clock, sends it to the strategy through
+    `Interface.upload_time` and uploads the loss. Experiments waiting for a
+    worker are served first come, first served.
+    """
+    def __init__(self, interface, lossfunc, num_workers, cost_model=None, start_time=None):
+        self.interface = interface
+        self.lossfunc = lossfunc
+        self.num_workers = num_workers
+        self.cost_model = cost_model if cost_model is not None else ConstantCost()
+        self.start_time = start_time if start_time is not None else datetime.datetime.now()
+        self.interface.register_driver(self)
+
+        self.now = 0.
+        self._exps = {}
+        self._waiting = collections.deque()
+        self._events = []
+        self._seq = 0
+        self._busy = set()
+        self._busy_time = 0.
+
+        self.num_epochs = 0
+        self.best_loss = None
+        self.time_to_best_loss = None
+
+    def num_running(self):
+        return len(self._busy) + len(self._waiting)
+
+    def next(self):
+        self._dispatch()
+        if not self._events:
+            return
+        self.now, _, exp_id, duration = heapq.heappop(self._events)
+        self._busy_time += duration
+        self.interface.upload_time(self.start_time + datetime.timedelta(seconds=self.now))
+
+        exp = self._exps[exp_id]
+        if exp.is_finished():
+            # killed while training this epoch
+            self._busy.discard(exp_id)
+            self._dispatch()
+            return
+        loss = exp.upload_training_loss(self.interface)
+        self.num_epochs += 1
+        if self.best_loss is None or loss < self.best_loss:
+            self.best_loss = float(loss)
+            self.time_to_best_loss = self.now
+
+        # a promotion may have extended the exp while it was uploading, keep its worker then
+        if exp.is_finished():
+            self._busy.discard(exp_id)
+            self._dispatch()
+        else:
+            self._schedule(exp)
+
+    def run_exp(self, exp_id, end_epoch, hyperparams):
+        exp = self._exps.get(exp_id)
+        if exp is None:
+            exp = self._exps[exp_id] = DemoExp(exp_id, self.lossfunc, end_epoch, hyperparams)
+            self._waiting.append(exp_id)
+        elif end_epoch < exp.end_epoch:
+            msg = 'The new end_epoch is even smaller than the previous setting for exp <{}>'
+            raise ValueError(msg.format(exp_id))
+        else:
+            was_finished = exp.is_finished()
+            exp.end_epoch = end_epoch
+            if was_finished and not exp.is_finished() and exp_id not in self._busy:
+                self._waiting.append(exp_id)
+
+    def kill_exp(self, exp_id):
+        exp = self._exps.get(exp_id)
+        if exp is None:
+            return
+        exp.kill()
+        if exp_id in self._waiting:
+            self._waiting.remove(exp_id)
+
+    def report(self):
+        makespan = self.now
+        return {
+            'makespan'         : makespan,
+            'num_workers'      : self.num_workers,
+            'num_epochs'       : self.num_epochs,
+            'utilization'      : self._busy_time / (self.num_workers * makespan) if makespan else 0.,
+            'best_loss'        : self.best_loss,
+            'time_to_best_loss': self.time_to_best_loss,
+        }
+
+    def _dispatch(self):
+        while self._waiting and len(self._busy) < self.num_workers:
+            exp_id = self._waiting.popleft()
+            self._busy.add(exp_id)
+            self._schedule(self._exps[exp_id])
+
+    def _schedule(self, exp):
+        duration = self.cost_model(exp._curr_epoch + 1, exp.hyperparams)
+        heapq.heappush(self._events, (self.now + duration, self._seq, exp.exp_id, duration))
+        self._seq += 1
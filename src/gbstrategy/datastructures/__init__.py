@@ -0,0 +1,23 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+from ._leaderboard import Leaderboard
+
+from ._loss_store import LossStore
+
+from ._parzen import ParzenSurrogate
+
+from ._quantile import EpochQuantiles, P2Quantile
+
+from ._record import LossRecord
+
+from ._search_space import SearchSpace
@@ -0,0 +1,109 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+from bisect import bisect_left, insort
+
+
+class Leaderboard(object):
+    """Experiments of one rung kept ordered by loss as reports arrive.
+
+    Each experiment holds one entry (its latest report); ties keep arrival
+    order and a NaN loss ranks after every other. Entries are kept in sorted
+    blocks of at most `2*LOAD` keys, found by a binary search over the last key
+    of every block and then within the block, so an update costs
+    O(log n + LOAD) rather than shifting the whole board. `top(k)` is O(k) and
+    `rank`/`in_top` are O(log n + n/LOAD).
+    """
+    LOAD = 256
+
+    def __init__(self):
+        self._blocks = []
+        self._maxes = []
+        self._entries = {}
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, exp_id):
+        return exp_id in self._entries
+
+    def update(self, exp_id, loss_value):
+        if loss_value != loss_value:
+            # NaN compares false with everything and would break the ordering
+            loss_value = float('inf')
+        old = self._entries.get(exp_id)
+        if old is not None:
+            self._remove(old)
+        key = (loss_value, self._seq, exp_id)
+        self._seq += 1
+        self._entries[exp_id] = key
+        self._insert(key)
+
+    def _insert(self, key):
+        blocks, maxes = self._blocks, self._maxes
+        if not blocks:
+            blocks.append([key])
+            maxes.append(key)
+            return
+        pos = bisect_left(maxes, key)
+        if pos == len(maxes):
+            pos -= 1
+            block = blocks[pos]
+            block.append(key)
+            maxes[pos] = key
+        else:
+            block = blocks[pos]
+            insort(block, key)
+        if len(block) > 2*self.LOAD:
+            blocks.insert(pos + 1, block[self.LOAD:])
+            del block[self.LOAD:]
+            maxes[pos] = block[-1]
+            maxes.insert(pos + 1, blocks[pos + 1][-1])
+
+    def _remove(self, key):
+        pos = bisect_left(self._maxes, key)
+        block = self._blocks[pos]
+        del block[bisect_left(block, key)]
+        if block:
+            self._maxes[pos] = block[-1]
+        else:
+            del self._blocks[pos]
+            del self._maxes[pos]
+
+    def loss(self, exp_id):
+        return self._entries[exp_id][0]
+
+    def top(self, k):
+        "The `k` experiments with the lowest loss, best first"
+        top = []
+        for block in self._blocks:
+            if len(top) >= k:
+                break
+            top.extend([key[2] for key in block[:k - len(top)]])
+        return top
+
+    def rank(self, exp_id):
+        "0-based position of `exp_id`, None if it has not reported"
+        key = self._entries.get(exp_id)
+        if key is None:
+            return None
+        pos = bisect_left(self._maxes, key)
+        return sum(map(len, self._blocks[:pos])) + bisect_left(self._blocks[pos], key)
+
+    def in_top(self, exp_id, k):
+        rank = self.rank(exp_id)
+        return rank is not None and rank < k
+
+    def in_top_fraction(self, exp_id, eta):
+        "Whether `exp_id` is within the best `len // eta` experiments"
+        return self.in_top(exp_id, len(self) // eta)
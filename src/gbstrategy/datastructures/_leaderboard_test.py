@@ -0,0 +1,73 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import random
+
+import pytest
+
+from gbstrategy.datastructures import Leaderboard
+
+
+def test_orders_by_loss_and_ties_by_arrival():
+    board = Leaderboard()
+    for exp_id, loss_value in [('a', 0.3), ('b', 0.1), ('c', 0.3), ('d', 0.2), ('e', 0.1)]:
+        board.update(exp_id, loss_value)
+    assert board.top(5) == ['b', 'e', 'd', 'a', 'c']
+    assert [board.rank(e) for e in 'abcde'] == [3, 0, 4, 2, 1]
+    assert board.rank('x') is None
+
+
+def test_update_keeps_latest_report_only():
+    board = Leaderboard()
+    board.update('a', 0.1)
+    board.update('b', 0.2)
+    board.update('a', 0.2)
+    assert len(board) == 2
+    assert board.loss('a') == 0.2
+    # the new report of a ties with b and arrived later
+    assert board.top(2) == ['b', 'a']
+
+
+def test_in_top_fraction():
+    board = Leaderboard()
+    for i in range(10):
+        board.update(i, float(i))
+    assert [board.in_top_fraction(i, 3) for i in range(10)] == [True]*3 + [False]*7
+    assert not board.in_top(10, 5)
+
+
+@pytest.mark.parametrize('num_exps', [50, 5000])
+def test_matches_sorting(num_exps):
+    random.seed(0)
+    board = Leaderboard()
+    latest = {}
+    for seq in range(10*num_exps):
+        exp_id = random.randrange(num_exps)
+        loss_value = random.choice([0.1, 0.2, 0.3, random.random()])
+        board.update(exp_id, loss_value)
+        latest[exp_id] = (loss_value, seq)
+    ranking = sorted(latest, key=latest.get)
+    assert len(board) == len(latest)
+    assert board.top(num_exps) == ranking
+    assert board.top(7) == ranking[:7]
+    assert [board.rank(e) for e in ranking[::97]] == list(range(0, len(ranking), 97))
+
+
+def test_nan_ranks_last_and_is_replaced():
+    board = Leaderboard()
+    for exp_id, loss_value in [('a', 0.3), ('b', float('nan')), ('c', 0.1), ('d', float('inf'))]:
+        board.update(exp_id, loss_value)
+    assert board.top(4) == ['c', 'a', 'b', 'd']
+    board.update('b', 0.2)
+    board.update('c', float('nan'))
+    assert board.top(4) == ['b', 'a', 'd', 'c']
+    assert [board.rank(e) for e in 'abcd'] == [1, 0, 3, 2]
@@ -0,0 +1,316 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+from array import array
+
+import numpy
+
+from ._leaderboard import Leaderboard
+
+
+def _grow(arr, size):
+    "Return `arr` with room for at least `size` items, doubling its capacity when full"
+    if size <= len(arr):
+        return arr
+    new = numpy.empty(max(size, 2*len(arr)), dtype=arr.dtype)
+    new[:len(arr)] = arr
+    return new
+
+
+class _EpochIndex(object):
+    """Contiguous exp codes and loss values of the reports at one epoch.
+
+    The leaderboard is only built when first asked for (most epochs are never
+    ranked) and kept up to date from then on.
+    """
+    __slots__ = ('size', 'exp_code', 'loss_value', '_leaderboard')
+
+    def __init__(self, capacity=16):
+        self.size = 0
+        self.exp_code = numpy.empty(capacity, dtype=numpy.int64)
+        self.loss_value = numpy.empty(capacity, dtype=numpy.float64)
+        self._leaderboard = None
+
+    def append(self, exp_code, loss_value):
+        self.exp_code = _grow(self.exp_code, self.size + 1)
+        self.loss_value = _grow(self.loss_value, self.size + 1)
+        self.exp_code[self.size] = exp_code
+        self.loss_value[self.size] = loss_value
+        self.size += 1
+        if self._leaderboard is not None:
+            self._leaderboard.update(exp_code, loss_value)
+
+    def extend(self, exp_codes, loss_values):
+        size = self.size + len(exp_codes)
+        self.exp_code = _grow(self.exp_code, size)
+        self.loss_value = _grow(self.loss_value, size)
+        self.exp_code[self.size:size] = exp_codes
+        self.loss_value[self.size:size] = loss_values
+        self.size = size
+        if self._leaderboard is not None:
+            for exp_code, loss_value in zip(exp_codes.tolist(), loss_values.tolist()):
+                self._leaderboard.update(exp_code, loss_value)
+
+    def leaderboard(self):
+        if self._leaderboard is None:
+            self._leaderboard = Leaderboard()
+            for exp_code, loss_value in zip(self.exp_code[:self.size].tolist(),
+                                            self.loss_value[:self.size].tolist()):
+                self._leaderboard.update(exp_code, loss_value)
+        return self._leaderboard
+
+
+class LossStore(object):
+    """Columnar store of training losses, indexed by epoch.
+
+    Records are kept in array-backed columns (exp_id code, epoch, loss_name code,
+    loss_value); exp_ids and loss names are stored once and referred to by
+    integer codes. The per-epoch index keeps running counts, so
+    `num_reports(epoch)` is O(1) and `losses(epoch)` is a view, not a copy.
+    """
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._best_loss = None
+        self._exp_code = numpy.empty(capacity, dtype=numpy.int64)
+        self._epoch = numpy.empty(capacity, dtype=numpy.int64)
+        self._loss_code = numpy.empty(capacity, dtype=numpy.int32)
+        self._loss_value = numpy.empty(capacity, dtype=numpy.float64)
+
+        self._exp_ids = []
+        self._exp_codes = {}
+        self._exp_rows = []
+        self._loss_names = []
+        self._loss_codes = {}
+        self._epochs = {}
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for idx in range(self._size):
+            yield self.record(idx)
+
+    def __eq__(self, other):
+        if not isinstance(other, LossStore):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    __hash__ = None
+
+    def append(self, exp_id, epoch, loss_name, loss_value):
+        self.extend([{
+            'exp_id'    : exp_id,
+            'epoch'     : epoch,
+            'loss_name' : loss_name,
+            'loss_value': loss_value,
+        }])
+
+    def extend(self, records):
+        "Append the records (dicts with the `append` arguments) in one pass"
+        exp_codes = [self.exp_code(r['exp_id'], create=True) for r in records]
+        loss_codes = [self._loss_name_code(r['loss_name']) for r in records]
+        epochs = [r['epoch'] for r in records]
+        loss_values = [r['loss_value'] for r in records]
+
+        start = self._size
+        size = start + len(exp_codes)
+        self._exp_code = _grow(self._exp_code, size)
+        self._epoch = _grow(self._epoch, size)
+        self._loss_code = _grow(self._loss_code, size)
+        self._loss_value = _grow(self._loss_value, size)
+
+        self._exp_code[start:size] = exp_codes
+        self._epoch[start:size] = epochs
+        self._loss_code[start:size] = loss_codes
+        self._loss_value[start:size] = loss_values
+        self._size = size
+        if loss_values:
+            best = float(min(loss_values))
+            if self._best_loss is None or best < self._best_loss:
+                self._best_loss = best
+
+        for row, exp_code, epoch, loss_value in zip(range(start, size), exp_codes, epochs, loss_values):
+            self._exp_rows[exp_code].append(row)
+            index = self._epochs.get(epoch)
+            if index is None:
+                index = self._epochs[epoch] = _EpochIndex()
+            index.append(exp_code, loss_value)
+
+    def extend_encoded(self, exp_ids, exp_index, epochs, loss_names, loss_index, loss_values):
+        """Append records given as columns, vectorized.
+
+        exp_ids and loss names are given as index arrays into the `exp_ids` and
+        `loss_names` tables (e.g. the symbol table of a log), so only the
+        distinct values are looked up one by one.
+        """
+        exp_codes = self._encode(exp_index, exp_ids, lambda exp_id: self.exp_code(exp_id, create=True))
+        loss_codes = self._encode(loss_index, loss_names, self._loss_name_code)
+        epochs = numpy.asarray(epochs, dtype=numpy.int64)
+        loss_values = numpy.asarray(loss_values, dtype=numpy.float64)
+        if not len(epochs):
+            return
+
+        start = self._size
+        size = start + len(epochs)
+        self._exp_code = _grow(self._exp_code, size)
+        self._epoch = _grow(self._epoch, size)
+        self._loss_code = _grow(self._loss_code, size)
+        self._loss_value = _grow(self._loss_value, size)
+
+        self._exp_code[start:size] = exp_codes
+        self._epoch[start:size] = epochs
+        self._loss_code[start:size] = loss_codes
+        self._loss_value[start:size] = loss_values
+        self._size = size
+        best = float(loss_values.min())
+        if self._best_loss is None or best < self._best_loss:
+            self._best_loss = best
+
+        rows = numpy.arange(start, size, dtype=numpy.int64)
+        for chunk in self._groups(exp_codes):
+            self._exp_rows[int(exp_codes[chunk[0]])].frombytes(rows[chunk].tobytes())
+        for chunk in self._groups(epochs):
+            epoch = int(epochs[chunk[0]])
+            index = self._epochs.get(epoch)
+            if index is None:
+                index = self._epochs[epoch] = _EpochIndex()
+            index.extend(exp_codes[chunk], loss_values[chunk])
+
+    @staticmethod
+    def _encode(index, table, code):
+        "Map indices into `table` to codes, coding values in order of first appearance"
+        uniq, first, inverse = numpy.unique(numpy.asarray(index), return_index=True,
+                                            return_inverse=True)
+        lookup = numpy.empty(len(uniq), dtype=numpy.int64)
+        for i in numpy.argsort(first, kind='stable'):
+            lookup[i] = code(table[int(uniq[i])])
+        return lookup[inverse.reshape(-1)]
+
+    @staticmethod
+    def _groups(keys):
+        "Positions of `keys` grouped by value, each group in original order"
+        order = numpy.argsort(keys, kind='stable')
+        return numpy.split(order, numpy.flatnonzero(numpy.diff(keys[order])) + 1)
+
+    def _loss_name_code(self, loss_name):
+        code = self._loss_codes.get(loss_name)
+        if code is None:
+            code = self._loss_codes[loss_name] = len(self._loss_names)
+            self._loss_names.append(loss_name)
+        return code
+
+    def exp_code(self, exp_id, create=False):
+        code = self._exp_codes.get(exp_id)
+        if code is None and create:
+            code = self._exp_codes[exp_id] = len(self._exp_ids)
+            self._exp_ids.append(exp_id)
+            self._exp_rows.append(array('q'))
+        return code
+
+    def exp_id(self, code):
+        return self._exp_ids[code]
+
+    def epochs(self):
+        return sorted(self._epochs)
+
+    def num_reports(self, epoch):
+        "Number of losses reported at `epoch`"
+        index = self._epochs.get(epoch)
+        return index.size if index is not None else 0
+
+    def losses(self, epoch):
+        "Read-only view of the loss values reported at `epoch`, in arrival order"
+        index = self._epochs.get(epoch)
+        if index is None:
+            return numpy.empty(0, dtype=numpy.float64)
+        view = index.loss_value[:index.size]
+        view.flags.writeable = False
+        return view
+
+    def exp_codes(self, epoch):
+        "Read-only view of the exp codes matching `losses(epoch)`"
+        index = self._epochs.get(epoch)
+        if index is None:
+            return numpy.empty(0, dtype=numpy.int64)
+        view = index.exp_code[:index.size]
+        view.flags.writeable = False
+        return view
+
+    def history(self, exp_id):
+        "(epochs, loss values) arrays of everything `exp_id` reported, in arrival order"
+        code = self._exp_codes.get(exp_id)
+        rows = numpy.array(self._exp_rows[code] if code is not None else (), dtype=numpy.int64)
+        return self._epoch[rows], self._loss_value[rows]
+
+    def best_loss(self):
+        "Lowest loss value reported so far, None when empty"
+        return self._best_loss
+
+    def leaderboard(self, epoch):
+        "`Leaderboard` of the exp codes that reported at `epoch`"
+        index = self._epochs.get(epoch)
+        return index.leaderboard() if index is not None else Leaderboard()
+
+    def top_exps(self, epoch, num):
+        "exp_ids of the `num` lowest losses at `epoch`, best first"
+        return [self._exp_ids[c] for c in self.leaderboard(epoch).top(num)]
+
+    def in_top_fraction(self, exp_id, epoch, eta):
+        "Whether `exp_id` currently ranks in the top 1/eta of the reports at `epoch`"
+        code = self._exp_codes.get(exp_id)
+        return code is not None and self.leaderboard(epoch).in_top_fraction(code, eta)
+
+    def record(self, idx):
+        return {
+            'exp_id'    : self._exp_ids[self._exp_code[idx]],
+            'epoch'     : int(self._epoch[idx]),
+            'loss_name' : self._loss_names[self._loss_code[idx]],
+            'loss_value': float(self._loss_value[idx]),
+        }
+
+    def columns(self):
+        """The records as read-only column views plus the exp_id and loss name tables.
+
+        Rows are only ever appended, so the views stay valid while the store
+        grows and taking them copies nothing but the two tables; see
+        `from_columns`.
+        """
+        size = self._size
+        columns = {
+            'exp_ids'   : tuple(self._exp_ids),
+            'loss_names': tuple(self._loss_names),
+            'exp_code'  : self._exp_code[:size],
+            'epoch'     : self._epoch[:size],
+            'loss_code' : self._loss_code[:size],
+            'loss_value': self._loss_value[:size],
+        }
+        for key in ('exp_code', 'epoch', 'loss_code', 'loss_value'):
+            columns[key].flags.writeable = False
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns):
+        "A store holding the records of `columns()`, indexed in bulk"
+        store = cls(capacity=max(len(columns['epoch']), 1))
+        store.extend_encoded(columns['exp_ids'], columns['exp_code'], columns['epoch'],
+                             columns['loss_names'], columns['loss_code'], columns['loss_value'])
+        return store
+
+    def to_dict(self):
+        "Columns with decoded exp_ids and loss names, e.g. for `pandas.DataFrame`"
+        size = self._size
+        return {
+            'exp_id'    : [self._exp_ids[c] for c in self._exp_code[:size]],
+            'epoch'     : self._epoch[:size].copy(),
+            'loss_name' : [self._loss_names[c] for c in self._loss_code[:size]],
+            'loss_value': self._loss_value[:size].copy(),
+        }
@@ -0,0 +1,73 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import numpy
+
+from gbstrategy.datastructures import LossStore
+
+
+def make_store():
+    store = LossStore(capacity=2)
+    store.append('a', 1, 'loss', 0.5)
+    store.append('b', 1, 'loss', 0.3)
+    store.extend([
+        {'exp_id': 'c', 'epoch': 1, 'loss_name': 'loss', 'loss_value': 0.3},
+        {'exp_id': 'a', 'epoch': 2, 'loss_name': 'loss', 'loss_value': 0.2},
+        {'exp_id': 'b', 'epoch': 2, 'loss_name': 'other', 'loss_value': 0.4},
+    ])
+    return store
+
+
+def test_records_keep_arrival_order():
+    store = make_store()
+    assert len(store) == 5
+    assert [(r['exp_id'], r['epoch'], r['loss_name']) for r in store] == \
+        [('a', 1, 'loss'), ('b', 1, 'loss'), ('c', 1, 'loss'), ('a', 2, 'loss'), ('b', 2, 'other')]
+    assert store.epochs() == [1, 2]
+    assert [store.num_reports(e) for e in (1, 2, 3)] == [3, 2, 0]
+    assert list(store.losses(1)) == [0.5, 0.3, 0.3]
+    assert store.best_loss() == 0.2
+
+
+def test_history():
+    epochs, losses = make_store().history('a')
+    assert list(epochs) == [1, 2]
+    assert list(losses) == [0.5, 0.2]
+    epochs, losses = make_store().history('x')
+    assert len(epochs) == len(losses) == 0
+
+
+def test_top_exps_break_ties_by_arrival():
+    store = make_store()
+    assert store.top_exps(1, 3) == ['b', 'c', 'a']
+    # the leaderboard is kept up to date once built
+    store.append('d', 1, 'loss', 0.3)
+    assert store.top_exps(1, 4) == ['b', 'c', 'd', 'a']
+    assert store.in_top_fraction('b', 1, 2)
+    assert store.in_top_fraction('c', 1, 2)
+    assert not store.in_top_fraction('d', 1, 2)
+    assert not store.in_top_fraction('x', 1, 2)
+    # a diverged run ranks last
+    store.append('e', 1, 'loss', float('nan'))
+    assert store.top_exps(1, 5) == ['b', 'c', 'd', 'a', 'e']
+
+
+def test_equality_and_columns():
+    store = make_store()
+    assert store == make_store()
+    other = make_store()
+    other.append('a', 3, 'loss', 0.1)
+    assert store != other
+
+    columns = store.to_dict()
+    assert columns['exp_id'] == ['a', 'b', 'c', 'a', 'b']
+    assert numpy.array_equal(columns['epoch'], [1, 1, 1, 2, 2])
@@ -0,0 +1,130 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+from bisect import bisect_right
+import math
+
+import numpy
+
+
+class ParzenSurrogate(object):
+    """Good and bad Parzen densities of TPE over the unit cube, updated one observation at a time.
+
+    Observations are kept sorted by loss and the best `gamma` fraction of
+    them (at least one) are the good ones. Adding an observation moves at
+    most two others between the groups, so the per-group sums behind the
+    bandwidths are updated in O(dim). Both densities mix a Gaussian kernel
+    per observation with a uniform prior. `propose(num)` scores one pool of
+    candidates drawn from the good density, `num_candidates` or four per
+    proposal if that is more, and returns the best l(x)/g(x) of each of `num`
+    equal groups, so a batch costs about as much as a single proposal. Inactive
+    (NaN) coordinates count as the middle of their range.
+    """
+    def __init__(self, dim, gamma=0.25):
+        self.dim = dim
+        self.gamma = gamma
+        self.count = 0
+
+        self._x = numpy.zeros((16, dim))
+        self._losses = []
+        self._order = []
+        # [good, bad] x [sum, sum of squares]
+        self._sums = numpy.zeros((2, 2, dim))
+
+    def __eq__(self, other):
+        if not isinstance(other, ParzenSurrogate):
+            return NotImplemented
+        return (self.dim, self.gamma, self.count, self._losses, self._order) == \
+               (other.dim, other.gamma, other.count, other._losses, other._order) and \
+               numpy.array_equal(self._x[:self.count], other._x[:other.count]) and \
+               numpy.array_equal(self._sums, other._sums)
+
+    __hash__ = None
+
+    def num_good(self, count=None):
+        count = self.count if count is None else count
+        return max(1, int(math.ceil(self.gamma * count))) if count else 0
+
+    def add(self, x, loss):
+        x = numpy.asarray(x, dtype=numpy.float64)
+        x = numpy.where(numpy.isnan(x), 0.5, x)
+        count = self.count
+        if count == len(self._x):
+            self._x = numpy.concatenate([self._x, numpy.zeros_like(self._x)])
+        num_good, new_num_good = self.num_good(count), self.num_good(count + 1)
+        rank = bisect_right(self._losses, loss)
+
+        # only the observations next to the old boundary can change group
+        for old_rank in (num_good - 1, num_good):
+            if 0 <= old_rank < count:
+                new_rank = old_rank if old_rank < rank else old_rank + 1
+                was_good, is_good = old_rank < num_good, new_rank < new_num_good
+                if was_good != is_good:
+                    moved = self._x[self._order[old_rank]]
+                    self._account(moved, 0 if was_good else 1, -1)
+                    self._account(moved, 0 if is_good else 1, 1)
+
+        self._x[count] = x
+        self._losses.insert(rank, float(loss))
+        self._order.insert(rank, count)
+        self._account(x, 0 if rank < new_num_good else 1, 1)
+        self.count = count + 1
+
+    def _account(self, x, group, sign):
+        self._sums[group, 0] += sign * x
+        self._sums[group, 1] += sign * x * x
+
+    def groups(self):
+        "The good and the bad observations, best first"
+        order = numpy.array(self._order, dtype=numpy.int64)
+        num_good = self.num_good()
+        return self._x[order[:num_good]], self._x[order[num_good:]]
+
+    def bandwidths(self, group, size):
+        "Scott's rule on the running sums of one group (0 good, 1 bad)"
+        if size < 2:
+            return numpy.full(self.dim, 0.5)
+        mean = self._sums[group, 0] / size
+        std = numpy.sqrt(numpy.maximum(self._sums[group, 1] / size - mean * mean, 0.))
+        # never narrower than the spacing of `size` points, so clusters keep exploring
+        return numpy.clip(std * size ** (-1. / (self.dim + 4)), 1. / min(100, size + 1), 1.)
+
+    def log_density(self, points, group, candidates):
+        if not len(points):
+            return numpy.zeros(len(candidates))
+        h = self.bandwidths(group, len(points))
+        z = (candidates[:, None, :] - points[None, :, :]) / h
+        log_kernels = -0.5 * (z * z).sum(axis=2) - numpy.log(h * math.sqrt(2 * math.pi)).sum()
+        # the uniform prior has density 1 (log 0) on the unit cube
+        log_terms = numpy.concatenate([numpy.zeros((len(candidates), 1)), log_kernels], axis=1)
+        top = log_terms.max(axis=1)
+        return top + numpy.log(numpy.exp(log_terms - top[:, None]).sum(axis=1)) - math.log(len(points) + 1)
+
+    def propose(self, num, num_candidates=64, rng=None):
+        "A (num, dim) array of proposals in the unit cube, drawn with `rng` or `numpy.random`"
+        rng = numpy.random if rng is None else rng
+        good, bad = self.groups()
+        size = max(num_candidates, 4 * num)
+        h = self.bandwidths(0, len(good))
+
+        # draw from the good density: a kernel of one good observation or the prior
+        component = rng.randint(len(good) + 1, size=size)
+        from_prior = component == len(good)
+        candidates = rng.random_sample((size, self.dim))
+        kernel = ~from_prior
+        candidates[kernel] = numpy.clip(good[component[kernel]] +
+                                        h * rng.standard_normal((kernel.sum(), self.dim)), 0., 1.)
+
+        score = self.log_density(good, 0, candidates) - self.log_density(bad, 1, candidates)
+        group = size // num
+        best = score[:num * group].reshape(num, group).argmax(axis=1)
+        return candidates[numpy.arange(num) * group + best]
@@ -0,0 +1,69 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import math
+
+import numpy
+
+from gbstrategy.datastructures import ParzenSurrogate
+
+
+def brute_force_bandwidths(points, dim):
+    size = len(points)
+    if size < 2:
+        return numpy.full(dim, 0.5)
+    std = numpy.asarray(points).std(axis=0)
+    return numpy.clip(std * size ** (-1. / (dim + 4)), 1. / min(100, size + 1), 1.)
+
+
+def test_incremental_matches_brute_force():
+    rng = numpy.random.RandomState(0)
+    dim, gamma = 3, 0.25
+    surrogate = ParzenSurrogate(dim, gamma)
+    points, losses = [], []
+    for i in range(200):
+        x = rng.random_sample(dim)
+        # repeated losses check that ties keep arrival order
+        loss = float(rng.randint(20)) if i % 2 else rng.random_sample() * 20
+        surrogate.add(x, loss)
+        points.append(x)
+        losses.append(loss)
+
+        order = sorted(range(len(losses)), key=lambda j: losses[j])
+        num_good = max(1, int(math.ceil(gamma * len(losses))))
+        good = [points[j] for j in order[:num_good]]
+        bad = [points[j] for j in order[num_good:]]
+        got_good, got_bad = surrogate.groups()
+        assert numpy.array_equal(got_good, numpy.reshape(good, (-1, dim)))
+        assert numpy.array_equal(got_bad, numpy.reshape(bad, (-1, dim)))
+        assert numpy.allclose(surrogate.bandwidths(0, len(good)), brute_force_bandwidths(good, dim))
+        assert numpy.allclose(surrogate.bandwidths(1, len(bad)), brute_force_bandwidths(bad, dim))
+
+
+def test_inactive_coordinates_count_as_middle():
+    surrogate = ParzenSurrogate(2)
+    surrogate.add([numpy.nan, 0.2], 1.)
+    good, bad = surrogate.groups()
+    assert good.tolist() == [[0.5, 0.2]]
+
+
+def test_propose_prefers_good_region():
+    rng = numpy.random.RandomState(0)
+    surrogate = ParzenSurrogate(1)
+    for _ in range(100):
+        x = rng.random_sample(1)
+        surrogate.add(x, float(abs(x[0] - 0.3)))
+    proposals = surrogate.propose(8, rng=numpy.random.RandomState(1))
+    assert proposals.shape == (8, 1)
+    assert numpy.all((proposals >= 0) & (proposals <= 1))
+    assert abs(numpy.median(proposals) - 0.3) < 0.1
+    assert numpy.array_equal(proposals, surrogate.propose(8, rng=numpy.random.RandomState(1)))
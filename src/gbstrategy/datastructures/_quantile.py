@@ -0,0 +1,138 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+class P2Quantile(object):
+    """Streaming estimate of the `p` quantile in constant memory.
+
+    The P-square algorithm of Jain and Chlamtac (1985): five markers track the
+    minimum, p/2, p, (1+p)/2 quantiles and the maximum, and are moved with a
+    piecewise-parabolic interpolation as values arrive. The first five values
+    are kept exactly.
+    """
+    __slots__ = ('p', 'count', 'previous_value', '_q', '_n')
+
+    def __init__(self, p=0.5):
+        self.p = p
+        self.count = 0
+        self.previous_value = None
+        self._q = []
+        self._n = [0, 1, 2, 3, 4]
+
+    def __eq__(self, other):
+        if not isinstance(other, P2Quantile):
+            return NotImplemented
+        return (self.p, self.count, self._q, self._n) == (other.p, other.count, other._q, other._n)
+
+    __hash__ = None
+
+    def value(self):
+        "Current estimate, None before the first value"
+        return self._value(self.count)
+
+    def _value(self, count):
+        if not count:
+            return None
+        if count <= 5:
+            return sorted(self._q)[min(int(self.p*count), count - 1)]
+        return self._q[2]
+
+    def update(self, x):
+        "Add `x`; `previous_value` keeps the estimate from before"
+        self.extend((x,))
+
+    def extend(self, values):
+        "Add `values` in order, like repeated `update` calls"
+        q, n, p = self._q, self._n, self.p
+        # desired marker positions are (count - 1) * these factors
+        factors = (0., p/2, p, (1 + p)/2)
+        count = self.count
+        previous = self.previous_value
+        for x in values:
+            if count < 5:
+                previous = self._value(count)
+                q.append(x)
+                count += 1
+                if count == 5:
+                    q.sort()
+                continue
+
+            previous = q[2] if count > 5 else q[min(int(p*5), 4)]
+            count += 1
+            if x < q[0]:
+                q[0] = x
+                k = 0
+            elif x >= q[4]:
+                q[4] = x
+                k = 3
+            elif x < q[2]:
+                k = 0 if x < q[1] else 1
+            else:
+                k = 2 if x < q[3] else 3
+            for i in range(k + 1, 5):
+                n[i] += 1
+
+            for i in (1, 2, 3):
+                d = (count - 1)*factors[i] - n[i]
+                if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                    d = 1 if d > 0 else -1
+                    qp = q[i] + d/(n[i + 1] - n[i - 1])*(
+                        (n[i] - n[i - 1] + d)*(q[i + 1] - q[i])/(n[i + 1] - n[i]) +
+                        (n[i + 1] - n[i] - d)*(q[i] - q[i - 1])/(n[i] - n[i - 1]))
+                    if not q[i - 1] < qp < q[i + 1]:
+                        qp = q[i] + d*(q[i + d] - q[i])/(n[i + d] - n[i])
+                    q[i] = qp
+                    n[i] += d
+        self.count = count
+        self.previous_value = previous
+
+
+class EpochQuantiles(object):
+    "One `P2Quantile` per epoch, so memory per epoch is bounded however many report"
+    def __init__(self, p=0.5):
+        self.p = p
+        self._estimators = {}
+
+    def __eq__(self, other):
+        if not isinstance(other, EpochQuantiles):
+            return NotImplemented
+        return self.p == other.p and self._estimators == other._estimators
+
+    __hash__ = None
+
+    def update(self, epoch, value):
+        estimator = self._estimators.get(epoch)
+        if estimator is None:
+            estimator = self._estimators[epoch] = P2Quantile(self.p)
+        estimator.update(value)
+
+    def extend(self, epochs, values):
+        "Add `values` reported at `epochs`, grouped by epoch"
+        groups = {}
+        for epoch, value in zip(epochs, values):
+            groups.setdefault(epoch, []).append(value)
+        for epoch, group in groups.items():
+            estimator = self._estimators.get(epoch)
+            if estimator is None:
+                estimator = self._estimators[epoch] = P2Quantile(self.p)
+            estimator.extend(group)
+
+    def estimator(self, epoch):
+        return self._estimators.get(epoch)
+
+    def value(self, epoch):
+        estimator = self._estimators.get(epoch)
+        return estimator.value() if estimator is not None else None
+
+    def count(self, epoch):
+        estimator = self._estimators.get(epoch)
+        return estimator.count if estimator is not None else 0
@@ -0,0 +1,54 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import numpy
+import pytest
+
+from gbstrategy.datastructures import EpochQuantiles, P2Quantile
+
+
+def test_exact_for_five_values():
+    estimator = P2Quantile(0.5)
+    assert estimator.value() is None
+    for x in [5., 1., 4.]:
+        estimator.update(x)
+    assert estimator.value() == 4.
+
+
+@pytest.mark.parametrize('p', [0.1, 0.5, 0.9])
+@pytest.mark.parametrize('draw', ['uniform', 'normal', 'exponential'])
+def test_accuracy(p, draw):
+    rng = numpy.random.RandomState(0)
+    values = getattr(rng, draw)(size=20000)
+    estimator = P2Quantile(p)
+    estimator.extend(values.tolist())
+    exact = numpy.percentile(values, 100 * p)
+    spread = numpy.percentile(values, 75) - numpy.percentile(values, 25)
+    assert abs(estimator.value() - exact) < 0.02 * spread
+
+
+def test_extend_matches_update():
+    values = numpy.random.RandomState(1).normal(size=100).tolist()
+    one_by_one, batch = P2Quantile(0.3), P2Quantile(0.3)
+    for x in values:
+        one_by_one.update(x)
+    batch.extend(values)
+    assert one_by_one == batch
+    assert one_by_one.previous_value == batch.previous_value
+
+
+def test_epoch_quantiles():
+    quantiles = EpochQuantiles()
+    quantiles.extend([1, 1, 2, 1], [3., 1., 5., 2.])
+    assert quantiles.count(1) == 3
+    assert quantiles.value(1) == 2.
+    assert quantiles.value(2) == 5.
@@ -0,0 +1,51 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import sys
+from collections.abc import Mapping
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class LossRecord(Mapping):
+    """One loss report as a read-only mapping with the `ReceiveTrainingLoss` keys.
+
+    The fields live in `__slots__` rather than a per-record dict, and string
+    exp_ids and loss names are interned so that all reports of an experiment
+    share one string. `dict(record)` gives the plain dict back.
+    """
+    __slots__ = ('exp_id', 'epoch', 'loss_name', 'loss_value')
+
+    def __init__(self, exp_id, epoch, loss_name, loss_value):
+        self.exp_id = _intern(exp_id)
+        self.epoch = epoch
+        self.loss_name = _intern(loss_name)
+        self.loss_value = loss_value
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return 'LossRecord({!r})'.format(dict(self))
+
+    def __reduce__(self):
+        return (LossRecord, (self.exp_id, self.epoch, self.loss_name, self.loss_value))
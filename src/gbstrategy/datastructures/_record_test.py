@@ -0,0 +1,70 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import pickle
+import random
+import tracemalloc
+import uuid
+
+import pytest
+
+from gbstrategy.datastructures import LossRecord, LossStore
+
+
+def test_record_is_a_read_only_mapping():
+    record = LossRecord('a', 3, 'loss', 0.5)
+    assert dict(record) == {'exp_id': 'a', 'epoch': 3, 'loss_name': 'loss', 'loss_value': 0.5}
+    assert record['epoch'] == 3
+    with pytest.raises(KeyError):
+        record['other']
+    assert not hasattr(record, '__dict__')
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_records_share_their_strings():
+    exp_id = str(uuid.UUID(int=7))
+    first = LossRecord(''.join(exp_id), 1, 'loss', 0.5)
+    second = LossRecord(''.join(exp_id), 2, 'loss', 0.4)
+    assert first['exp_id'] is second['exp_id']
+
+
+def bytes_per_record(build, num_records):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / num_records
+
+
+def test_records_and_store_take_less_than_half_of_dicts():
+    random.seed(0)
+    exp_ids = [str(uuid.UUID(int=random.getrandbits(128))) for _ in range(400)]
+    # exp_ids arrive as fresh strings, as they would from a remote driver
+    reports = [(exp_ids[i % 400], i // 400 + 1, random.random()) for i in range(20000)]
+
+    def dicts():
+        logged = [{'exp_id': ''.join(exp_id), 'epoch': epoch, 'loss_name': 'loss', 'loss_value': loss}
+                  for exp_id, epoch, loss in reports]
+        return logged, [dict(data) for data in logged]
+
+    def compact():
+        logged = [LossRecord(''.join(exp_id), epoch, 'loss', loss) for exp_id, epoch, loss in reports]
+        store = LossStore()
+        store.extend(logged)
+        return logged, store
+
+    compact_bytes = bytes_per_record(compact, len(reports))
+    # a slotted record and a store row, against a logged and an aggregated dict
+    assert compact_bytes < 200
+    assert compact_bytes < 0.5 * bytes_per_record(dicts, len(reports))
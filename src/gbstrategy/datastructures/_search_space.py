@@ -0,0 +1,216 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import math
+
+import numpy
+
+
+class _Param(object):
+    "One hyperparameter, mapped from and to the unit interval"
+    def __init__(self, name, spec):
+        self.name = name
+        condition = spec.get('condition') or {}
+        self.condition = {parent: list(values) if isinstance(values, (list, tuple)) else [values]
+                          for parent, values in condition.items()}
+
+    def from_unit(self, u):
+        raise NotImplementedError
+
+    def to_unit(self, values):
+        raise NotImplementedError
+
+
+class _Uniform(_Param):
+    def __init__(self, name, spec):
+        super().__init__(name, spec)
+        self.low, self.high = float(spec['low']), float(spec['high'])
+        if not self.low < self.high:
+            raise ValueError('Hyperparameter <{}> needs low < high'.format(name))
+
+    def from_unit(self, u):
+        return (self.low + u * (self.high - self.low)).tolist()
+
+    def to_unit(self, values):
+        return (numpy.asarray(values, dtype=numpy.float64) - self.low) / (self.high - self.low)
+
+
+class _LogUniform(_Uniform):
+    def __init__(self, name, spec):
+        super().__init__(name, spec)
+        if self.low <= 0:
+            raise ValueError('Hyperparameter <{}> needs low > 0 on a log scale'.format(name))
+        self._log_low, self._log_high = math.log(self.low), math.log(self.high)
+
+    def from_unit(self, u):
+        return numpy.exp(self._log_low + u * (self._log_high - self._log_low)).tolist()
+
+    def to_unit(self, values):
+        return (numpy.log(numpy.asarray(values, dtype=numpy.float64)) - self._log_low) / \
+               (self._log_high - self._log_low)
+
+
+class _Int(_Param):
+    "Integers from low to high, both included, optionally on a log scale"
+    def __init__(self, name, spec):
+        super().__init__(name, spec)
+        self.low, self.high = int(spec['low']), int(spec['high'])
+        self.log = bool(spec.get('log', False))
+        if not self.low <= self.high:
+            raise ValueError('Hyperparameter <{}> needs low <= high'.format(name))
+        if self.log and self.low < 1:
+            raise ValueError('Hyperparameter <{}> needs low >= 1 on a log scale'.format(name))
+
+    def from_unit(self, u):
+        if self.log:
+            values = numpy.exp(math.log(self.low) + u * (math.log(self.high + 1) - math.log(self.low)))
+        else:
+            values = self.low + u * (self.high - self.low + 1)
+        return numpy.clip(numpy.floor(values), self.low, self.high).astype(numpy.int64).tolist()
+
+    def to_unit(self, values):
+        values = numpy.asarray(values, dtype=numpy.float64) + 0.5
+        if self.log:
+            return (numpy.log(values) - math.log(self.low)) / \
+                   (math.log(self.high + 1) - math.log(self.low))
+        return (values - self.low) / (self.high - self.low + 1)
+
+
+class _Categorical(_Param):
+    def __init__(self, name, spec):
+        super().__init__(name, spec)
+        self.choices = list(spec['choices'])
+        if not self.choices:
+            raise ValueError('Hyperparameter <{}> needs at least one choice'.format(name))
+
+    def from_unit(self, u):
+        idx = numpy.minimum((u * len(self.choices)).astype(numpy.int64), len(self.choices) - 1)
+        return [self.choices[i] for i in idx.tolist()]
+
+    def to_unit(self, values):
+        return (numpy.array([self.choices.index(v) for v in values], dtype=numpy.float64) + 0.5) / \
+               len(self.choices)
+
+
+_PARAM_TYPES = {
+    'uniform'    : _Uniform,
+    'loguniform' : _LogUniform,
+    'int'        : _Int,
+    'categorical': _Categorical,
+}
+
+
+class SearchSpace(object):
+    """Hyperparameter space as passed to the `ReceiveHyperparams` trigger.
+
+    Every keyword of the trigger is one hyperparameter:
+
+        learning_rate=[0.001, 0.01]                              # uniform
+        learning_rate={'type': 'loguniform', 'low': 1e-4, 'high': 1e-1}
+        num_layers={'type': 'int', 'low': 1, 'high': 8}          # 'log': True optional
+        optimizer={'type': 'categorical', 'choices': ['sgd', 'adam']}
+        momentum={'type': 'uniform', 'low': 0.5, 'high': 0.99,
+                  'condition': {'optimizer': 'sgd'}}
+
+    A parameter with a `condition` is only active (otherwise None) when each
+    named parent is active and has one of the given values. `sample(n)` draws
+    n points of the unit cube at once, with plain random numbers, a Latin
+    hypercube or a scrambled Sobol sequence (needs scipy), and maps every
+    column to its parameter in one call; `to_unit` is the inverse. Random
+    numbers come from `rng`, a `numpy.random.RandomState`, or the global
+    `numpy.random` state when it is None.
+    """
+    SAMPLERS = ('random', 'lhs', 'sobol')
+
+    def __init__(self, spec):
+        params = {}
+        for name, s in spec.items():
+            if isinstance(s, (list, tuple)) and len(s) == 2:
+                s = {'type': 'uniform', 'low': s[0], 'high': s[1]}
+            if not isinstance(s, dict) or s.get('type') not in _PARAM_TYPES:
+                raise ValueError('Unknown search space definition for hyperparameter <{}>: {!r}'.format(name, s))
+            params[name] = _PARAM_TYPES[s['type']](name, s)
+
+        # parents go before the parameters they condition
+        self.params = []
+        placed = set()
+        while len(self.params) < len(params):
+            ready = [p for p in params.values()
+                     if p.name not in placed and all(parent in placed for parent in p.condition)]
+            if not ready:
+                pending = [p.name for p in params.values() if p.name not in placed]
+                raise ValueError('Conditions of hyperparameters {} refer to unknown or cyclic '
+                                 'parents'.format(pending))
+            self.params.extend(ready)
+            placed.update(p.name for p in ready)
+
+    @property
+    def names(self):
+        return [p.name for p in self.params]
+
+    @property
+    def dim(self):
+        return len(self.params)
+
+    def unit_sample(self, n, sampler='random', rng=None):
+        "n points of the unit cube of shape (n, dim), in `names` order"
+        rng = numpy.random if rng is None else rng
+        if sampler == 'random':
+            return rng.random_sample((n, self.dim))
+        if sampler == 'lhs':
+            # one point per 1/n stratum of every axis, strata shuffled per axis
+            strata = numpy.argsort(rng.random_sample((n, self.dim)), axis=0)
+            return (strata + rng.random_sample((n, self.dim))) / n
+        if sampler == 'sobol':
+            try:
+                from scipy.stats import qmc
+            except ImportError:
+                raise ImportError("The 'sobol' sampler needs scipy")
+            return qmc.Sobol(self.dim, scramble=True, seed=rng.randint(2**31)).random(n)
+        raise ValueError('Unknown sampler <{}>, expected one of {}'.format(sampler, self.SAMPLERS))
+
+    def sample(self, n, sampler='random', rng=None):
+        "n hyperparameter dicts"
+        return self.from_unit(self.unit_sample(n, sampler, rng))
+
+    def from_unit(self, unit):
+        unit = numpy.asarray(unit, dtype=numpy.float64).reshape(-1, self.dim)
+        # inactive (NaN) coordinates of `to_unit` map to None below anyway
+        unit = numpy.where(numpy.isnan(unit), 0.5, unit)
+        n = len(unit)
+        columns = {}
+        for j, p in enumerate(self.params):
+            values = p.from_unit(unit[:, j])
+            if p.condition:
+                active = self._active(p, columns, n)
+                values = [v if a else None for v, a in zip(values, active)]
+            columns[p.name] = values
+        names = self.names
+        return [dict(zip(names, row)) for row in zip(*[columns[name] for name in names])] \
+               if names else [{} for _ in range(n)]
+
+    def to_unit(self, hyperparams_list):
+        "Inverse of `from_unit`, with NaN for inactive parameters"
+        unit = numpy.full((len(hyperparams_list), self.dim), numpy.nan)
+        for j, p in enumerate(self.params):
+            values = [h.get(p.name) for h in hyperparams_list]
+            rows = [i for i, v in enumerate(values) if v is not None]
+            if rows:
+                unit[rows, j] = p.to_unit([values[i] for i in rows])
+        return unit
+
+    @staticmethod
+    def _active(param, columns, n):
+        active = [True] * n
+        for parent, allowed in param.condition.items():
+            active = [a and v is not None and v in allowed for a, v in zip(active, columns[parent])]
+        return active
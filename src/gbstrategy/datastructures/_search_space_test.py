@@ -0,0 +1,101 @@
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import numpy
+import pytest
+
+from gbstrategy.datastructures import SearchSpace
+
+
+SPEC = {
+    'learning_rate': {'type': 'loguniform', 'low': 1e-4, 'high': 1e-1},
+    'dropout'      : [0., 0.5],
+    'num_layers'   : {'type': 'int', 'low': 1, 'high': 8},
+    'width'        : {'type': 'int', 'low': 16, 'high': 512, 'log': True},
+    'optimizer'    : {'type': 'categorical', 'choices': ['sgd', 'adam']},
+    'momentum'     : {'type': 'uniform', 'low': 0.5, 'high': 0.99,
+                      'condition': {'optimizer': 'sgd'}},
+    'nesterov'     : {'type': 'categorical', 'choices': [False, True],
+                      'condition': {'optimizer': ['sgd']}},
+}
+
+
+def test_parents_come_first():
+    names = SearchSpace(SPEC).names
+    assert names.index('optimizer') < names.index('momentum')
+    assert names.index('optimizer') < names.index('nesterov')
+
+
+@pytest.mark.parametrize('sampler', ['random', 'lhs'])
+def test_samples_in_range(sampler):
+    space = SearchSpace(SPEC)
+    for h in space.sample(200, sampler, numpy.random.RandomState(0)):
+        assert 1e-4 <= h['learning_rate'] <= 1e-1
+        assert 0. <= h['dropout'] <= 0.5
+        assert 1 <= h['num_layers'] <= 8 and isinstance(h['num_layers'], int)
+        assert 16 <= h['width'] <= 512
+        assert h['optimizer'] in ('sgd', 'adam')
+
+
+def test_conditions():
+    space = SearchSpace(SPEC)
+    samples = space.sample(200, rng=numpy.random.RandomState(0))
+    for h in samples:
+        assert (h['momentum'] is not None) == (h['optimizer'] == 'sgd')
+        assert (h['nesterov'] is not None) == (h['optimizer'] == 'sgd')
+    assert {h['optimizer'] for h in samples} == {'sgd', 'adam'}
+
+
+def test_unit_round_trip():
+    space = SearchSpace(SPEC)
+    samples = space.sample(100, rng=numpy.random.RandomState(0))
+    unit = space.to_unit(samples)
+    assert numpy.all(numpy.isnan(unit) | ((unit >= 0) & (unit <= 1)))
+    back = space.from_unit(unit)
+    for h, b in zip(samples, back):
+        assert set(h) == set(b)
+        for name in h:
+            if isinstance(h[name], float):
+                assert b[name] == pytest.approx(h[name])
+            else:
+                assert b[name] == h[name]
+
+
+def test_lhs_covers_every_stratum():
+    unit = SearchSpace(SPEC).unit_sample(50, 'lhs', numpy.random.RandomState(0))
+    for column in unit.T:
+        assert sorted((column * 50).astype(int).tolist()) == list(range(50))
+
+
+def test_rng_makes_samples_reproducible():
+    space = SearchSpace(SPEC)
+    assert space.sample(10, rng=numpy.random.RandomState(3)) == \
+        space.sample(10, rng=numpy.random.RandomState(3))
+
+
+@pytest.mark.parametrize('spec', [
+    {'a': [1.]},
+    {'a': {'type': 'normal'}},
+    {'a': {'type': 'uniform', 'low': 1, 'high': 1}},
+    {'a': {'type': 'loguniform', 'low': 0, 'high': 1}},
+    {'a': {'type': 'categorical', 'choices': []}},
+    {'a': {'type': 'uniform', 'low': 0, 'high': 1, 'condition': {'b': 1}},
+     'b': {'type': 'uniform', 'low': 0, 'high': 1, 'condition': {'a': 1}}},
+])
+def test_invalid_definitions(spec):
+    with pytest.raises(ValueError):
+        SearchSpace(spec)
+
+
+def test_unknown_sampler():
+    with pytest.raises(ValueError):
+        SearchSpace(SPEC).unit_sample(4, 'grid')